@@ -0,0 +1,89 @@
+"""
+Benchmark de los dos modos de gráficos del PDF (`PDF(formato_graficos=...)`):
+imagen PNG (900x450 a escala 2) frente a SVG vectorial.
+
+Mide, para un informe con gráficos sintéticos del estilo de los de `graphics`
+(líneas con anotaciones, barras con texto y barra de color), el tiempo de
+generación sin caché de gráficos (primer informe) y con caché (informe repetido),
+y el tamaño del PDF resultante.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_graficos_pdf [graficos]
+"""
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+import plotly.graph_objects as go
+
+from utils import constants
+from utils import render
+from utils.pdf import PDF
+
+def _figura(i, seed=0):
+    rng = np.random.default_rng(seed + i)
+    fechas = ["Ene-2025", "Feb-2025", "Mar-2025", "Abr-2025", "May-2025"]
+    valores = rng.normal(30, 6, len(fechas)).round(2)
+    fig = go.Figure()
+    if i % 2 == 0:
+        fig.add_trace(go.Scatter(x=fechas, y=valores, mode="lines+markers+text", name="JUGADOR",
+                                 text=[f"{v:.2f}" for v in valores], textposition="top center"))
+        fig.add_trace(go.Scatter(x=fechas, y=valores * 0.9, mode="lines", name="PROMEDIO U19",
+                                 line=dict(dash="dash")))
+        fig.add_annotation(x=fechas[int(np.argmin(valores))], y=float(valores.min()),
+                           text=f"Min : {valores.min():.2f} seg", bgcolor="gray", font=dict(color="white"))
+    else:
+        fig.add_trace(go.Bar(x=fechas, y=valores, text=[f"{v:.2f} kg" for v in valores],
+                             textposition="inside", name="PESO (KG)"))
+        fig.add_trace(go.Scatter(x=fechas, y=[None] * len(fechas), mode="markers", showlegend=False,
+                                 marker=dict(colorscale=[[0, "red"], [0.5, "yellow"], [1, "green"]],
+                                             cmin=0, cmax=40, color=[0], showscale=True)))
+        fig.add_hline(y=25, line_dash="dash", line_color="green", annotation_text="ZONA ÓPTIMA")
+    fig.update_layout(title=f"<b>GRÁFICO {i + 1}</b> (SEG)", template="plotly_white",
+                      yaxis_title="TIEMPO (SEG)", legend=dict(orientation="h"))
+    return fig
+
+def _informe(figuras, formato):
+    # Misma maquetación que el reporte simple: dos gráficos por fila
+    pdf = PDF(fecha_actual="01/01/2025", formato_graficos=formato)
+    pdf.add_page()
+    render.renderizar_figuras(figuras, formato=formato)
+    for i, fig in enumerate(figuras):
+        if i % 4 == 0 and i:
+            pdf.add_page()
+        x = 10 if i % 2 == 0 else 105
+        y = 40 + (i % 4 // 2) * 70
+        pdf.add_plotly_figure(fig, "", x=x - 3, y=y, w=99, h=55)
+    return bytes(pdf.output())
+
+def main(graficos=8):
+    figuras = [_figura(i) for i in range(graficos)]
+    cache_original = constants.RENDER_CACHE_DIR
+    print(f"Informe con {graficos} gráficos\n")
+    print(f"  {'formato':<8} {'sin caché':>12} {'con caché':>12} {'tamaño PDF':>12}")
+    try:
+        for formato in ("png", "svg"):
+            # Caché de gráficos vacía para medir la exportación con kaleido
+            constants.RENDER_CACHE_DIR = tempfile.mkdtemp(prefix="bench_graficos_")
+            with render._lock_memoria:
+                render._memoria.clear()
+            render._cola_scopes()  # arrancar kaleido fuera de la medición
+
+            inicio = time.perf_counter()
+            contenido = _informe(figuras, formato)
+            t_frio = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            _informe(figuras, formato)
+            t_caliente = time.perf_counter() - inicio
+
+            shutil.rmtree(constants.RENDER_CACHE_DIR, ignore_errors=True)
+            print(f"  {formato:<8} {t_frio * 1000:9.0f} ms {t_caliente * 1000:9.0f} ms "
+                  f"{len(contenido) / 1024:9.0f} KB")
+    finally:
+        constants.RENDER_CACHE_DIR = cache_original
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8)
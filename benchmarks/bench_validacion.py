@@ -0,0 +1,61 @@
+"""
+Micro-benchmark de las máscaras de validación (`util.mascara_vacios_o_ceros` y
+`util.mascara_numericos`) frente a los callbacks por celda que reemplazan.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_validacion [filas]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import util
+
+def _hoja_sintetica(filas, seed=0):
+    # Hoja tipo CHECK-IN: identificación en texto, métricas con números, vacíos, ceros y textos
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "ID": [f"J{i:05d}" for i in rng.integers(0, 2000, filas)],
+        "JUGADOR": rng.choice(["ANA", "LUIS", "MARTA", "PEDRO"], filas),
+        "FECHA REGISTRO": rng.choice(["01/02/2024", "15/03/2024", ""], filas),
+    })
+    for j in range(12):
+        valores = rng.normal(50, 15, filas).round(2).astype(object)
+        sorteo = rng.random(filas)
+        valores[sorteo < 0.25] = 0
+        valores[(sorteo >= 0.25) & (sorteo < 0.45)] = None
+        valores[(sorteo >= 0.45) & (sorteo < 0.50)] = ""
+        valores[(sorteo >= 0.50) & (sorteo < 0.52)] = "12,5"
+        df[f"METRICA {j}"] = valores
+    return df
+
+def _medir(nombre, funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    print(f"  {nombre:<32} {min(tiempos) * 1000:9.1f} ms")
+    return resultado, min(tiempos)
+
+def main(filas=50_000):
+    df = _hoja_sintetica(filas)
+    metricas = [c for c in df.columns if c.startswith("METRICA")]
+    print(f"Hoja sintética: {filas} filas x {df.shape[1]} columnas\n")
+
+    print("Vacíos o ceros (columnas_sin_datos_utiles / separar_dataframe_por_estructura)")
+    antes, t_antes = _medir("map(lambda)", lambda: df[metricas].map(lambda x: pd.isna(x) or x == 0))
+    despues, t_despues = _medir("mascara_vacios_o_ceros", lambda: util.mascara_vacios_o_ceros(df[metricas]))
+    pd.testing.assert_frame_equal(antes, despues)
+    print(f"  -> x{t_antes / t_despues:.1f}\n")
+
+    print("Celdas numéricas (get_test_data)")
+    antes, t_antes = _medir("map(es_numerico)", lambda: df.map(util.es_numerico))
+    despues, t_despues = _medir("mascara_numericos", lambda: util.mascara_numericos(df))
+    pd.testing.assert_frame_equal(antes, despues)
+    print(f"  -> x{t_antes / t_despues:.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -117,7 +117,7 @@ def get_agilidad_colorbar_agregada(fig, y_min, y_max, gender, categoria):
 def get_agility_graph_combined_simple(df_agility, df_promedios, categoria, equipo, metricas, columnas_fecha_registro, idioma="es", barras=False, cat_label="U19", gender="H"):
 
     df = pd.DataFrame(df_agility)
-    df[columnas_fecha_registro] = pd.to_datetime(df[columnas_fecha_registro], format="%d/%m/%Y", errors="coerce")
+    df[columnas_fecha_registro] = util.a_fecha(df[columnas_fecha_registro])
     df = df.sort_values(by=columnas_fecha_registro)
 
     fechas_unicas = pd.to_datetime(df[columnas_fecha_registro].dropna().unique())
@@ -463,7 +463,7 @@ def get_diferencia_agilidad(df_agility, metricas, columna_fecha):
         list[dict]: Lista con fecha y diferencia porcentual para cada fila válida.
     """
     df = df_agility.copy()
-    df[columna_fecha] = pd.to_datetime(df[columna_fecha], format="%d/%m/%Y", errors="coerce")
+    df[columna_fecha] = util.a_fecha(df[columna_fecha])
     df = df.sort_values(by=columna_fecha)
 
     diferencias = []
@@ -485,7 +485,7 @@ def get_diferencia_agilidad(df_agility, metricas, columna_fecha):
 def get_agility_graph_combined(df_agility, df_promedios, categoria, equipo, metricas, columnas_fecha_registro, idioma="es"):
 
     df = pd.DataFrame(df_agility)
-    df[columnas_fecha_registro] = pd.to_datetime(df[columnas_fecha_registro], format="%d/%m/%Y", errors="coerce")
+    df[columnas_fecha_registro] = util.a_fecha(df[columnas_fecha_registro])
     df = df.sort_values(by=columnas_fecha_registro)
 
     #metricas = ["PIERNA IZQ (SEG)", "PIERNA DER (SEG)"]
@@ -673,7 +673,7 @@ def get_agility_graph_nd(df_agility, df_promedios, categoria, equipo):
 
 def _render_agility_graph(df_agility, df_promedios, categoria, equipo, metrica, nombre_legenda, color, color_promedio):
     df = pd.DataFrame(df_agility)
-    df["FECHA REGISTRO"] = pd.to_datetime(df["FECHA REGISTRO"], format="%d/%m/%Y", errors="coerce")
+    df["FECHA REGISTRO"] = util.a_fecha(df["FECHA REGISTRO"])
     df = df.sort_values(by="FECHA REGISTRO")
 
     tolerancia = 0.05
@@ -93,7 +93,7 @@ def calcular_rango_cmj(valores, escala, genero):
 
 def get_cmj_graph(df_cmj, promedios, categoria, equipo, metricas, columna_fecha_registro, idioma="es", barras=False, gender="H", cat_label="U19"):
     df = pd.DataFrame(df_cmj)
-    df[columna_fecha_registro] = pd.to_datetime(df[columna_fecha_registro], format="%d/%m/%Y")
+    df[columna_fecha_registro] = util.a_fecha(df[columna_fecha_registro])
     df = df.sort_values(by=columna_fecha_registro)
 
     fechas_unicas = df[columna_fecha_registro].dropna().drop_duplicates().sort_values()
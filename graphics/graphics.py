@@ -158,7 +158,7 @@ def asignar_color_grasa(valor, genero, categoria):
 
 def get_anthropometrics_graph(df_antropometria, categoria, zona_optima_min, zona_optima_max, idioma="es", barras=False, gender="H", cat_label="U19"):
     df = pd.DataFrame(df_antropometria)
-    df["FECHA REGISTRO"] = pd.to_datetime(df["FECHA REGISTRO"], format="%d/%m/%Y")
+    df["FECHA REGISTRO"] = util.a_fecha(df["FECHA REGISTRO"])
     df = df.sort_values(by="FECHA REGISTRO")
 
     metricas = ["PESO (KG)", "GRASA (%)"]
@@ -440,7 +440,7 @@ def mostrar_percentiles_coloreados(jugador: dict, percentiles: dict):
 
 def get_height_graph(df_altura, idioma="es", barras=False):
     df = pd.DataFrame(df_altura)
-    df["FECHA REGISTRO"] = pd.to_datetime(df["FECHA REGISTRO"], format="%d/%m/%Y")
+    df["FECHA REGISTRO"] = util.a_fecha(df["FECHA REGISTRO"])
     df = df.sort_values(by="FECHA REGISTRO")
 
     if "ALTURA (CM)" not in df.columns:
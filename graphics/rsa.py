@@ -8,7 +8,7 @@ from utils import traslator
 
 def get_rsa_graph(df_rsa, df_promedios_rsa, categoria, equipo, metricas, columna_fecha_registro, idioma="es", barras=False, cat_label="U19"):
     df = pd.DataFrame(df_rsa)
-    df[columna_fecha_registro] = pd.to_datetime(df[columna_fecha_registro], format="%d/%m/%Y")
+    df[columna_fecha_registro] = util.a_fecha(df[columna_fecha_registro])
     df = df.sort_values(by=columna_fecha_registro)
 
     fechas_unicas = pd.to_datetime(df[columna_fecha_registro].dropna().unique())
@@ -211,7 +211,7 @@ def get_rsa_graph(df_rsa, df_promedios_rsa, categoria, equipo, metricas, columna
 
 def get_rsa_velocity_graph(df_rsa, df_promedios_rsa, categoria, equipo, metric, fecha_registro, idioma="es", barras=False, cat_label="U19"):
     df = df_rsa.copy()
-    df[fecha_registro] = pd.to_datetime(df[fecha_registro], format="%d/%m/%Y", errors="coerce")
+    df[fecha_registro] = util.a_fecha(df[fecha_registro])
     df = df.sort_values(by=fecha_registro)
 
     title = traslator.traducir("VELOCIDAD (M/S)", idioma)
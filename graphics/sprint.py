@@ -87,7 +87,7 @@ def get_sprint_graph(
     gender="H"
 ):
     df = df_sprint.copy()
-    df[columnas_fecha_registro] = pd.to_datetime(df[columnas_fecha_registro], format="%d/%m/%Y", errors='coerce')
+    df[columnas_fecha_registro] = util.a_fecha(df[columnas_fecha_registro])
     df = df.sort_values(by=columnas_fecha_registro)
 
     fechas_unicas = df[columnas_fecha_registro].dropna().drop_duplicates().sort_values()
@@ -312,7 +312,7 @@ def get_sprint_graph_vt(
 ):
 
     df = df_sprint.copy()
-    df[columnas_fecha_registro] = pd.to_datetime(df[columnas_fecha_registro], format="%d/%m/%Y", errors='coerce')
+    df[columnas_fecha_registro] = util.a_fecha(df[columnas_fecha_registro])
     df = df.sort_values(by=columnas_fecha_registro)
 
     color_barra = "#66c2ff"
@@ -529,7 +529,7 @@ def get_sprint_graph_vt(
 
 def get_sprint_time_graph(df_sprint, df_promedios, categoria, equipo):
     df = df_sprint.copy()
-    df["FECHA REGISTRO"] = pd.to_datetime(df["FECHA REGISTRO"], format="%d/%m/%Y", errors='coerce')
+    df["FECHA REGISTRO"] = util.a_fecha(df["FECHA REGISTRO"])
     df = df.sort_values(by="FECHA REGISTRO")
 
     metricas = ["TIEMPO 0-5M (SEG)", "TIEMPO 20-40M (SEG)"]
@@ -8,7 +8,7 @@ from utils import traslator
 
 def get_yoyo_graph(df_yoyo, df_promedios_yoyo, categoria, equipo, metrica, columna_fecha_registro, idioma="es", barras=False, cat_label="U19"):
     df = pd.DataFrame(df_yoyo)
-    df[columna_fecha_registro] = pd.to_datetime(df[columna_fecha_registro], format="%d/%m/%Y", errors='coerce')
+    df[columna_fecha_registro] = util.a_fecha(df[columna_fecha_registro])
     df = df[[columna_fecha_registro, metrica]].dropna().sort_values(columna_fecha_registro)
 
     if df.empty or metrica not in df.columns:
@@ -5,8 +5,8 @@ import warnings
 from utils import util
 from utils import login
 from utils import connector_sgs
+from utils import connector_gs
 from utils import data_util
-from utils.constants import COLUMNAS_EXCLUIDAS
 
 warnings.filterwarnings("ignore", message="When grouping with a length-1 list-like")
 
@@ -27,11 +27,10 @@ if "usuario" not in st.session_state:
 
 st.header('Bienvenido a :orange[Marcet]')
 
-df_datos, df_data_test, df_checkin = data_util.load_player_and_physical_data(conn, connector_sgs.get_data)
-total_jugadores = len(df_datos)
+dataset = data_util.get_dataset(conn, connector_sgs.get_data, connector_gs.get_bulk_data)
+total_jugadores = len(dataset["datos"])
 
-df_joined = util.join_player_and_physical_data(df_datos, df_data_test)
-df_joined = util.limpiar_filas_sin_datos_validos(df_joined, COLUMNAS_EXCLUIDAS)
+df_joined = dataset["joined_limpio"]
 df_sesiones = util.resumen_sesiones(df_joined, total_jugadores)
 
 #########################################################
@@ -78,5 +77,4 @@ st.divider()
 
 if not df_joined.empty: 
     st.markdown("📆 **Cantidad de Sesiones por jugador**")
-    _, test_cat, _ = data_util.get_diccionario_test_categorias(conn, connector_sgs.get_data)
-    st.dataframe(util.sesiones_por_test(df_joined, test_cat))
+    st.dataframe(util.sesiones_por_test(df_joined, dataset["test_cat"]))
@@ -3,24 +3,23 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import base64
 
 from graphics import graphics
-from graphics import cmj as cmjg
-from graphics import sprint as sprintg
-from graphics import yoyo as yoyog
-from graphics import rsa as rsag
 from graphics import agilidad as agilidadg
 from datetime import date
 
 from utils import util
 from utils import player
 from utils import reporte as report
-from utils import traslator
 from utils import login
 from utils import connector_sgs
+from utils import connector_gs
 from utils import data_util
 from utils import constants
+from utils import matriz
+from utils import fotos
+from utils import cache_reportes
+from utils import graficos_jugador
 
 st.set_page_config(
     page_title="PlayerHub",
@@ -35,24 +34,25 @@ fecha_actual = date.today()
 def bloque_conexion():
     conn = connector_sgs.get_connector()  # Esto se ejecuta cada vez que el fragmento se monta
     
-    # Conexion, lectura y limpieza lectura de datos
+    # Conexion, lectura y limpieza lectura de datos (cacheado por versión de los datos)
     ###################################################
-    _, test_cat, lista_columnas = data_util.get_diccionario_test_categorias(conn, connector_sgs.get_data)
-
-    df_datos, df_data_test, df_checkin = data_util.load_player_and_physical_data(conn, connector_sgs.get_data)
-    df_joined = util.join_player_and_physical_data(df_datos, df_data_test)
-    
-    datatest_columns = util.get_dataframe_columns(df_data_test)
-    columnas_a_verificar = [col for col in datatest_columns if col not in constants.COLUMNAS_EXCLUIDAS_PROMEDIO]
-    
-    df_data_test_final, df_datos_final = util.actualizar_datos_con_checkin(df_datos, df_checkin, df_joined)
+    dataset = data_util.get_dataset(conn, connector_sgs.get_data, connector_gs.get_bulk_data)
     
-    return conn, df_datos_final, df_data_test_final, test_cat, columnas_a_verificar, lista_columnas
+    return conn, dataset
     ###################################################
 
 # 📡 Conexión con Google Sheets
 #conn = st.connection("gsheets", type=GSheetsConnection)
-conn, df_datos_final, df_data_test_final, test_cat, columnas_a_verificar, lista_columnas = bloque_conexion()
+conn, dataset = bloque_conexion()
+df_datos_final = dataset["datos_final"]
+df_data_test_final = dataset["tests_final"]
+test_cat = dataset["test_cat"]
+columnas_a_verificar = dataset["columnas_metricas"]
+lista_columnas = dataset["lista_columnas"]
+
+# Índice de jugadores sobre los datos completos (construido con el dataset)
+df_datos_completo = df_datos_final
+indice_jugadores = dataset["indice"]
 
 # 🔐 Verificación de sesión
 login.generarLogin(conn)
@@ -80,13 +80,17 @@ if gender_type != "NA":
 
 on = st.toggle("Mostrar solo jugadores con registros")
 if on:
-    df_sesiones = util.sesiones_por_test(df_data_test_final, test_cat)
+    df_sesiones = matriz.contar_sesiones(dataset["matriz"])
     df_datos_final = df_datos_final[df_datos_final[constants.JUGADOR_LABEL].isin(df_sesiones[constants.JUGADOR_LABEL])]
     #df_datos_filtrado = util.get_filters(df_filtrado)
 #else:
 
 df_datos_filtrado = util.get_filters(df_datos_final)
 
+# Precargar en segundo plano las fotos de la selección (equipo/categoría) para que elegir jugador no espere a Drive
+if 1 < len(df_datos_filtrado) <= constants.FOTOS_MAX_PRECARGA and "FOTO PERFIL" in df_datos_filtrado.columns:
+    fotos.precargar_en_segundo_plano(df_datos_filtrado["FOTO PERFIL"].map(player.convert_drive_url))
+
 with st.expander("Configuración Avanzada"):
 
     col1, col2, col3 = st.columns([1,1,2])
@@ -107,8 +111,6 @@ with st.expander("Configuración Avanzada"):
         st.warning("❌ La fecha final no puede ser anterior a la fecha inicial.")
         st.stop()
 
-    test_data_filtered = util.filtrar_por_rango_fechas(df_data_test_final, constants.FECHA_REGISTRO_LABEL, fecha_inicio, fecha_fin)
-
     #st.divider()
     idiomas = ["Español", "Inglés", "Francés", "Italiano", "Alemán", "Catalán", "Portugues"]
     idioma_map = {
@@ -127,7 +129,13 @@ with st.expander("Configuración Avanzada"):
 
     #st.divider()
     type_report = ["Simple", "Avanzado"]
-    tipo_reporte = st.radio("Tipo Reporte", type_report, horizontal=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        tipo_reporte = st.radio("Tipo Reporte", type_report, horizontal=True)
+    with col2:
+        formato_map = {"Imagen (PNG)": "png", "Vectorial (SVG)": "svg"}
+        formato_graficos = formato_map[st.radio("Gráficos PDF", list(formato_map), horizontal=True,
+                                                help="Vectorial: PDF más ligero y nítido al ampliar.")]
 
     if tipo_reporte == "Simple":
         tipo_reporte_bool = True
@@ -138,18 +146,22 @@ with st.expander("Configuración Avanzada"):
 ###################################################
 df_promedios =  util.calcular_promedios_filtrados(df_data_test_final, columnas_a_verificar, 
                                                   constants.CATEGORIA_LABEL, constants.EQUIPO_LABEL, 
-                                                  constants.EQUIPO_PROMEDIO)
+                                                  constants.EQUIPO_PROMEDIO, matriz_tests=dataset["matriz"],
+                                                  version=dataset["version"])
 
 ###################################################
 if df_datos_filtrado.empty or len(df_datos_filtrado) > 1:
     st.warning("No se ha encontrado información o aun no ha seleccionado a un jugador.")
 else:
-    df_datos_final["FOTO PERFIL"] = df_datos_final["FOTO PERFIL"].apply(player.convert_drive_url)
-    
     # Sección datos de usuario
-    df_joined_filtrado, df_jugador, categoria, equipo, gender = player.player_block(df_datos_filtrado, df_datos_final, test_data_filtered, constants.UNAVAILABLE, idioma)
+    df_joined_filtrado, df_jugador, categoria, equipo, gender = player.player_block(
+        df_datos_filtrado, df_datos_completo, df_data_test_final, constants.UNAVAILABLE, idioma, indice=indice_jugadores)
+
+    # Filtrar por fechas solo los registros del jugador
+    df_joined_filtrado = util.filtrar_por_rango_fechas(df_joined_filtrado, constants.FECHA_REGISTRO_LABEL, fecha_inicio, fecha_fin)
     
-    cat_label = "U19" if categoria.lower() == "juvenil" else "U15"
+    # Mismos gráficos y observaciones que los reportes por lote (utils/graficos_jugador.py)
+    ctx = graficos_jugador.contexto(df_promedios, categoria, equipo, gender, idioma, tipo_reporte_bool)
    
     if not df_datos_filtrado.empty:
         antropometria, cmj, sprint, yoyo, agilidad, rsa, reporte = st.tabs(lista_columnas + ["REPORTE"])
@@ -172,34 +184,12 @@ else:
             if len(df_joined_filtrado) > 0:
                 ######################################################################################################
                 ## ANTROPOMETRIA
-                columns = list(test_cat.get(lista_columnas[0], []))
-                
-                df_anthropometrics = df_joined_filtrado[[constants.FECHA_REGISTRO_LABEL] + columns]
-                df_anthropometrics = df_anthropometrics.reset_index(drop=True)
+                # Sin las filas donde TODAS las columnas del test sean cero o nulas
+                df_anthropometrics, columns = graficos_jugador.seccion(df_joined_filtrado, test_cat, lista_columnas, 0)
                 
                 if not util.columnas_sin_datos_utiles(df_anthropometrics, [constants.FECHA_REGISTRO_LABEL]):
                     
-                    # Eliminar las filas donde TODAS las columnas filtradas sean cero o nulas
-                    df_anthropometrics = df_anthropometrics[~(df_anthropometrics[columns] == 0).all(axis=1)]
-                    
                     st.markdown("📆 **Ultímas Mediciones**")
-
-                    zona_optima_min = 8
-                    zona_optima_max = 16
-                    if categoria == "Juvenil":
-                        if gender == "H":
-                            zona_optima_min = 8
-                            zona_optima_max = 14   
-                        elif gender == "M":
-                            zona_optima_min = 9
-                            zona_optima_max = 14
-                    elif categoria == "Cadete":
-                        if gender == "H":
-                            zona_optima_min = 8
-                            zona_optima_max = 16  
-                        elif gender == "M":
-                            zona_optima_min = 8
-                            zona_optima_max = 14  
                     
                     col1, col2, col3, col4 = st.columns(4)
                     with col1:
@@ -222,21 +212,19 @@ else:
                     
                     with col4:
                         act = df_anthropometrics[constants.FECHA_REGISTRO_LABEL].iloc[0]
-                        st.metric("Último Registro", act)
+                        st.metric("Último Registro", util.formatear_fecha(act))
 
-                    observacion = util.get_observacion_grasa(gact, categoria.lower(), gender)
-                    observacion = traslator.traducir(observacion, idioma)
+                    observacion = graficos_jugador.observacion_antropometria(df_anthropometrics, columns, ctx)
                     
                     if(gact < 7) or (gact > 15):
                         st.warning(f"{observacion}", icon="⚠️")
                     else:
                         st.success(f"{observacion}", icon="✅")
                     
-                    observaciones_dict["Peso y % Grasa"] = observacion
-
-                    figalt = graphics.get_height_graph(df_anthropometrics, idioma, tipo_reporte_bool)
+                    observaciones_dict[graficos_jugador.OBSERVACIONES["antropometria"]] = observacion
 
-                    figant = graphics.get_anthropometrics_graph(df_anthropometrics, categoria, zona_optima_min, zona_optima_max, idioma, tipo_reporte_bool, gender, cat_label)
+                    figs_an = graficos_jugador.antropometria(df_anthropometrics, columns, ctx)
+                    figalt, figant = figs_an["Altura"], figs_an["Peso y Grasa"]
                     
                     st.divider()
                     c1, c2 = st.columns([2,1.5])     
@@ -252,7 +240,7 @@ else:
                         df_anthropometrics["Categoría IMC"] = np.where(df_anthropometrics["IMC"].isna(), "N/A", df_anthropometrics["IMC"].apply(util.categorizar_imc))
 
                         st.markdown("📊 **Análisis de IMC y Porcentaje de Grasa Corporal**")
-                        st.dataframe(df_anthropometrics
+                        st.dataframe(util.fechas_a_texto(df_anthropometrics)
                             .style
                             .format({"ALTURA (CM)": "{:.2f}", "PESO (KG)": "{:.2f}", "IMC": "{:.2f}", "GRASA (%)": "{:.2f}"})  # Aplica el formato de 2 decimales
                             .map(util.color_categorias, subset=["Categoría IMC"]))
@@ -279,16 +267,10 @@ else:
 
                 ######################################################################################################
                 ## CMJ
-                columns = list(test_cat.get(lista_columnas[1], []))
-                df_cmj = df_joined_filtrado[[constants.FECHA_REGISTRO_LABEL] + columns]
-                df_cmj = df_cmj.reset_index(drop=True)
+                # Sin las filas donde TODAS las columnas del test sean cero o nulas
+                df_cmj, columns = graficos_jugador.seccion(df_joined_filtrado, test_cat, lista_columnas, 1)
 
-                # Eliminar las filas donde TODAS las columnas filtradas sean cero o nulas
-                df_cmj = df_cmj[~(df_cmj[columns] == 0).all(axis=1)]
-                todos_ceros = (df_cmj[columns] == 0).all().all()
-
-                if not todos_ceros:
-                    df_cmj = df_cmj[~(df_cmj[columns] == 0).all(axis=1)]
+                if not df_cmj.empty:
                     
                     st.markdown("📆 **Ultímas Mediciones**")
                     
@@ -309,15 +291,14 @@ else:
 
                     with col3:
                         act = df_cmj[constants.FECHA_REGISTRO_LABEL].iloc[0]
-                        st.metric("Último Registro", act)
+                        st.metric("Último Registro", util.formatear_fecha(act))
 
                     promedio_cmj = util.obtener_promedio_genero(df_promedios, categoria, 
                                                                 constants.EQUIPO_PROMEDIO, 
                                                                 columns[0], gender)
                     cactc = float(cactc)
-                    observacion = util.get_observacion_cmj(cactc, categoria, gender)
-                    observacion = traslator.traducir(observacion, idioma)
-                    observaciones_dict["POTENCIA MUSCULAR (SALTO CON CONTRAMOVIMIENTO)"] = observacion
+                    observacion = graficos_jugador.observacion_cmj(df_cmj, columns, ctx)
+                    observaciones_dict[graficos_jugador.OBSERVACIONES["cmj"]] = observacion
                     
                     # Mostrar mensaje visual según el rango definido por categoría
                     if cactc is not None and pd.notna(cactc):
@@ -354,23 +335,11 @@ else:
                     cola, colb = st.columns([2.5,1])
 
                     with cola:
-                        promedios = util.obtener_promedios_metricas_genero(
-                            df_promedios=df_promedios,
-                            categoria=categoria,
-                            equipo=equipo,
-                            metricas=[columns[0].upper()],
-                            genero=gender,
-                            tipo="CMJ"
-                        )
-                        
-                        figcmj = cmjg.get_cmj_graph(df_cmj, promedios, categoria, 
-                                                    constants.EQUIPO_PROMEDIO, [columns[0]], 
-                                                    constants.FECHA_REGISTRO_LABEL, idioma, 
-                                                    tipo_reporte_bool, gender, cat_label)
+                        figcmj = graficos_jugador.cmj(df_cmj, columns, ctx)["CMJ"]
                     with colb:
                         st.markdown("📊 **Históricos**")
                         styled_df = util.aplicar_semaforo(df_cmj)
-                        st.dataframe(df_cmj)
+                        st.dataframe(util.fechas_a_texto(df_cmj))
 
                 else:
                     st.text(constants.MENSAJE_NO_DATA) 
@@ -385,19 +354,11 @@ else:
                 ######################################################################################################
                 ## SPRINT
 
-                columns = list(test_cat.get(lista_columnas[2], []))
-                df_sprint = df_joined_filtrado[[constants.FECHA_REGISTRO_LABEL] + columns]
-                
-                df_sprint = df_sprint.reset_index(drop=True)
-
-                # Eliminar las filas donde TODAS las columnas filtradas sean cero o nulas
-                df_sprint = df_sprint.loc[~(df_sprint[columns].fillna(0) == 0).all(axis=1)]
-
-                todos_ceros = (df_sprint[columns] == 0).all().all()
+                # Sin las filas donde TODAS las columnas del test sean cero o nulas
+                df_sprint, columns = graficos_jugador.seccion(df_joined_filtrado, test_cat, lista_columnas, 2)
                 
                 #st.dataframe(df_sprint)
-                if not todos_ceros:
-                    df_sprint = df_sprint[~(df_sprint[columns] == 0).all(axis=1)]
+                if not df_sprint.empty:
                     
                     st.markdown("📆 **Ultímas Mediciones**")
 
@@ -429,11 +390,10 @@ else:
 
                     with col5:
                         act = df_sprint[constants.FECHA_REGISTRO_LABEL].iloc[0]
-                        st.metric(f"Último Registro",act)
+                        st.metric(f"Último Registro", util.formatear_fecha(act))
                         
-                    observacion = util.get_observacion_sprint(valor_sprint=act040t, categoria=categoria, genero=gender)
-                    observacion = traslator.traducir(observacion, idioma)
-                    observaciones_dict["SPRINT (0-40M)"] = observacion
+                    observacion = graficos_jugador.observacion_sprint(df_sprint, columns, ctx)
+                    observaciones_dict[graficos_jugador.OBSERVACIONES["sprint"]] = observacion
                     
                     act040t = float(act040t) if pd.notna(act040t) else None
 
@@ -452,27 +412,12 @@ else:
                         else:
                             st.warning(observacion, icon="⚠️")
 
-                    #st.text(columns[2].upper())
-                    promedios_sprint = util.obtener_promedios_metricas_genero(
-                            df_promedios=df_promedios,
-                            categoria=categoria.capitalize(),
-                            equipo=equipo,
-                            metricas=[columns[2].upper()],
-                            genero=gender,
-                            tipo="Sprint 0-40m"
-                        )
-                    
-                    #st.dataframe(df_promedios)
-
-                    if(act05t != 0) or (act05v != 0):
-                        figsp05 = sprintg.get_sprint_graph(df_sprint, promedios_sprint, categoria, constants.EQUIPO_PROMEDIO, columns[0],columns[1], constants.FECHA_REGISTRO_LABEL, idioma, tipo_reporte_bool, cat_label, gender)
-
-                    if(act040t != 0) or (act040v != 0):
-                        figsp040 = sprintg.get_sprint_graph(df_sprint, promedios_sprint, categoria, constants.EQUIPO_PROMEDIO, columns[2],columns[3], constants.FECHA_REGISTRO_LABEL, idioma, tipo_reporte_bool, cat_label, gender)
+                    figs_sprint = graficos_jugador.sprint(df_sprint, columns, ctx)
+                    figsp05, figsp040 = figs_sprint.get("SPRINT 0-5"), figs_sprint.get("SPRINT 0-40")
                 
                     st.divider()
                     st.markdown("📊 **Históricos**")
-                    st.dataframe(df_sprint)   
+                    st.dataframe(util.fechas_a_texto(df_sprint))   
                     
                 else:
                     st.text(constants.MENSAJE_NO_DATA)  
@@ -488,17 +433,10 @@ else:
                 ######################################################################################################
                 ## YO-YO
 
-                columns = list(test_cat.get(lista_columnas[3], []))
-                df_yoyo = df_joined_filtrado[[constants.FECHA_REGISTRO_LABEL] + columns]
-                df_yoyo = df_yoyo.reset_index(drop=True)
-
-                # Eliminar las filas donde TODAS las columnas filtradas sean cero o nulas
-                df_yoyo = df_yoyo.loc[~(df_yoyo[columns].fillna(0) == 0).all(axis=1)]
+                # Sin las filas donde TODAS las columnas del test sean cero o nulas
+                df_yoyo, columns = graficos_jugador.seccion(df_joined_filtrado, test_cat, lista_columnas, 3)
 
-                todos_ceros = (df_yoyo[columns] == 0).all().all()
-
-                if not todos_ceros:
-                    df_yoyo = df_yoyo[~(df_yoyo[columns] == 0).all(axis=1)]
+                if not df_yoyo.empty:
                     
                     st.markdown("📆 **Ultímas Mediciones**")
                     col1, col2, col3 = st.columns(3)
@@ -517,15 +455,15 @@ else:
                     
                     with col3:
                         act = df_yoyo[constants.FECHA_REGISTRO_LABEL].iloc[0]
-                        st.metric(f"Último Registro",act)
+                        st.metric(f"Último Registro", util.formatear_fecha(act))
 
                     st.divider()
 
-                    figyoyo = yoyog.get_yoyo_graph(df_yoyo, df_promedios, categoria, constants.EQUIPO_PROMEDIO, columns[1], constants.FECHA_REGISTRO_LABEL, idioma, tipo_reporte_bool, cat_label)
+                    figyoyo = graficos_jugador.yoyo(df_yoyo, columns, ctx)["YO-YO"]
   
                     st.markdown("📊 **Históricos**")
                     styled_df = util.aplicar_semaforo(df_yoyo)
-                    st.dataframe(df_yoyo)    
+                    st.dataframe(util.fechas_a_texto(df_yoyo))    
 
                 else:
                     st.text(constants.MENSAJE_NO_DATA)
@@ -540,16 +478,13 @@ else:
 
                 ######################################################################################################
                 ## AGILIDAD
-                columns = list(test_cat.get(lista_columnas[4], []))
-                
-                df_agilty = df_joined_filtrado[[constants.FECHA_REGISTRO_LABEL] + columns]
+                # Sin las filas donde TODAS las columnas del test sean cero o nulas
+                df_agilty, columns = graficos_jugador.seccion(df_joined_filtrado, test_cat, lista_columnas, 4)
                 #st.dataframe(df_joined_filtrado)
-                df_agilty = df_agilty.loc[~(df_agilty[columns].fillna(0) == 0).all(axis=1)]
-                todos_ceros = (df_agilty[columns] == 0).all().all()
 
-                if not todos_ceros:
+                if not df_agilty.empty:
                     
-                    df_agilty = df_agilty[~(df_agilty[columns] == 0).any(axis=1)]
+                    df_agilty = graficos_jugador.agilidad_ambas_piernas(df_agilty, columns)
                     diferencias = agilidadg.get_diferencia_agilidad(df_agilty, columns, constants.FECHA_REGISTRO_LABEL)
                     ultima_diferencia = diferencias[-1]["diferencia_%"] if diferencias else None
                     
@@ -578,24 +513,23 @@ else:
                     with col4:
                         if not df_agilty.empty and not df_agilty[columns[0]].dropna().empty:
                             act = df_agilty[constants.FECHA_REGISTRO_LABEL].iloc[0] if len(df_agilty) > 0 else 0
-                            st.metric("Último Registro", act)
+                            st.metric("Último Registro", util.formatear_fecha(act))
 
                     if not df_agilty.empty and not df_agilty[columns[0]].dropna().empty:
-                        observacion = util.get_observacion_agilidad(valor_asimetria=ultima_diferencia, genero=gender, categoria=categoria)
-                        observacion = traslator.traducir(observacion, idioma)
-                        observaciones_dict["VELOCIDAD EN EL CAMBIO DE DIRECCIÓN (AGILIDAD 505)"] = observacion
+                        observacion = graficos_jugador.observacion_agilidad(df_agilty, columns, ctx)
+                        observaciones_dict[graficos_jugador.OBSERVACIONES["agilidad"]] = observacion
                         #st.text(diferencia)
                         if ultima_diferencia <= 5:
                             st.success(observacion, icon="✅")
                         else:
                             st.warning(observacion, icon="⚠️")
 
-                        figag = agilidadg.get_agility_graph_combined_simple(df_agilty, df_promedios, categoria, equipo, columns, constants.FECHA_REGISTRO_LABEL, idioma, tipo_reporte_bool, cat_label, gender)
+                        figag = graficos_jugador.agilidad(df_agilty, columns, ctx)["AGILIDAD"]
                         st.divider()
                         
                     
                         st.markdown("📊 **Históricos**")
-                        st.dataframe(df_agilty)
+                        st.dataframe(util.fechas_a_texto(df_agilty))
                    
                 else:
                     st.text(constants.MENSAJE_NO_DATA)
@@ -609,17 +543,10 @@ else:
 
                 ######################################################################################################
                 ## RSA
-                columns = list(test_cat.get(lista_columnas[5], []))
-                df_rsa = df_joined_filtrado[[constants.FECHA_REGISTRO_LABEL] + columns]
-                df_rsa = df_rsa.reset_index(drop=True)
-                
-                # Eliminar las filas donde TODAS las columnas filtradas sean cero o nulas
-                df_rsa = df_rsa.loc[~(df_rsa[columns].fillna(0) == 0).all(axis=1)]
-
-                todos_ceros = (df_rsa[columns] == 0).all().all()
+                # Sin las filas donde TODAS las columnas del test sean cero o nulas
+                df_rsa, columns = graficos_jugador.seccion(df_joined_filtrado, test_cat, lista_columnas, 5)
                 #st.dataframe(df_rsa)
-                if not todos_ceros:
-                    df_rsa = df_rsa[~(df_rsa[columns] == 0).all(axis=1)]
+                if not df_rsa.empty:
                     
                     st.markdown("📆 **Ultímas Mediciones**")
 
@@ -639,22 +566,22 @@ else:
 
                     with col3:
                         act = df_rsa[constants.FECHA_REGISTRO_LABEL].iloc[0]
-                        st.metric(f"Último Registro",act)
+                        st.metric(f"Último Registro", util.formatear_fecha(act))
 
                     cola, colb = st.columns([2.5,1])
                     with cola:
-                        figrsat = rsag.get_rsa_graph(df_rsa, df_promedios, categoria, constants.EQUIPO_PROMEDIO, columns, constants.FECHA_REGISTRO_LABEL, idioma, tipo_reporte_bool, cat_label) 
+                        figrsat = graficos_jugador.rsa_tiempo(df_rsa, columns, ctx)
                     with colb:    
                         st.markdown("📊 **Históricos**")
-                        st.dataframe(df_rsa[[constants.FECHA_REGISTRO_LABEL] + [columns[0]]]) 
+                        st.dataframe(util.fechas_a_texto(df_rsa[[constants.FECHA_REGISTRO_LABEL] + [columns[0]]])) 
 
                     styled_dfb = util.aplicar_semaforo(df_rsa[[constants.FECHA_REGISTRO_LABEL] + columns])
                     colc, cold = st.columns([2.5,1])
                     with colc:
-                        figrsav = rsag.get_rsa_velocity_graph(df_rsa, df_promedios, categoria, constants.EQUIPO_PROMEDIO, columns[1], constants.FECHA_REGISTRO_LABEL, idioma, tipo_reporte_bool, cat_label)
+                        figrsav = graficos_jugador.rsa_velocidad(df_rsa, columns, ctx)
                     with cold:    
                         st.markdown("📊 **Históricos**")
-                        st.dataframe(df_rsa[[constants.FECHA_REGISTRO_LABEL] + [columns[1]]]) 
+                        st.dataframe(util.fechas_a_texto(df_rsa[[constants.FECHA_REGISTRO_LABEL] + [columns[1]]])) 
                 else:
                     st.text(constants.MENSAJE_NO_DATA) 
                     percentiles_rsa = None      
@@ -664,6 +591,13 @@ else:
                 
         with reporte:
             if len(df_joined_filtrado) > 0:
+
+                # Percentiles frente a su género y categoría (tabla de plantilla precalculada)
+                valores_jugador, percentiles_jugador = matriz.percentiles_jugador(
+                    dataset["percentiles"], df_jugador[constants.ID_LABEL].iloc[0])
+                if percentiles_jugador:
+                    with st.expander("🎯 Percentiles frente a su género y categoría"):
+                        graphics.mostrar_percentiles_coloreados(valores_jugador, percentiles_jugador)
                 
                 # Diccionario de gráficos disponibles
                 graficos_disponibles = {
@@ -734,7 +668,14 @@ else:
                             if test in k:
                                 figs_filtrados[k] = graficos_disponibles[k]
 
-                if st.button("📄 Generar PDF"):
+                # Reporte en caché del servidor para esta misma configuración y estos mismos datos
+                clave_pdf = cache_reportes.clave_reporte(
+                    df_jugador[constants.ID_LABEL].iloc[0], fecha_inicio, fecha_fin, idioma, tipo_reporte,
+                    formato_graficos, tests_seleccionados,
+                    cache_reportes.huella_datos(df_jugador, df_joined_filtrado, df_promedios, observaciones_dict,
+                                                fecha_actual.strftime("%d/%m/%Y")))
+
+                if st.button("📄 Generar PDF") and cache_reportes.obtener(clave_pdf) is None:
                     # Mostrar el status inmediatamente
                     status = st.status("🛠 Generando PDF...", state="running", expanded=True)
                     fecha_str = fecha_actual.strftime("%d/%m/%Y")
@@ -751,36 +692,29 @@ else:
                             # 1. Generar PDF como bytes (puede tardar)
                             pdf_bytes = report.generate_pdf_avanzado(
                                 df_jugador, df_anthropometrics, df_agilty, df_sprint, 
-                                df_cmj, df_yoyo, df_rsa, figs_filtrados, fecha_str, idioma, observaciones_dict)
+                                df_cmj, df_yoyo, df_rsa, figs_filtrados, fecha_str, idioma, observaciones_dict,
+                                formato_graficos)
                         else:
                             # 2. Generar PDF como bytes (puede tardar)
                             pdf_bytes = report.generate_pdf_simple(
                                 df_jugador, df_anthropometrics, figs_filtrados, fecha_str, idioma, 
-                                observaciones_dict)
-                            
-                        # 2. Codificar y preparar para mostrar
-                        b64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
-                        pdf_data = base64.b64decode(b64_pdf)
-
-                        # Enlace de descarga con nombre específico
-                        st.markdown(f'''
-                            <a href="data:application/pdf;base64,{b64_pdf}" download="Informe_Fisico_{df_jugador['JUGADOR'].iloc[0]}.pdf" target="_blank">
-                                📥 Descargar PDF
-                            </a>
-                        ''', unsafe_allow_html=True)
-
-                        # 3. Mostrar PDF en Streamlit
-                        html_code = f'''
-                            <object data="data:application/pdf;base64,{b64_pdf}" type="application/pdf" width="100%" height="1200px"></object>
-                        '''
-                        st.write(html_code, unsafe_allow_html=True)
-
-                        # 4. Cerrar el status como completado
+                                observaciones_dict, formato_graficos)
+
+                        # 2. Guardar en el servidor: la descarga se sirve desde ahí en cada recarga
+                        cache_reportes.guardar(clave_pdf, pdf_bytes)
+
+                        # 3. Cerrar el status como completado
                         status.update(label="✅ PDF generado con éxito", state="complete", expanded=False)
 
                     except Exception as e:
                         # Mostrar error si algo falla
                         status.update(label="❌ Error al generar el PDF", state="error", expanded=True)
                         st.exception(e)
+
+                pdf_bytes = cache_reportes.obtener(clave_pdf)
+                if pdf_bytes is not None:
+                    # Descarga por HTTP (servidor de medios de Streamlit), sin incrustar el PDF en la página
+                    st.download_button("📥 Descargar PDF", data=pdf_bytes, mime="application/pdf",
+                                       file_name=f"Informe_Fisico_{df_jugador[constants.JUGADOR_LABEL].iloc[0]}.pdf")
             else:
                 st.text(constants.MENSAJE_NO_DATA)
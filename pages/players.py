@@ -60,16 +60,14 @@ def guardar_datos():
             # 2. Unir datos nuevos + existentes
             df_combinado = pd.concat([df_sin_duplicados, df_editado], ignore_index=True)
 
-            # 3. Formatear y ordenar por fecha
-            df_combinado[constants.FECHA_REGISTRO_LABEL] = pd.to_datetime(
-                df_combinado[constants.FECHA_REGISTRO_LABEL], format="%d/%m/%Y", errors="coerce"
-            )
+            # 3. Ordenar por fecha y formatearla como texto para la hoja
+            df_combinado[constants.FECHA_REGISTRO_LABEL] = util.a_fecha(df_combinado[constants.FECHA_REGISTRO_LABEL])
             df_combinado = df_combinado.sort_values(by=constants.FECHA_REGISTRO_LABEL, ascending=False).reset_index(drop=True)
-            df_combinado[constants.FECHA_REGISTRO_LABEL] = df_combinado[constants.FECHA_REGISTRO_LABEL].dt.strftime('%d/%m/%Y')
+            df_combinado = util.fechas_a_texto(df_combinado)
 
             # 4. Actualizar hoja de cálculo
-            conn.update(worksheet="DATOS", data=df_combinado)
-            st.session_state["reload_data"] = True  # Activar recarga manual
+            conn.update(worksheet=constants.DATOS_WS, data=df_combinado)
+            data_util.invalidar_hojas(constants.DATOS_WS)  # Recargar solo DATOS
             status.update(label="✅ Datos actualizados correctamente.", state="complete", expanded=False)
             st.rerun()
 
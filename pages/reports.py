@@ -0,0 +1,110 @@
+import streamlit as st
+import pandas as pd
+from datetime import date
+
+from utils import login
+from utils import data_util
+from utils import connector_sgs
+from utils import connector_gs
+from utils import constants
+from utils import reporte_lote
+
+st.set_page_config(
+    page_title="Reportes",
+    page_icon=":material/picture_as_pdf:",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+conn = connector_sgs.get_connector()
+
+# 🔐 Verificación de sesión
+login.generarLogin(conn)
+
+if "usuario" not in st.session_state:
+    st.stop()
+
+st.header(":blue[Reportes por Categoría] :material/picture_as_pdf:", divider=True)
+
+fecha_actual = date.today()
+
+dataset = data_util.get_dataset(conn, connector_sgs.get_data, connector_gs.get_bulk_data)
+df_datos = dataset["datos_final"]
+
+idioma_map = {
+    "Español": "es",
+    "Inglés": "en",
+    "Francés": "fr",
+    "Italiano": "it",
+    "Alemán": "de",
+    "Catalán": "ca",
+    "Portugues": "pt",
+}
+
+# Filtros
+###################################################
+col1, col2 = st.columns(2)
+with col1:
+    categorias = sorted(df_datos[constants.CATEGORIA_LABEL].dropna().astype(str).str.strip().unique())
+    categoria = st.selectbox("CATEGORÍA:", categorias)
+with col2:
+    equipos_categoria = df_datos[df_datos[constants.CATEGORIA_LABEL].astype(str).str.strip() == categoria]
+    equipos_disponibles = sorted(equipos_categoria[constants.EQUIPO_LABEL].dropna().astype(str).str.strip().unique())
+    equipos = st.multiselect("EQUIPOS:", equipos_disponibles, default=equipos_disponibles, placeholder="Todos")
+
+col1, col2, col3 = st.columns([1, 1, 2])
+with col1:
+    fecha_inicio = st.date_input("FECHA INICIO:", value=fecha_actual, max_value=fecha_actual)
+with col2:
+    fecha_fin = st.date_input("FECHA FIN:", value=fecha_actual, max_value=fecha_actual)
+with col3:
+    idiomas = st.multiselect("IDIOMAS:", list(idioma_map), default=["Español"], placeholder="Seleccione una opción")
+
+col1, col2 = st.columns(2)
+with col1:
+    tipo_reporte = st.radio("Tipo Reporte", ["Simple", "Avanzado"], horizontal=True)
+with col2:
+    formato_map = {"Imagen (PNG)": "png", "Vectorial (SVG)": "svg"}
+    formato_graficos = formato_map[st.radio("Gráficos PDF", list(formato_map), horizontal=True,
+                                            help="Vectorial: PDF más ligero y nítido al ampliar.")]
+
+if fecha_fin < fecha_inicio:
+    st.warning("❌ La fecha final no puede ser anterior a la fecha inicial.")
+    st.stop()
+
+if not idiomas:
+    st.warning("Seleccione al menos un idioma.")
+    st.stop()
+
+###################################################
+if st.button("📦 Generar reportes", type="primary"):
+    tareas, descartados = reporte_lote.tareas_por_filtro(
+        dataset, categoria, equipos, fecha_inicio, fecha_fin,
+        [idioma_map[i] for i in idiomas], tipo_reporte, fecha_actual.strftime("%d/%m/%Y"), formato_graficos)
+
+    if descartados:
+        with st.expander(f"⚠️ {len(descartados)} jugadores sin reporte"):
+            st.dataframe(pd.DataFrame(list(descartados.items()), columns=["JUGADOR", "MOTIVO"]), hide_index=True)
+
+    if not tareas:
+        st.warning("No hay jugadores con registros para el filtro seleccionado.")
+        st.stop()
+
+    barra = st.progress(0.0, text=f"🛠 Generando {len(tareas)} reportes...")
+
+    def progreso(hechos, total, etiqueta):
+        barra.progress(hechos / total, text=f"🛠 {hechos}/{total} · {etiqueta}")
+
+    zip_bytes, errores = reporte_lote.generar_reportes_lote(tareas, progreso=progreso)
+    barra.progress(1.0, text=f"✅ {len(tareas) - len(errores)}/{len(tareas)} reportes generados")
+
+    if errores:
+        st.warning(f"❌ {len(errores)} reportes fallaron (detalle en errores.txt dentro del ZIP).")
+        st.dataframe(pd.DataFrame(list(errores.items()), columns=["REPORTE", "ERROR"]), hide_index=True)
+
+    st.session_state["reportes_zip"] = zip_bytes
+    st.session_state["reportes_zip_nombre"] = f"Informes_{categoria}_{fecha_actual.strftime('%Y%m%d')}.zip"
+
+if "reportes_zip" in st.session_state:
+    st.download_button("📥 Descargar ZIP", data=st.session_state["reportes_zip"],
+                       file_name=st.session_state["reportes_zip_nombre"], mime="application/zip")
@@ -6,6 +6,7 @@ from utils import login
 from utils import util
 from utils import data_util
 from utils import connector_sgs
+from utils import connector_gs
 from utils import constants
 
 st.set_page_config(
@@ -16,6 +17,7 @@ st.set_page_config(
 )
 
 conn = connector_sgs.get_connector()
+ws = connector_gs.get_spreadsheet()
 
 # 🔐 Verificación de sesión
 login.generarLogin(conn)
@@ -27,11 +29,11 @@ st.header(":blue[Tests Físicos] :material/directions_run:", divider=True)
 
 fecha_actual = date.today()
 
-df_estructura_test, _, nombres_tests = data_util.get_diccionario_test_categorias(conn, connector_sgs.get_data)
-
-player_data, test_data, df_checkin = data_util.load_player_and_physical_data(conn, connector_sgs.get_data)
-df_joined = util.join_player_and_physical_data(player_data, test_data)
-test_data, df_datos_final = util.actualizar_datos_con_checkin(player_data, df_checkin, df_joined)
+dataset = data_util.get_dataset(conn, connector_sgs.get_data, connector_gs.get_bulk_data)
+df_estructura_test = dataset["estructura"]
+nombres_tests = dataset["lista_columnas"]
+player_data = dataset["datos"]
+test_data = dataset["tests_final"]
 
 player_data_filtered = util.get_filters(player_data)
 
@@ -82,13 +84,13 @@ elif fecha_fin > fecha_inicio:
 		st.stop()
 
 elif fecha_inicio == fecha_fin:
-	fecha_formateada = fecha_inicio.strftime("%d/%m/%Y")
-	test_data_filtered = test_data[test_data[constants.FECHA_REGISTRO_LABEL] == fecha_formateada]
+	fecha_seleccionada = pd.Timestamp(fecha_inicio)
+	test_data_filtered = test_data[test_data[constants.FECHA_REGISTRO_LABEL] == fecha_seleccionada]
 
 	test_data_filtered = test_data_filtered.merge(
     player_data_filtered[constants.COLUMNAS_COMUNES_JCE],on=constants.COLUMNAS_COMUNES_JCE,how="inner")
 
-	df_nuevo = util.get_new(player_data_filtered, test_data_filtered, constants.COLUMNAS_USADAS, fecha_formateada)
+	df_nuevo = util.get_new(player_data_filtered, test_data_filtered, constants.COLUMNAS_USADAS, fecha_seleccionada)
 	df_nuevo.drop(columns=constants.COLUMNAS_EXCLUIDAS_DROP, inplace=True, errors="ignore")
 	
 columnas = constants.COLUMNAS
@@ -140,7 +142,7 @@ edited_df = util.get_data_editor(df_filtrado)
 def guardar_datos():
 	with st.status("⌛ Actualizando datos en Google Sheets...", expanded=True) as status:
 		try:
-			edited_df.drop(columns=constants.ID_LABEL, inplace=True, errors="ignore")
+			claves = [constants.FECHA_REGISTRO_LABEL, constants.ID_LABEL]
 
 			columnas_a_verificar = [col for col in edited_df.columns if col not in columnas_excluidas]
 
@@ -150,17 +152,32 @@ def guardar_datos():
 			df_combinado = pd.concat([df_nuevotest_data, df_edited], ignore_index=True)
 			df_actualizado = df_combinado.drop_duplicates(subset=[constants.FECHA_REGISTRO_LABEL, constants.ID_LABEL], keep="last")
 
+			# Las hojas guardan la fecha como texto dd/mm/yyyy
+			df_actualizado = util.fechas_a_texto(df_actualizado)
+
 			# Separar DataFrame actualizado en hojas
 			dfs_separados = util.separar_dataframe_por_estructura(df_actualizado, df_estructura_test, columnas_excluidas)
 
-			# Guardar cada hoja
-			for nombre_hoja, df_hoja in dfs_separados.items():
-				if not util.columnas_sin_datos_utiles(df_hoja, columnas_excluidas):
-					conn.update(worksheet=nombre_hoja, data=df_hoja)
-					#time.sleep(0.5)  # Opcional para evitar problemas de límite API
+			hojas_a_guardar = {
+				nombre_hoja: df_hoja for nombre_hoja, df_hoja in dfs_separados.items()
+				if not util.columnas_sin_datos_utiles(df_hoja, columnas_excluidas)
+			}
+
+			# Escribir solo las filas nuevas o modificadas de cada hoja
+			resumen = connector_gs.guardar_cambios_hojas(
+				ws, hojas_a_guardar, claves,
+				claves_editadas=util.fechas_a_texto(edited_df[claves]).itertuples(index=False, name=None)
+			)
+
+			# Hojas que no admiten escritura parcial: reescritura completa
+			for nombre_hoja in resumen["completas"]:
+				conn.update(worksheet=nombre_hoja, data=hojas_a_guardar[nombre_hoja])
+				#time.sleep(0.5)  # Opcional para evitar problemas de límite API
+
+			hojas_guardadas = resumen["modificadas"] + resumen["completas"]
 
 			status.update(label="✅ Datos actualizados correctamente.", state="complete", expanded=False)
-			st.session_state["reload_data"] = True  # Activar recarga manual
+			data_util.invalidar_hojas(hojas_guardadas)  # Recargar solo las hojas guardadas
 			st.rerun()
 
 		except Exception as e:
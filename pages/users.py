@@ -1,6 +1,6 @@
 import streamlit as st
 from utils import login
-from utils.data_util import get_usuarios
+from utils.data_util import get_usuarios, invalidar_hojas
 from utils import connector_gs
 from utils import connector_sgs
 from utils import constants
@@ -40,7 +40,7 @@ def guardar_datos():
         try:
             connector_gs.set_spreadsheet(ws, constants.USUARIOS_WS, df_editado)
             #conn.update(worksheet="USUARIOS", data=df_editado)
-            st.session_state["reload_data"] = True  # Activar recarga manual
+            invalidar_hojas(constants.USUARIOS_WS)  # Recargar solo USUARIOS
             status.update(label="✅ Datos actualizados correctamente.", state="complete", expanded=False)
             st.rerun()
 
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from utils import connector_gs
+
+CLAVES = ["FECHA REGISTRO", "ID"]
+
+def _hoja(df):
+    # Valores tal como los devuelve la API tras escribir `df` (NaN -> celda vacía)
+    return [list(df.columns)] + [[connector_gs._valor_celda(v) for v in fila]
+                                 for fila in df.itertuples(index=False, name=None)]
+
+def _aplicar(valores, plan):
+    # Simula la escritura: las filas nuevas se añaden al final de la hoja
+    _, nuevas = plan
+    return valores + nuevas
+
+def test_segundo_guardado_sin_filas_nuevas():
+    df = pd.DataFrame({
+        "FECHA REGISTRO": ["01/02/2025", "01/02/2025", np.nan],
+        "ID": ["M001", "M002", "M003"],
+        "CMJ": [30.5, 28.0, 25.0],
+    })
+    valores = [list(df.columns), ["01/02/2025", "M001", 30.5]]
+
+    plan = connector_gs._planificar_cambios("CMJ", valores, df.iloc[:2], CLAVES)
+    assert plan == ([], [["01/02/2025", "M002", 28.0]])
+    valores = _aplicar(valores, plan)
+
+    # Fila sin FECHA REGISTRO que no está en la hoja: no puede localizarse
+    assert connector_gs._planificar_cambios("CMJ", valores, df, CLAVES) is None
+    valores = _hoja(df)  # Reescritura completa
+
+    # Guardar de nuevo el mismo DataFrame no añade ni modifica nada
+    assert connector_gs._planificar_cambios("CMJ", valores, df, CLAVES) == ([], [])
+
+def test_fila_sin_clave_editada_reescribe_la_hoja():
+    df = pd.DataFrame({"FECHA REGISTRO": ["", "01/02/2025"], "ID": ["M001", "M002"], "CMJ": [30.5, 28.0]})
+    valores = _hoja(df)
+    df.loc[0, "CMJ"] = 31.0
+    assert connector_gs._planificar_cambios("CMJ", valores, df, CLAVES) is None
+
+class _LibroFalso:
+    # Spreadsheet mínimo: devuelve la hoja tal cual y guarda lo que se escribe
+    def __init__(self, valores):
+        self.valores = valores
+        self.escrituras = []
+
+    def values_batch_get(self, rangos, params=None):
+        return {"valueRanges": [{"values": self.valores}]}
+
+    def values_batch_update(self, body):
+        self.escrituras += body["data"]
+
+    def worksheet(self, nombre):
+        return nombre
+
+def test_set_spreadsheet_compara_con_la_hoja(monkeypatch):
+    completas = []
+    monkeypatch.setattr(connector_gs, "set_with_dataframe", lambda hoja, df, include_index: completas.append(hoja))
+    df = pd.DataFrame({"USUARIO": ["ana", "luis"], "CLAVE": [1234, 5678]})
+
+    libro = _LibroFalso([["USUARIO", "CLAVE"], ["ana", 1234], ["luis", 9999]])
+    assert connector_gs.set_spreadsheet(libro, "USUARIOS", df)["modo"] == "parcial"
+    assert libro.escrituras == [{"range": "'USUARIOS'!B3:B3", "values": [[5678]]}]
+
+    # Alguien añadió una fila en la hoja desde la última lectura: reescritura completa
+    libro = _LibroFalso([["USUARIO", "CLAVE"], ["ana", 1234], ["eva", 1111], ["luis", 9999]])
+    assert connector_gs.set_spreadsheet(libro, "USUARIOS", df)["modo"] == "completo"
+    assert completas == ["USUARIOS"] and libro.escrituras == []
+
+def test_set_spreadsheet_no_reinterpreta_textos(monkeypatch):
+    monkeypatch.setattr(connector_gs, "set_with_dataframe", lambda hoja, df, include_index: None)
+    df = pd.DataFrame({"USUARIO": ["ana", "luis", "eva"], "TELEFONO": ["0123", "1.0", 600.0]})
+
+    # "123" -> "0123" y "1" -> "1.0" son ediciones; 600 y 600.0 son el mismo número
+    libro = _LibroFalso([["USUARIO", "TELEFONO"], ["ana ", "123"], ["luis", "1"], ["eva", 600]])
+    connector_gs.set_spreadsheet(libro, "USUARIOS", df)
+    assert libro.escrituras == [{"range": "'USUARIOS'!B2:B2", "values": [["0123"]]},
+                                {"range": "'USUARIOS'!B3:B3", "values": [["1.0"]]}]
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from utils import graficos_jugador
+
+TEST_CAT = {"CMJ": ["CMJ (cm)"], "SPRINT": ["TIEMPO 0-5M (SEG)", "TIEMPO 0-40M (SEG)"]}
+LISTA_COLUMNAS = ["ANTROPOMETRIA", "CMJ", "SPRINT"]
+
+def _joined():
+    return pd.DataFrame({
+        "FECHA REGISTRO": ["03/02/2025", "02/02/2025", "01/02/2025"],
+        "CMJ (cm)": [np.nan, 0.0, 31.5],
+        "TIEMPO 0-5M (SEG)": [np.nan, 0.0, 1.1],
+        "TIEMPO 0-40M (SEG)": [np.nan, np.nan, 5.6],
+    })
+
+def test_cmj_conserva_registros_sin_datos():
+    df, columnas = graficos_jugador.seccion(_joined(), TEST_CAT, LISTA_COLUMNAS, 1)
+    assert columnas == ["CMJ (cm)"]
+    # Solo se descarta el registro a 0; el de NaN sigue siendo el último
+    assert df["FECHA REGISTRO"].tolist() == ["03/02/2025", "01/02/2025"]
+
+def test_sprint_descarta_ceros_y_nulos():
+    df, _ = graficos_jugador.seccion(_joined(), TEST_CAT, LISTA_COLUMNAS, 2)
+    assert df["FECHA REGISTRO"].tolist() == ["01/02/2025"]
+
+def test_test_sin_columnas():
+    df, columnas = graficos_jugador.seccion(_joined(), TEST_CAT, LISTA_COLUMNAS, 0)
+    assert df.empty and columnas == []
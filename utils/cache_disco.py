@@ -0,0 +1,63 @@
+import os
+import threading
+
+_lock = threading.Lock()
+
+def _clave(nombre):
+    # Archivos de una misma entrada (p. ej. "<clave>.jpg" y "<clave>.json") se descartan juntos
+    return nombre.split(".", 1)[0]
+
+def usar(ruta):
+    """
+    Marca un archivo de caché como usado ahora (su fecha de modificación es la del
+    último uso), para que `recortar` descarte antes los que llevan más tiempo sin usarse.
+    """
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+
+def recortar(directorio, limite_mb):
+    """
+    Limita el tamaño de un directorio de caché: si pasa de `limite_mb`, borra las entradas
+    usadas hace más tiempo (por fecha de modificación) hasta quedar por debajo.
+    Los temporales (*.tmp) de escrituras en curso no se tocan.
+
+    Args:
+        directorio (str): Directorio de la caché.
+        limite_mb (float): Tamaño máximo en MB.
+
+    Returns:
+        int: Bytes liberados.
+    """
+    limite = limite_mb * 1024 * 1024
+    entradas = {}  # clave -> [bytes, último uso, rutas]
+    with _lock:
+        try:
+            with os.scandir(directorio) as it:
+                for archivo in it:
+                    if archivo.name.endswith(".tmp") or not archivo.is_file():
+                        continue
+                    try:
+                        info = archivo.stat()
+                    except OSError:
+                        continue
+                    entrada = entradas.setdefault(_clave(archivo.name), [0, 0, []])
+                    entrada[0] += info.st_size
+                    entrada[1] = max(entrada[1], info.st_mtime)
+                    entrada[2].append(archivo.path)
+        except OSError:
+            return 0
+
+        total = sum(entrada[0] for entrada in entradas.values())
+        liberados = 0
+        for tamano, _, rutas in sorted(entradas.values(), key=lambda entrada: entrada[1]):
+            if total - liberados <= limite:
+                break
+            for ruta in rutas:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass  # Otro proceso ya la borró
+            liberados += tamano
+    return liberados
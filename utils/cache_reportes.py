@@ -0,0 +1,70 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils import constants
+
+_lock = threading.Lock()
+_reportes = OrderedDict()  # clave -> PDF (LRU, compartida entre sesiones)
+_bytes_totales = 0
+
+def huella_datos(*datos):
+    """
+    Hash del contenido de los datos con los que se genera un reporte (DataFrames del
+    jugador, promedios, observaciones...): si cambian, el reporte en caché deja de valer.
+    """
+    h = hashlib.sha1()
+    for dato in datos:
+        if isinstance(dato, pd.DataFrame):
+            h.update("|".join(map(str, dato.columns)).encode("utf-8"))
+            try:
+                h.update(pd.util.hash_pandas_object(dato, index=False).values.tobytes())
+            except TypeError:
+                # Celdas no hashables (listas, dicts): se usa su representación en texto
+                h.update(dato.to_csv(index=False).encode("utf-8"))
+        else:
+            h.update(json.dumps(dato, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def clave_reporte(id_jugador, fecha_inicio, fecha_fin, idioma, tipo_reporte, formato_graficos, graficos, huella):
+    """
+    Clave de un reporte: jugador, rango de fechas, idioma, tipo, formato de gráficos,
+    gráficos elegidos y huella de los datos (ver `huella_datos`).
+    """
+    partes = [id_jugador, fecha_inicio, fecha_fin, idioma, tipo_reporte, formato_graficos, sorted(graficos), huella]
+    return hashlib.sha1(json.dumps(partes, default=str).encode("utf-8")).hexdigest()
+
+def obtener(clave):
+    """
+    PDF guardado para la clave, o None si no está (o se descartó por espacio).
+    """
+    with _lock:
+        if clave in _reportes:
+            _reportes.move_to_end(clave)
+            return _reportes[clave]
+    return None
+
+def guardar(clave, pdf_bytes):
+    """
+    Guarda un PDF generado. La caché está limitada a `REPORTES_CACHE_MB`: al pasarse
+    se descartan los reportes usados hace más tiempo.
+    """
+    global _bytes_totales
+    pdf_bytes = bytes(pdf_bytes)
+    limite = constants.REPORTES_CACHE_MB * 1024 * 1024
+    if len(pdf_bytes) > limite:
+        return pdf_bytes
+
+    with _lock:
+        if clave in _reportes:
+            _bytes_totales -= len(_reportes.pop(clave))
+        _reportes[clave] = pdf_bytes
+        _bytes_totales += len(pdf_bytes)
+        while _bytes_totales > limite:
+            _, descartado = _reportes.popitem(last=False)
+            _bytes_totales -= len(descartado)
+    return pdf_bytes
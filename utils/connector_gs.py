@@ -1,7 +1,20 @@
 import streamlit as st
+import pandas as pd
 import gspread
+import re
+import json
+import time
+import math
+import hashlib
+from collections import Counter
+from numbers import Real
 from google.oauth2.service_account import Credentials
 from gspread_dataframe import get_as_dataframe, set_with_dataframe
+from pandas.io.parsers import TextParser
+
+from utils import constants
+from utils import snapshot
+from utils import connector_sgs
 
 @st.cache_resource(show_spinner=True)
 def get_spreadsheet():
@@ -14,10 +27,523 @@ def get_spreadsheet():
     return client.open("marcet_database")
 
 def set_spreadsheet(ws, sheet, df):
-    worksheet = ws.worksheet(sheet)
-    set_with_dataframe(worksheet, df, include_index=False)
+    """
+    Escribe un DataFrame en una hoja enviando solo las celdas que cambiaron.
+
+    Lee el contenido actual de la hoja (una llamada batchGet), lo compara con `df` fila a
+    fila y manda las celdas modificadas en una única llamada batchUpdate. Si la hoja no
+    tiene el mismo encabezado o el mismo número de filas que `df` (filas añadidas o
+    borradas, filas en blanco intermedias), la reescribe con `set_with_dataframe`.
+
+    Args:
+        ws: Objeto `Spreadsheet` de gspread.
+        sheet (str): Nombre de la hoja.
+        df (pd.DataFrame): Contenido completo que debe tener la hoja.
+
+    Returns:
+        dict: {"modo": "parcial" | "completo", "celdas": celdas escritas,
+               "rangos": rangos enviados, "segundos": duración de la escritura}
+    """
+    inicio = time.perf_counter()
+    try:
+        valores = _descargar_valores(ws, [_rango_hoja(sheet)])[0]
+    except gspread.exceptions.APIError:
+        valores = []
+
+    encabezado = [str(col).strip() for col in valores[0]] if valores else []
+    while encabezado and encabezado[-1] == "":
+        encabezado.pop()
+
+    if encabezado != [str(col).strip() for col in df.columns] or len(valores) - 1 != len(df):
+        worksheet = ws.worksheet(sheet)
+        set_with_dataframe(worksheet, df, include_index=False)
+        stats = {"modo": "completo", "celdas": int(df.size + len(df.columns)), "rangos": 1}
+    else:
+        rangos = []
+        celdas = 0
+        for i, (nueva, anterior) in enumerate(zip(df.itertuples(index=False, name=None), valores[1:])):
+            cambios = {
+                j: _valor_celda(valor)
+                for j, valor in enumerate(nueva)
+                if not _misma_celda(valor, anterior[j] if j < len(anterior) else "")
+            }
+            if cambios:
+                rangos += _rangos_fila(sheet, i + 2, cambios)  # Fila 1 = encabezado
+                celdas += len(cambios)
+
+        if rangos:
+            ws.values_batch_update(body={"valueInputOption": "USER_ENTERED", "data": rangos})
+        stats = {"modo": "parcial", "celdas": celdas, "rangos": len(rangos)}
+
+    stats["segundos"] = round(time.perf_counter() - inicio, 3)
+    print(f"💾 '{sheet}' guardada ({stats['modo']}): {stats['celdas']} celdas en {stats['rangos']} rangos, {stats['segundos']}s")
+    return stats
 
 def get_data(conn, sheet):
     ws = conn.worksheet(sheet)
     df = get_as_dataframe(ws, evaluate_formulas=True)
-    return df
\ No newline at end of file
+    return df
+
+def _rango_hoja(hoja):
+    return "'" + hoja.replace("'", "''") + "'"
+
+def _valores_a_dataframe(valores):
+    """
+    Convierte la matriz de valores de una hoja en DataFrame con las mismas reglas que
+    `get_as_dataframe`: primera fila como encabezado, sin filas vacías ni columnas
+    vacías sin nombre.
+    """
+    if not valores:
+        return pd.DataFrame()
+
+    ancho = max(len(fila) for fila in valores)
+    filas = [fila + [""] * (ancho - len(fila)) for fila in valores]
+
+    df = TextParser(filas).read()
+    df = df.dropna(how="all", axis=0)
+
+    columnas_vacias = [col for col in df.columns if str(col).startswith("Unnamed:") and df[col].isna().all()]
+    return df.drop(columns=columnas_vacias)
+
+def _hojas_test(df_estructura):
+    return [str(col).strip() for col in df_estructura.columns]
+
+def _descargar_valores(ws, rangos):
+    """
+    Lee varios rangos con una sola llamada `values:batchGet` de la API de Sheets.
+
+    Returns:
+        list: Matriz de valores de cada rango, en el mismo orden.
+    """
+    respuesta = ws.values_batch_get(
+        rangos,
+        params={
+            "valueRenderOption": "UNFORMATTED_VALUE",
+            "dateTimeRenderOption": "FORMATTED_STRING",
+        },
+    )
+    return [rango.get("values", []) for rango in respuesta.get("valueRanges", [])]
+
+def _firma_fila(fila):
+    fila = list(fila or [])
+    while fila and fila[-1] == "":
+        fila.pop()
+    return hashlib.sha1(json.dumps(fila, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+def _estado_sync(valores, sincronizaciones=0):
+    return {
+        "filas": len(valores),
+        "columnas": max((len(fila) for fila in valores), default=0),
+        "firma_encabezado": _firma_fila(valores[0]) if valores else None,
+        "firma_ultima_fila": _firma_fila(valores[-1]) if valores else None,
+        "sincronizaciones": sincronizaciones,
+        "lectura_completa": time.time(),
+    }
+
+def sincronizar_hojas(ws, hojas, completa=False):
+    """
+    Sincroniza hojas contra su snapshot local leyendo solo las filas añadidas.
+
+    Para cada hoja con snapshot se piden, en una única llamada batchGet, el encabezado,
+    la última fila sincronizada y las filas posteriores. Si el encabezado o la última
+    fila cambiaron (edición o borrado) la hoja se vuelve a leer completa. Los snapshots y
+    su fecha de descarga se actualizan con el resultado.
+
+    Las ediciones en filas intermedias hechas fuera de la app no se detectan en una pasada
+    incremental: las recoge la lectura completa que se fuerza tras
+    `constants.SYNC_MAX_INCREMENTALES` sincronizaciones seguidas o cuando la última lectura
+    completa tiene más de `constants.SYNC_EDAD_MAXIMA_COMPLETA` segundos. Así, esas
+    ediciones tardan como mucho ese tiempo (más lo que falte para el siguiente refresco,
+    ver `constants.SNAPSHOT_EDAD_MINIMA_REFRESCO`) en aparecer. Lo guardado desde la app
+    no espera: `data_util.invalidar_hojas` relee completas las hojas escritas.
+
+    Args:
+        ws: Objeto `Spreadsheet` de gspread.
+        hojas (list): Hojas a sincronizar.
+        completa (bool | list): Si es True, se ignoran los snapshots y se leen las hojas
+            completas. Si es una lista, solo esas hojas se leen completas.
+
+    Returns:
+        dict: {hoja: DataFrame} con el contenido actualizado de cada hoja.
+    """
+    manifiesto = snapshot.leer_manifiesto()
+    planes = {}
+    rangos = []
+
+    for hoja in hojas:
+        sync = manifiesto.get(hoja, {}).get("sync")
+        base = None
+        leer_completa = completa is True or (not isinstance(completa, bool) and hoja in completa)
+        if (not leer_completa and sync and sync["filas"] > 1
+                and sync["sincronizaciones"] < constants.SYNC_MAX_INCREMENTALES
+                and time.time() - sync.get("lectura_completa", 0) < constants.SYNC_EDAD_MAXIMA_COMPLETA):
+            base = snapshot.leer_snapshot(hoja)
+
+        rango = _rango_hoja(hoja)
+        planes[hoja] = (base, sync, len(rangos))
+        if base is None:
+            rangos.append(rango)
+        else:
+            n = sync["filas"]
+            columna = gspread.utils.rowcol_to_a1(1, max(sync["columnas"], 1)).rstrip("0123456789")
+            rangos += [f"{rango}!1:1", f"{rango}!{n}:{n}", f"{rango}!A{n + 1}:{columna}"]
+
+    try:
+        valores = _descargar_valores(ws, rangos)
+    except gspread.exceptions.APIError:
+        if all(base is None for base, _, _ in planes.values()):
+            raise
+        # Algún rango incremental no es válido (p. ej. fuera de la cuadrícula): lectura completa
+        valores = _descargar_valores(ws, [_rango_hoja(hoja) for hoja in hojas])
+        planes = {hoja: (None, None, i) for i, hoja in enumerate(hojas)}
+
+    resultado = {}
+    recargar = []
+
+    for hoja, (base, sync, i) in planes.items():
+        if base is None:
+            resultado[hoja] = _valores_a_dataframe(valores[i])
+            snapshot.guardar_snapshot(hoja, resultado[hoja], sync=_estado_sync(valores[i]))
+            continue
+
+        encabezado, ultima, nuevas = valores[i], valores[i + 1], valores[i + 2]
+        if (_firma_fila(encabezado[0] if encabezado else []) != sync["firma_encabezado"] or
+                _firma_fila(ultima[0] if ultima else []) != sync["firma_ultima_fila"]):
+            recargar.append(hoja)
+            continue
+
+        # Cada pasada incremental cuenta para la lectura completa forzada, que es la que
+        # recoge las ediciones en filas intermedias (solo se comparan encabezado y última fila)
+        if not nuevas:
+            resultado[hoja] = base
+            snapshot.registrar_sincronizacion(hoja, {**sync, "sincronizaciones": sync["sincronizaciones"] + 1})
+            continue
+
+        df_nuevas = _valores_a_dataframe([encabezado[0]] + nuevas)
+        df = pd.concat([base, df_nuevas], ignore_index=True)
+        resultado[hoja] = df
+        snapshot.guardar_snapshot(hoja, df, sync={
+            **sync,
+            "filas": sync["filas"] + len(nuevas),
+            "firma_ultima_fila": _firma_fila(nuevas[-1]),
+            "sincronizaciones": sync["sincronizaciones"] + 1,
+        })
+
+    if recargar:
+        completos = _descargar_valores(ws, [_rango_hoja(hoja) for hoja in recargar])
+        for hoja, valores_hoja in zip(recargar, completos):
+            resultado[hoja] = _valores_a_dataframe(valores_hoja)
+            snapshot.guardar_snapshot(hoja, resultado[hoja], sync=_estado_sync(valores_hoja))
+
+    return {hoja: resultado[hoja] for hoja in hojas}
+
+def descargar_hojas_con_estructura(ws, hojas, hojas_test_conocidas=None, completa=False):
+    """
+    Descarga `hojas`, la hoja de estructura TEST y todas las hojas de test que ésta define.
+
+    Las hojas de test ya conocidas se piden en la misma llamada; solo si TEST define
+    hojas nuevas se hace una segunda llamada para ellas. Las hojas con snapshot se
+    sincronizan de forma incremental (ver `sincronizar_hojas`).
+
+    Args:
+        ws: Objeto `Spreadsheet` de gspread.
+        hojas (list): Hojas base a leer (p. ej. DATOS, CHECK-IN).
+        hojas_test_conocidas (list, optional): Hojas de test de la última lectura de TEST.
+        completa (bool | list): Si es True, no se usa la sincronización incremental
+            (con una lista, solo para esas hojas).
+
+    Returns:
+        dict: {hoja: DataFrame}
+    """
+    pedidas = list(dict.fromkeys(list(hojas) + [constants.TEST_WS] + list(hojas_test_conocidas or [])))
+
+    try:
+        resultado = sincronizar_hojas(ws, pedidas, completa)
+    except gspread.exceptions.APIError:
+        if not hojas_test_conocidas:
+            raise
+        # Alguna hoja conocida ya no existe: repetir solo con las hojas base
+        resultado = sincronizar_hojas(ws, list(dict.fromkeys(list(hojas) + [constants.TEST_WS])), completa)
+
+    faltantes = [hoja for hoja in _hojas_test(resultado[constants.TEST_WS]) if hoja not in resultado]
+    if faltantes:
+        resultado.update(sincronizar_hojas(ws, faltantes, completa))
+
+    return resultado
+
+def get_bulk_data(hojas, ws=None):
+    """
+    Carga masiva de hojas: DATOS, CHECK-IN (o las indicadas), TEST y todas las hojas de test
+    definidas en TEST, en una sola petición HTTP a la API de Sheets.
+
+    Si todas las hojas tienen snapshot local se devuelven al instante y el refresco se hace
+    en segundo plano, también con una sola petición. Si alguna hoja fue invalidada con
+    `connector_sgs.invalidar_hojas`, la lectura es síncrona y solo esas hojas se releen completas.
+
+    Args:
+        hojas (list): Hojas base a leer.
+        ws: Objeto `Spreadsheet` de gspread. Por defecto `get_spreadsheet()`.
+
+    Returns:
+        dict: {hoja: DataFrame}
+    """
+    estructura = snapshot.leer_snapshot(constants.TEST_WS)
+    conocidas = _hojas_test(estructura) if estructura is not None else []
+    todas = list(dict.fromkeys(list(hojas) + [constants.TEST_WS] + conocidas))
+
+    def _descargar(completa=False):
+        return descargar_hojas_con_estructura(ws or get_spreadsheet(), hojas, conocidas, completa)
+
+    def _refrescar():
+        _descargar()  # La sincronización guarda ella misma los snapshots
+
+    # Hojas guardadas desde la app: se releen completas, el resto se sincroniza
+    invalidadas = connector_sgs.recarga_pendiente(todas)
+    if invalidadas:
+        return _descargar(completa=invalidadas)
+
+    snapshots = {hoja: snapshot.leer_snapshot(hoja) for hoja in todas}
+    if all(df is not None for df in snapshots.values()):
+        snapshot.refrescar_grupo_en_segundo_plano(todas, _refrescar)
+        return snapshots
+
+    return _descargar()
+
+def recargar_en_segundo_plano(al_terminar=None):
+    """
+    Recarga manual ("Recargar Datos") sin bloquear la página: marca todos los snapshots
+    como desactualizados y relee completas, en un hilo aparte, las hojas que se sincronizan
+    con `sincronizar_hojas`. Mientras tanto se siguen sirviendo los snapshots; las demás
+    hojas (p. ej. USUARIOS) se refrescan en segundo plano en su siguiente lectura.
+
+    Args:
+        al_terminar (callable, optional): Se llama cuando la relectura termina sin errores
+            (p. ej. para limpiar las cachés que dependen de las hojas).
+
+    Returns:
+        bool: True si se lanzó la relectura.
+    """
+    hojas = [hoja for hoja, entrada in snapshot.leer_manifiesto().items() if entrada.get("sync")]
+    snapshot.marcar_desactualizados()
+
+    def _recargar():
+        sincronizar_hojas(get_spreadsheet(), hojas, completa=True)  # Guarda ella misma los snapshots
+        if al_terminar is not None:
+            al_terminar()
+
+    return bool(hojas) and snapshot.refrescar_grupo_en_segundo_plano(hojas, _recargar)
+
+def _normalizar_celda(valor):
+    """
+    Representación comparable de una celda, igual venga de un DataFrame o de la API:
+    vacíos/NaN -> "", números -> texto canónico ("12", "12.5"), fechas d/m/aaaa -> dd/mm/aaaa.
+    """
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return ""
+    if isinstance(valor, str):
+        valor = valor.strip()
+        fecha = re.fullmatch(r"(\d{1,2})/(\d{1,2})/(\d{4})", valor)
+        if fecha:
+            return f"{int(fecha[1]):02d}/{int(fecha[2]):02d}/{fecha[3]}"
+        try:
+            valor = float(valor)
+        except ValueError:
+            return valor
+    if isinstance(valor, Real):
+        numero = float(valor)
+        if math.isnan(numero):
+            return ""
+        return str(int(numero)) if numero.is_integer() else repr(round(numero, 9))
+    return str(valor)
+
+def _misma_celda(nuevo, actual):
+    """
+    Compara una celda de un DataFrame con la de la hoja sin reinterpretar textos: solo
+    si ambas son números se comparan por su valor ("12" y 12.0 son iguales); si no, por
+    su texto sin espacios a los lados, así "0123" y "123" o "1.0" y "1" son distintas.
+    """
+    nuevo, actual = _valor_celda(nuevo), _valor_celda(actual)  # Vacíos/NaN -> ""
+    if isinstance(nuevo, Real) and isinstance(actual, Real):
+        return _normalizar_celda(nuevo) == _normalizar_celda(actual)
+    return str(nuevo).strip() == str(actual).strip()
+
+def _mismo_valor(nuevo, actual):
+    # En las hojas de test un 0 equivale a "sin dato"
+    nuevo, actual = _normalizar_celda(nuevo), _normalizar_celda(actual)
+    return nuevo == actual or {nuevo, actual} <= {"", "0"}
+
+def _valor_celda(valor):
+    # Mismo criterio que `set_with_dataframe` al escribir una celda
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return ""
+    if hasattr(valor, "item"):
+        valor = valor.item()
+    return valor if isinstance(valor, Real) else str(valor)
+
+def _rangos_fila(hoja, fila, cambios):
+    """
+    Agrupa las celdas modificadas de una fila en rangos contiguos.
+
+    Args:
+        hoja (str): Nombre de la hoja.
+        fila (int): Número de fila (1 = encabezado).
+        cambios (dict): {índice de columna (0-based): valor}.
+
+    Returns:
+        list: [{"range": ..., "values": [[...]]}] listo para `values_batch_update`.
+    """
+    rangos = []
+    columnas = sorted(cambios)
+    inicio = 0
+    for i in range(1, len(columnas) + 1):
+        if i == len(columnas) or columnas[i] != columnas[i - 1] + 1:
+            bloque = columnas[inicio:i]
+            desde = gspread.utils.rowcol_to_a1(fila, bloque[0] + 1)
+            hasta = gspread.utils.rowcol_to_a1(fila, bloque[-1] + 1)
+            rangos.append({
+                "range": f"{_rango_hoja(hoja)}!{desde}:{hasta}",
+                "values": [[cambios[c] for c in bloque]],
+            })
+            inicio = i
+    return rangos
+
+def _planificar_cambios(hoja, valores, df, claves, claves_editadas=None):
+    """
+    Compara el contenido actual de una hoja con el DataFrame a guardar.
+
+    Returns:
+        tuple | None: (rangos a modificar, filas nuevas a añadir), o None si la hoja
+        necesita reescribirse completa (hoja vacía, columnas nuevas, claves duplicadas,
+        filas sin clave que no están ya en la hoja o filas editadas que hay que borrar).
+    """
+    if not valores or any(clave not in df.columns for clave in claves):
+        return None
+
+    encabezado = [str(col).strip() for col in valores[0]]
+    if any(str(col).strip() not in encabezado for col in df.columns):
+        return None
+
+    posiciones = {col: encabezado.index(str(col).strip()) for col in df.columns}
+    ancho = len(encabezado)
+
+    def _celda(fila, i):
+        return fila[i] if i < len(fila) else ""
+
+    def _contenido(celdas):
+        # Firma de una fila sin clave: todas sus celdas, con 0 equivalente a vacío
+        return tuple("" if v == "0" else v for v in map(_normalizar_celda, celdas))
+
+    # Filas actuales por clave (fila 1 = encabezado). Las filas sin clave completa no
+    # pueden localizarse: se cuentan por contenido para no volver a añadirlas
+    filas_hoja = {}
+    sin_clave = Counter()
+    for n, fila in enumerate(valores[1:], start=2):
+        clave = tuple(_normalizar_celda(_celda(fila, posiciones[c])) for c in claves)
+        if "" in clave:
+            sin_clave[_contenido(_celda(fila, posiciones[col]) for col in df.columns)] += 1
+            continue
+        if clave in filas_hoja:
+            return None
+        filas_hoja[clave] = (n, fila)
+
+    rangos, nuevas, vistas = [], [], set()
+    for registro in df.itertuples(index=False, name=None):
+        registro = dict(zip(df.columns, registro))
+        clave = tuple(_normalizar_celda(registro[c]) for c in claves)
+
+        if "" in clave:
+            # Ya está en la hoja tal cual: nada que escribir. Si es nueva o cambió,
+            # no hay forma de saber qué fila sustituye: reescritura completa
+            contenido = _contenido(registro.values())
+            if not sin_clave[contenido]:
+                return None
+            sin_clave[contenido] -= 1
+            continue
+
+        vistas.add(clave)
+
+        if clave not in filas_hoja:
+            fila = [""] * ancho
+            for col, valor in registro.items():
+                fila[posiciones[col]] = _valor_celda(valor)
+            nuevas.append(fila)
+            continue
+
+        n, actual = filas_hoja[clave]
+        cambios = {
+            posiciones[col]: _valor_celda(valor)
+            for col, valor in registro.items()
+            if not _mismo_valor(valor, _celda(actual, posiciones[col]))
+        }
+        if cambios:
+            rangos += _rangos_fila(hoja, n, cambios)
+
+    # Una fila editada que ya no debe estar en la hoja obliga a borrarla: reescritura completa
+    for clave in claves_editadas or []:
+        clave = tuple(_normalizar_celda(v) for v in clave)
+        if clave in filas_hoja and clave not in vistas:
+            return None
+
+    return rangos, nuevas
+
+def guardar_cambios_hojas(ws, hojas, claves, claves_editadas=None):
+    """
+    Guarda solo las filas nuevas o modificadas de cada hoja, en lugar de reescribirlas.
+
+    Lee el contenido actual de todas las hojas en una única llamada batchGet, localiza
+    cada registro por `claves` (p. ej. FECHA REGISTRO + ID), modifica solo las celdas que
+    cambiaron en una única llamada batchUpdate y añade las filas nuevas al final de cada hoja.
+
+    Args:
+        ws: Objeto `Spreadsheet` de gspread.
+        hojas (dict): {nombre_hoja: DataFrame con el contenido que debe tener la hoja}.
+        claves (list): Columnas que identifican un registro.
+        claves_editadas (iterable, optional): Claves de las filas editadas por el usuario.
+            Si alguna existe en la hoja pero ya no está en el DataFrame, esa hoja se
+            devuelve en "completas" para reescribirla (la fila debe borrarse).
+
+    Returns:
+        dict: {"modificadas": hojas escritas, "completas": hojas a reescribir enteras,
+               "celdas": celdas modificadas, "filas_nuevas": filas añadidas}
+    """
+    claves_editadas = list(claves_editadas or [])
+    resumen = {"modificadas": [], "completas": [], "celdas": 0, "filas_nuevas": 0}
+
+    nombres = [hoja for hoja, df in hojas.items() if df is not None and not df.empty]
+    if not nombres:
+        return resumen
+
+    try:
+        grids = _descargar_valores(ws, [_rango_hoja(hoja) for hoja in nombres])
+    except gspread.exceptions.APIError:
+        # Alguna hoja no existe todavía: se crean/reescriben con el método completo
+        resumen["completas"] = nombres
+        return resumen
+
+    actualizaciones = []
+    for hoja, valores in zip(nombres, grids):
+        plan = _planificar_cambios(hoja, valores, hojas[hoja], claves, claves_editadas)
+        if plan is None:
+            resumen["completas"].append(hoja)
+            continue
+
+        rangos, nuevas = plan
+        if not rangos and not nuevas:
+            continue
+
+        actualizaciones += rangos
+        resumen["celdas"] += sum(len(r["values"][0]) for r in rangos)
+        resumen["modificadas"].append(hoja)
+
+        if nuevas:
+            ws.values_append(
+                _rango_hoja(hoja),
+                params={"valueInputOption": "USER_ENTERED", "insertDataOption": "INSERT_ROWS"},
+                body={"values": nuevas},
+            )
+            resumen["filas_nuevas"] += len(nuevas)
+
+    if actualizaciones:
+        ws.values_batch_update(body={"valueInputOption": "USER_ENTERED", "data": actualizaciones})
+
+    return resumen
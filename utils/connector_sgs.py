@@ -1,19 +1,72 @@
+import threading
 import streamlit as st
 from streamlit_gsheets import GSheetsConnection
+from utils import snapshot
+
+# Hojas que deben leerse de Google Sheets en la próxima lectura (compartido entre
+# sesiones, igual que los snapshots y st.cache_data)
+_hojas_pendientes = set()
+_lock_pendientes = threading.Lock()
 
 @st.cache_resource(show_spinner=True)
 def get_connector():
     return st.connection("gsheets", type=GSheetsConnection)
 
-def get_ttl():
-    if st.session_state.get("reload_data", False):
-        default_reload_time = "0m"  # Forzar recarga
-        st.session_state["reload_data"] = False  # Resetear flag después de la recarga
+def invalidar_hojas(hojas):
+    """
+    Marca hojas para que su próxima lectura vaya directa a Google Sheets, sin pasar
+    por el snapshot local. El resto de hojas sigue sirviéndose desde caché.
+
+    Args:
+        hojas (list): Nombres de las hojas modificadas.
+    """
+    with _lock_pendientes:
+        _hojas_pendientes.update(hojas)
+
+def recarga_pendiente(hojas):
+    """
+    Devuelve las hojas de `hojas` marcadas con `invalidar_hojas` y las desmarca.
+
+    Args:
+        hojas (list): Hojas que se van a leer.
+
+    Returns:
+        list: Hojas que deben leerse de Google Sheets.
+    """
+    with _lock_pendientes:
+        pendientes = [hoja for hoja in hojas if hoja in _hojas_pendientes]
+        _hojas_pendientes.difference_update(pendientes)
+    return pendientes
+
+def get_ttl(hoja):
+    """
+    Devuelve "0m" si `hoja` fue invalidada con `invalidar_hojas` y hay que leerla de
+    Google Sheets. En otro caso "360m".
+    """
+    if recarga_pendiente([hoja]):
+        default_reload_time = "0m"  # Solo esta hoja cambió
     else:
         default_reload_time = "360m"  # Usar caché normalmente
 
     return default_reload_time
 
 def get_data(_conn, sheet):
-    df = _conn.read(worksheet=sheet, ttl=get_ttl())
-    return df
\ No newline at end of file
+    """
+    Lee una hoja sirviendo primero el snapshot local (Parquet) si existe.
+
+    - Recarga forzada (TTL "0m", hoja marcada con `invalidar_hojas`): lee de Google Sheets
+      y actualiza el snapshot.
+    - Sin snapshot (primer arranque): lee de Google Sheets y lo guarda.
+    - Con snapshot: lo devuelve al instante y lanza un refresco en segundo plano.
+    """
+    ttl = get_ttl(sheet)
+
+    if ttl != "0m":
+        df = snapshot.leer_snapshot(sheet)
+        if df is not None:
+            snapshot.refrescar_en_segundo_plano(sheet, lambda: _conn.read(worksheet=sheet, ttl=0))
+            return df
+
+    df = _conn.read(worksheet=sheet, ttl=ttl)
+    snapshot.guardar_snapshot(sheet, df)
+    return df
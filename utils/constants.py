@@ -1,5 +1,7 @@
 
 USUARIOS_WS = "USUARIOS"
+DATOS_WS = "DATOS"
+TEST_WS = "TEST"
 
 ID_LABEL = "ID"
 UNAVAILABLE = "No Disponible"
@@ -27,3 +29,35 @@ COLUMNAS_EXCLUIDAS = [FECHA_REGISTRO_LABEL, ID_LABEL, JUGADOR_LABEL, CATEGORIA_L
 
 COLUMNAS = [FECHA_REGISTRO_LABEL, ID_LABEL, JUGADOR_LABEL, CATEGORIA_LABEL, EQUIPO_LABEL]
 
+# Tipos de datos al cargar: etiquetas como categóricas si se repiten lo suficiente
+COLUMNAS_CATEGORICAS = [CATEGORIA_LABEL, EQUIPO_LABEL, "GENERO", "NACIONALIDAD", "DEMARCACION", JUGADOR_LABEL]
+MAX_PROPORCION_CATEGORICA = 0.5  # valores distintos / filas por encima del cual se deja como texto
+
+# Snapshots locales de las hojas de Google Sheets
+SNAPSHOT_DIR = ".snapshots"
+SNAPSHOT_EDAD_MINIMA_REFRESCO = 60  # segundos entre refrescos en segundo plano de una misma hoja
+SYNC_MAX_INCREMENTALES = 5  # sincronizaciones incrementales seguidas antes de forzar una lectura completa
+SYNC_EDAD_MAXIMA_COMPLETA = 300  # segundos desde la última lectura completa antes de forzar otra
+
+# Descarga concurrente de hojas
+MAX_DESCARGAS_CONCURRENTES = 6  # 1 = descarga secuencial
+TIMEOUT_DESCARGA_HOJA = 60  # segundos de espera máxima por hoja
+
+# Exportación de gráficos (PNG o SVG) para los PDF
+RENDER_CACHE_DIR = ".cache/graficos"  # imágenes por hash del JSON de la figura
+RENDER_CACHE_DISCO_MB = 256  # al pasarse se borran las imágenes usadas hace más tiempo
+RENDER_CACHE_MEMORIA = 128  # imágenes que se mantienen además en memoria
+RENDER_PROCESOS_KALEIDO = 2  # procesos de kaleido persistentes (gráficos renderizados a la vez)
+PDF_CACHE_FRAGMENTOS = 64  # gráficos y fotos ya decodificados para el PDF (se reutilizan entre informes)
+REPORTES_CACHE_MB = 64  # PDF generados en PlayerHub que se guardan en el servidor para volver a descargarlos
+
+# Fotos de perfil (miniaturas por ID de archivo de Drive)
+FOTOS_CACHE_DIR = ".cache/fotos"
+FOTOS_CACHE_MB = 64  # al pasarse se borran las miniaturas usadas hace más tiempo
+FOTOS_CACHE_MEMORIA = 64  # miniaturas que se mantienen además en memoria
+FOTOS_LADO_MAX = 400  # píxeles del lado mayor de la miniatura (35-40 mm en el PDF)
+FOTOS_TIMEOUT = (3, 10)  # segundos de conexión y de lectura
+FOTOS_EDAD_REVALIDACION = 24 * 3600  # segundos antes de volver a consultar Drive (petición condicional)
+FOTOS_HILOS_PRECARGA = 8
+FOTOS_LOCKS = 64  # locks para no descargar dos veces la misma foto a la vez (repartidos por hash)
+FOTOS_MAX_PRECARGA = 80  # jugadores a partir de los cuales PlayerHub no precarga la selección
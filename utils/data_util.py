@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from utils import util
+from utils import player
+from utils import matriz
 from utils import constants
+from utils import connector_sgs
 from datetime import datetime
 
 @st.cache_data(ttl=600)
@@ -11,7 +19,66 @@ def get_usuarios(_conn, _get_data):
 
 @st.cache_data(ttl=60)  
 def get_test(_conn, _get_data):
-    return _get_data(_conn, "TEST")
+    return _get_data(_conn, constants.TEST_WS)
+
+def _normalizar_etiquetas(serie):
+    """
+    Quita los espacios de los extremos trabajando solo sobre los valores distintos y
+    devuelve la columna como categórica si esos valores se repiten lo suficiente.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie
+
+    codigos, unicos = pd.factorize(serie)
+    if len(unicos) == 0:
+        return serie
+
+    unicos = pd.Index([u.strip() if isinstance(u, str) else u for u in unicos], dtype=object)
+    categorias = unicos.unique()
+    try:
+        categorias = categorias.sort_values()
+    except TypeError:
+        pass  # Tipos mezclados: se deja el orden de aparición
+
+    # Dos valores que solo se diferenciaban por espacios pasan a ser la misma categoría
+    codigos = np.where(codigos >= 0, categorias.get_indexer(unicos)[codigos], -1)
+    valores = pd.Categorical.from_codes(codigos, categories=categorias)
+
+    if len(categorias) > constants.MAX_PROPORCION_CATEGORICA * len(serie):
+        return pd.Series(np.asarray(valores, dtype=object), index=serie.index, name=serie.name)
+    return pd.Series(valores, index=serie.index, name=serie.name)
+
+def optimizar_tipos(df, metricas=None, nombre="datos"):
+    """
+    Política de tipos al cargar los datos:
+    - Etiquetas (`constants.COLUMNAS_CATEGORICAS`) normalizadas una sola vez (sin espacios en
+      los extremos) y, si se repiten, categóricas: los filtros por igualdad y los groupby
+      trabajan sobre códigos enteros.
+    - Métricas float64 -> float32.
+
+    Args:
+        df (pd.DataFrame): DataFrame a optimizar (se modifica y se devuelve).
+        metricas (list, optional): Columnas a reducir a float32. Solo para tablas de consulta:
+            las que se vuelven a escribir en Google Sheets mantienen float64 para no alterar decimales.
+        nombre (str): Nombre de la tabla para el informe de memoria.
+
+    Returns:
+        pd.DataFrame: El mismo DataFrame con los tipos optimizados.
+    """
+    antes = df.memory_usage(deep=True).sum()
+
+    for col in constants.COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = _normalizar_etiquetas(df[col])
+
+    for col in metricas or []:
+        if col in df.columns and pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+
+    despues = df.memory_usage(deep=True).sum()
+    ahorro = 1 - despues / antes if antes else 0
+    print(f"🧮 Tipos de '{nombre}': {antes / 1024:,.0f} KB -> {despues / 1024:,.0f} KB ({ahorro:.0%} menos)")
+    return df
 
 @st.cache_data(ttl=60)
 def get_player_data(_conn, _get_data):
@@ -25,9 +92,9 @@ def get_player_data(_conn, _get_data):
     - Convierte y formatea fechas de nacimiento.
     - Calcula la edad del jugador a partir de la fecha de nacimiento.
     - Rellena fechas faltantes o inválidas con la fecha actual.
-    - Convierte "FECHA REGISTRO" a datetime para ordenar, y luego la devuelve como string.
+    - Convierte "FECHA REGISTRO" a datetime64 y ordena por ella (se formatea solo al mostrar o guardar).
     - Limpia y corrige nacionalidades según reglas definidas en `util.limpiar_nacionalidades`.
-    - Asegura tipos consistentes para columnas clave.
+    - Asegura tipos consistentes para columnas clave y aplica `optimizar_tipos`.
 
     Args:
         _conn: Objeto `Spreadsheet` de gspread conectado a Google Sheets.
@@ -36,7 +103,7 @@ def get_player_data(_conn, _get_data):
         pd.DataFrame: DataFrame limpio y ordenado con los datos de jugadores.
     """
     hoy = datetime.today()
-    df = _get_data(_conn, "DATOS")
+    df = _get_data(_conn, constants.DATOS_WS)
 
     # Limpieza general de strings
     str_cols = df.select_dtypes(include=["object", "string"]).columns
@@ -48,18 +115,18 @@ def get_player_data(_conn, _get_data):
     # Eliminar duplicados por ID
     df.drop_duplicates(subset=[constants.ID_LABEL], keep="first", inplace=True)
 
-    # === Limpieza y cálculo de fechas ===
-    df[constants.FECHA_NACIMIENTO_LABEL] = df[constants.FECHA_NACIMIENTO_LABEL].apply(util.convertir_fecha_segura)
-    df[constants.EDAD_LABEL] = df[constants.FECHA_NACIMIENTO_LABEL].apply(
-        lambda x: hoy.year - x.year - ((hoy.month, hoy.day) < (x.month, x.day)) if pd.notnull(x) else None
+    # === Limpieza y cálculo de fechas (por columna, sin funciones por fila) ===
+    nacimiento = util.parsear_fechas(df[constants.FECHA_NACIMIENTO_LABEL])
+    cumple_pendiente = (nacimiento.dt.month > hoy.month) | (
+        (nacimiento.dt.month == hoy.month) & (nacimiento.dt.day > hoy.day)
     )
-    df[constants.FECHA_NACIMIENTO_LABEL] = df[constants.FECHA_NACIMIENTO_LABEL].apply(util.formatear_fecha)
+    df[constants.EDAD_LABEL] = hoy.year - nacimiento.dt.year - cumple_pendiente.astype(int)
+    df[constants.FECHA_NACIMIENTO_LABEL] = nacimiento.dt.strftime("%d/%m/%Y").astype(object).where(nacimiento.notna(), None)
 
     # Asegurar y ordenar por FECHA REGISTRO
     #df = util.rellenar_fechas_invalidas(df, columna=constants.FECHA_REGISTRO_LABEL)
-    df[constants.FECHA_REGISTRO_LABEL] = pd.to_datetime(df[constants.FECHA_REGISTRO_LABEL], format="%d/%m/%Y", errors="coerce")
+    df[constants.FECHA_REGISTRO_LABEL] = util.a_fecha(df[constants.FECHA_REGISTRO_LABEL])
     df.sort_values(by=constants.FECHA_REGISTRO_LABEL, ascending=False, inplace=True)
-    df[constants.FECHA_REGISTRO_LABEL] = df[constants.FECHA_REGISTRO_LABEL].dt.strftime("%d/%m/%Y")
 
     # Tipos seguros
     df = df.astype({constants.ID_LABEL: str, constants.JUGADOR_LABEL: str})
@@ -68,6 +135,7 @@ def get_player_data(_conn, _get_data):
     #df = util.rellenar_fechas_invalidas(df, columna="FECHA DE NACIMIENTO")
 
     df.reset_index(drop=True, inplace=True)
+    df = optimizar_tipos(df, nombre=constants.DATOS_WS)
 
     return df
 
@@ -78,6 +146,7 @@ def get_test_data(conn, hoja, _get_data):
     Args:
         _spreadsheet: Objeto gspread Spreadsheet.
         hoja (str): Nombre de la hoja a cargar.
+        _get_data (callable): Lector de la hoja `(conn, hoja) -> DataFrame`.
 
     Returns:
         pd.DataFrame: Datos limpios de la hoja de test.
@@ -92,7 +161,7 @@ def get_test_data(conn, hoja, _get_data):
         df = df[1:].reset_index(drop=True)
 
         # Filtrar filas con al menos un valor numérico
-        mask = df.applymap(util.es_numerico)
+        mask = util.mascara_numericos(df)
         df = df[mask.any(axis=1)]
 
         df.replace("None", 0, inplace=True)
@@ -105,23 +174,109 @@ def get_test_data(conn, hoja, _get_data):
 
     return df
 
+def _lector_desde_hojas(hojas, _get_data):
+    """
+    Adapta el resultado de una lectura masiva a la firma `(conn, hoja)` de los lectores,
+    delegando en `_get_data` las hojas que no vengan en el diccionario.
+    """
+    def _leer(_conn, hoja):
+        if hoja in hojas:
+            return hojas[hoja].copy()
+        return _get_data(_conn, hoja)
+    return _leer
+
+def descargar_en_paralelo(tareas, max_concurrencia=None, timeout=None):
+    """
+    Ejecuta varias lecturas de hojas a la vez en un pool de hilos.
+
+    Los hilos heredan el contexto de Streamlit de la sesión actual para que las
+    funciones cacheadas y `st.session_state` sigan funcionando dentro de ellos.
+
+    Args:
+        tareas (dict): {nombre: función sin argumentos que devuelve un DataFrame}.
+        max_concurrencia (int, optional): Máximo de lecturas simultáneas.
+            Por defecto `constants.MAX_DESCARGAS_CONCURRENTES`. Con 1 se lee en secuencia.
+        timeout (float, optional): Segundos máximos de espera por hoja.
+            Por defecto `constants.TIMEOUT_DESCARGA_HOJA`.
+
+    Returns:
+        dict: {nombre: resultado} en el mismo orden que `tareas`.
+
+    Raises:
+        TimeoutError: Si alguna hoja supera el tiempo máximo de espera.
+    """
+    max_concurrencia = max_concurrencia or constants.MAX_DESCARGAS_CONCURRENTES
+    timeout = timeout or constants.TIMEOUT_DESCARGA_HOJA
+
+    if max_concurrencia <= 1 or len(tareas) <= 1:
+        return {nombre: tarea() for nombre, tarea in tareas.items()}
+
+    ctx = get_script_run_ctx()
+
+    def _inicializar_hilo():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_concurrencia, len(tareas)),
+        thread_name_prefix="descarga-hoja",
+        initializer=_inicializar_hilo
+    )
+    futuros = {nombre: executor.submit(tarea) for nombre, tarea in tareas.items()}
+
+    resultados = {}
+    try:
+        for nombre, futuro in futuros.items():
+            try:
+                resultados[nombre] = futuro.result(timeout=timeout)
+            except FuturesTimeoutError:
+                raise TimeoutError(f"La hoja '{nombre}' no respondió en {timeout} segundos.")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return resultados
+
 @st.cache_data(ttl=60)
-def load_player_and_physical_data(_conn, _get_data):
+def load_player_and_physical_data(_conn, _get_data, _get_bulk_data=None):
     """
     Carga y consolida los datos de jugadores y sus tests físicos.
 
     Args:
-        _spreadsheet: Objeto gspread Spreadsheet.
+        _conn: Conexión a Google Sheets.
+        _get_data (callable): Lector de una hoja `(conn, hoja) -> DataFrame`.
+        _get_bulk_data (callable, optional): Lector masivo `(hojas) -> {hoja: DataFrame}`
+            (ver `connector_gs.get_bulk_data`). Si se indica, todas las hojas se leen en
+            una sola petición; si falla, se vuelve a la lectura hoja por hoja.
 
     Returns:
         tuple: (df_datos, df_data_test, df_checkin)
     """
-    df_datos = get_player_data(_conn, _get_data)
+    hojas = None
+    if _get_bulk_data is not None:
+        try:
+            hojas = _get_bulk_data([constants.DATOS_WS, constants.CHECKIN_LABEL])
+        except Exception as e:
+            print(f"⚠️ Lectura masiva no disponible, se leerá hoja por hoja: {e}")
+
+    if hojas is not None:
+        _get_data = _lector_desde_hojas(hojas, _get_data)
+        max_concurrencia = 1  # Ya está todo en memoria
+    else:
+        max_concurrencia = None
 
     # Cargar todos los tests por hoja
     _, _, hojas_test = get_diccionario_test_categorias(_conn, _get_data)
-    df_tests = [get_test_data(_conn, hoja, _get_data) for hoja in hojas_test]
-    df_checkin = get_test_data(_conn, constants.CHECKIN_LABEL, _get_data)
+
+    # Lanzar todas las lecturas a la vez: el tiempo total se acerca al de la hoja más lenta
+    tareas = {constants.DATOS_WS: lambda: get_player_data(_conn, _get_data)}
+    for hoja in hojas_test + [constants.CHECKIN_LABEL]:
+        tareas[hoja] = lambda hoja=hoja: get_test_data(_conn, hoja, _get_data)
+
+    resultados = descargar_en_paralelo(tareas, max_concurrencia=max_concurrencia)
+
+    df_datos = resultados[constants.DATOS_WS]
+    df_tests = [resultados[hoja] for hoja in hojas_test]
+    df_checkin = resultados[constants.CHECKIN_LABEL]
 
     df_data_test = util.unir_dataframes(df_tests, constants.COLUMNAS_COMUNES)
 
@@ -138,7 +293,7 @@ def load_player_and_physical_data(_conn, _get_data):
     df_data_test = util.limpiar_columnas_numericas(df_data_test, columnas_numericas)
     df_checkin = util.limpiar_columnas_numericas(df_checkin, columnas_numericas)
 
-    # Validar y limpiar fechas
+    # Validar y limpiar fechas: FECHA REGISTRO queda como datetime64 en adelante
     for df in [df_data_test, df_checkin]:
         df = util.rellenar_fechas_invalidas(df, columna=constants.FECHA_REGISTRO_LABEL)
         df.reset_index(drop=True, inplace=True)
@@ -151,4 +306,110 @@ def get_diccionario_test_categorias(_conn, _get_data):
     test_cat = util.construir_diccionario_test_categorias(test)
     lista_columnas = test.columns.tolist()
 
-    return test, test_cat, lista_columnas
\ No newline at end of file
+    return test, test_cat, lista_columnas
+
+@st.cache_data(ttl=60)
+def get_dataset(_conn, _get_data, _get_bulk_data=None):
+    """
+    Prepara una sola vez, por versión de los datos, todo lo que usan las páginas:
+    carga, uniones con los tests y con el CHECK-IN, estructura de tests e índice de jugadores.
+    Las páginas lo usan tal cual, sin repetir las uniones en cada interacción.
+
+    Args:
+        _conn: Conexión a Google Sheets.
+        _get_data (callable): Lector de una hoja `(conn, hoja) -> DataFrame`.
+        _get_bulk_data (callable, optional): Lector masivo (ver `load_player_and_physical_data`).
+
+    Returns:
+        dict: {
+            "datos": tabla de jugadores,
+            "tests": tests físicos unidos por hoja,
+            "checkin": datos de CHECK-IN,
+            "joined": jugadores + tests,
+            "joined_limpio": "joined" sin filas sin datos válidos,
+            "tests_final": "joined" + CHECK-IN,
+            "datos_final": jugadores + jugadores de CHECK-IN,
+            "estructura": hoja TEST,
+            "test_cat": {test: columnas},
+            "lista_columnas": nombres de los tests,
+            "columnas_metricas": columnas de métricas de "tests",
+            "indice": índice de jugadores sobre "datos_final" y "tests_final",
+            "matriz": matriz columnar de "tests_final" (ver `matriz.construir_matriz`),
+            "percentiles": percentiles de toda la plantilla por género y categoría (ver `matriz.tabla_percentiles`),
+            "version": identificador de esta preparación de los datos (clave de caché de lo que se calcula con ellos),
+        }
+    """
+    estructura, test_cat, lista_columnas = get_diccionario_test_categorias(_conn, _get_data)
+    df_datos, df_data_test, df_checkin = load_player_and_physical_data(_conn, _get_data, _get_bulk_data)
+
+    df_joined = util.join_player_and_physical_data(df_datos, df_data_test)
+    df_joined_limpio = util.limpiar_filas_sin_datos_validos(df_joined, constants.COLUMNAS_EXCLUIDAS)
+
+    columnas_metricas = [
+        col for col in util.get_dataframe_columns(df_data_test)
+        if col not in constants.COLUMNAS_EXCLUIDAS_PROMEDIO
+    ]
+
+    df_data_test_final, df_datos_final = util.actualizar_datos_con_checkin(df_datos, df_checkin, df_joined)
+
+    # Tipos compactos: categóricas en todas las tablas y float32 solo en las de consulta
+    # ("tests_final" se vuelve a escribir en las hojas desde la página de tests)
+    for nombre, df in [("tests", df_data_test), ("joined", df_joined), ("joined_limpio", df_joined_limpio)]:
+        optimizar_tipos(df, metricas=columnas_metricas, nombre=nombre)
+    for nombre, df in [("checkin", df_checkin), ("tests_final", df_data_test_final), ("datos_final", df_datos_final)]:
+        optimizar_tipos(df, nombre=nombre)
+
+    matriz_tests = matriz.construir_matriz(df_data_test_final, test_cat)
+
+    return {
+        "datos": df_datos,
+        "tests": df_data_test,
+        "checkin": df_checkin,
+        "joined": df_joined,
+        "joined_limpio": df_joined_limpio,
+        "tests_final": df_data_test_final,
+        "datos_final": df_datos_final,
+        "estructura": estructura,
+        "test_cat": test_cat,
+        "lista_columnas": lista_columnas,
+        "columnas_metricas": columnas_metricas,
+        "indice": player.indice_jugadores(df_datos_final, df_data_test_final),
+        "matriz": matriz_tests,
+        "percentiles": matriz.tabla_percentiles(matriz_tests),
+        "version": uuid.uuid4().hex,
+    }
+
+def _caches_dependientes(hoja):
+    """
+    Devuelve las funciones cacheadas cuyo resultado depende de la hoja indicada.
+    Cualquier hoja que no sea DATOS, TEST o USUARIOS se considera hoja de test.
+    """
+    if hoja == constants.USUARIOS_WS:
+        return [get_usuarios]
+
+    caches = [load_player_and_physical_data, get_dataset]
+    if hoja == constants.DATOS_WS:
+        caches.append(get_player_data)
+    elif hoja == constants.TEST_WS:
+        caches += [get_test, get_diccionario_test_categorias]
+    return caches
+
+def invalidar_hojas(hojas):
+    """
+    Invalida solo lo que depende de las hojas modificadas: marca esas hojas para
+    releerlas de Google Sheets y limpia las funciones cacheadas que las usan.
+    Las demás hojas se siguen sirviendo desde caché/snapshot.
+
+    Args:
+        hojas (list | str): Hoja u hojas guardadas (p. ej. "CMJ").
+    """
+    if isinstance(hojas, str):
+        hojas = [hojas]
+
+    connector_sgs.invalidar_hojas(hojas)
+
+    caches = []
+    for hoja in hojas:
+        caches += [cache for cache in _caches_dependientes(hoja) if cache not in caches]
+    for cache in caches:
+        cache.clear()
@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PIL import Image
+
+from utils import constants
+from utils import cache_disco
+
+_lock_sesion = threading.Lock()
+_sesion = None
+_lock_memoria = threading.Lock()
+_memoria = OrderedDict()  # clave -> miniatura JPEG (LRU)
+# Locks repartidos por hash de la clave: número fijo, sin un lock por foto que crezca sin límite
+_locks_por_clave = [threading.Lock() for _ in range(constants.FOTOS_LOCKS)]
+_lock_precargas = threading.Lock()
+_precargas_en_curso = set()
+
+def sesion():
+    """
+    Sesión HTTP compartida (conexiones reutilizadas y reintentos) para descargar fotos.
+    """
+    global _sesion
+    if _sesion is None:
+        with _lock_sesion:
+            if _sesion is None:
+                s = requests.Session()
+                reintentos = Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+                adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=constants.FOTOS_HILOS_PRECARGA,
+                                        max_retries=reintentos)
+                s.mount("https://", adaptador)
+                s.mount("http://", adaptador)
+                _sesion = s
+    return _sesion
+
+def clave_foto(url):
+    """
+    Clave de caché de una foto: el ID del archivo de Drive si la URL lo tiene
+    (`/d/<id>` o `id=<id>`), o un hash de la URL en otro caso.
+    """
+    match = re.search(r"/d/([a-zA-Z0-9_-]+)", url) or re.search(r"[?&]id=([a-zA-Z0-9_-]+)", url)
+    if match:
+        return match.group(1)
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+def _rutas(clave):
+    base = os.path.join(constants.FOTOS_CACHE_DIR, clave)
+    return base + ".jpg", base + ".json"
+
+def _lock_clave(clave):
+    # Dos claves pueden compartir lock: solo se serializan sus descargas
+    return _locks_por_clave[hash(clave) % len(_locks_por_clave)]
+
+def _recordar(clave, miniatura):
+    with _lock_memoria:
+        _memoria[clave] = (miniatura, time.time())
+        _memoria.move_to_end(clave)
+        while len(_memoria) > constants.FOTOS_CACHE_MEMORIA:
+            _memoria.popitem(last=False)
+
+def _miniatura(contenido):
+    imagen = Image.open(BytesIO(contenido))
+    imagen.thumbnail((constants.FOTOS_LADO_MAX, constants.FOTOS_LADO_MAX))
+    salida = BytesIO()
+    imagen.convert("RGB").save(salida, format="JPEG", quality=88)
+    return salida.getvalue()
+
+def _leer_disco(clave):
+    ruta_img, ruta_meta = _rutas(clave)
+    try:
+        with open(ruta_img, "rb") as f:
+            miniatura = f.read()
+        with open(ruta_meta, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+    cache_disco.usar(ruta_img)
+    return miniatura, meta
+
+def _guardar_disco(clave, miniatura, meta):
+    ruta_img, ruta_meta = _rutas(clave)
+    try:
+        os.makedirs(constants.FOTOS_CACHE_DIR, exist_ok=True)
+        if miniatura is not None:
+            with open(ruta_img + ".tmp", "wb") as f:
+                f.write(miniatura)
+            os.replace(ruta_img + ".tmp", ruta_img)
+        with open(ruta_meta + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(ruta_meta + ".tmp", ruta_meta)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la foto en caché: {e}")
+        return
+    if miniatura is not None:
+        cache_disco.recortar(constants.FOTOS_CACHE_DIR, constants.FOTOS_CACHE_MB)
+
+def _descargar(url, clave, miniatura, meta):
+    # Petición condicional si ya hay copia: un 304 solo renueva la fecha de validación
+    cabeceras = {}
+    if miniatura is not None:
+        if meta.get("etag"):
+            cabeceras["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            cabeceras["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        respuesta = sesion().get(url, headers=cabeceras, timeout=constants.FOTOS_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ Error descargando foto {clave}: {e}")
+        return miniatura  # sin conexión se sirve la copia anterior (si la hay)
+
+    if respuesta.status_code == 304 and miniatura is not None:
+        _guardar_disco(clave, None, dict(meta, validada=time.time()))
+        return miniatura
+
+    if respuesta.status_code != 200 or "image" not in respuesta.headers.get("Content-Type", ""):
+        return miniatura
+
+    try:
+        nueva = _miniatura(respuesta.content)
+    except Exception as e:
+        print(f"⚠️ Foto {clave} ilegible: {e}")
+        return miniatura
+
+    _guardar_disco(clave, nueva, {
+        "url": url,
+        "etag": respuesta.headers.get("ETag"),
+        "last_modified": respuesta.headers.get("Last-Modified"),
+        "validada": time.time(),
+    })
+    return nueva
+
+def obtener_foto(url):
+    """
+    Miniatura JPEG de la foto de perfil de un jugador. Se sirve desde memoria o disco y
+    solo se vuelve a consultar Drive (con petición condicional) cuando la copia supera
+    `FOTOS_EDAD_REVALIDACION` segundos.
+
+    Args:
+        url (str): URL de la foto (Google Drive u otra).
+
+    Returns:
+        bytes | None: Imagen, o None si no hay foto disponible.
+    """
+    if not isinstance(url, str) or not url.startswith("http"):
+        return None
+
+    clave = clave_foto(url)
+    with _lock_memoria:
+        en_memoria = _memoria.get(clave)
+    if en_memoria and time.time() - en_memoria[1] < constants.FOTOS_EDAD_REVALIDACION:
+        return en_memoria[0]
+
+    # Una sola descarga por foto aunque la pidan varias sesiones a la vez
+    with _lock_clave(clave):
+        miniatura, meta = _leer_disco(clave)
+        if miniatura is None or time.time() - meta.get("validada", 0) >= constants.FOTOS_EDAD_REVALIDACION:
+            miniatura = _descargar(url, clave, miniatura, meta)
+        if miniatura is not None:
+            _recordar(clave, miniatura)
+        return miniatura
+
+def precargar_fotos(urls):
+    """
+    Descarga en paralelo las fotos que aún no están en caché (p. ej. las de un equipo
+    antes de generar sus reportes).
+
+    Args:
+        urls (iterable): URLs de las fotos (se ignoran vacías y repetidas).
+
+    Returns:
+        int: Número de fotos disponibles.
+    """
+    urls = [url for url in dict.fromkeys(urls) if isinstance(url, str) and url.startswith("http")]
+    if not urls:
+        return 0
+    with ThreadPoolExecutor(max_workers=constants.FOTOS_HILOS_PRECARGA) as pool:
+        return sum(foto is not None for foto in pool.map(obtener_foto, urls))
+
+def precargar_en_segundo_plano(urls):
+    """
+    Igual que `precargar_fotos`, pero sin bloquear: lanza la descarga en un hilo aparte.
+    No repite una precarga que ya está en curso para el mismo conjunto de fotos.
+
+    Returns:
+        bool: True si se lanzó una precarga.
+    """
+    urls = tuple(url for url in dict.fromkeys(urls) if isinstance(url, str) and url.startswith("http"))
+    if not urls:
+        return False
+    with _lock_precargas:
+        if urls in _precargas_en_curso:
+            return False
+        _precargas_en_curso.add(urls)
+
+    def _tarea():
+        try:
+            precargar_fotos(urls)
+        finally:
+            with _lock_precargas:
+                _precargas_en_curso.discard(urls)
+
+    threading.Thread(target=_tarea, name="precarga-fotos", daemon=True).start()
+    return True
@@ -0,0 +1,267 @@
+from graphics import graphics
+from graphics import cmj as cmjg
+from graphics import sprint as sprintg
+from graphics import yoyo as yoyog
+from graphics import rsa as rsag
+from graphics import agilidad as agilidadg
+from utils import util
+from utils import traslator
+from utils import constants
+
+# Gráficos que entran en cada tipo de reporte
+GRAFICOS_SIMPLE = ["Altura", "Peso y Grasa", "CMJ", "SPRINT 0-5", "SPRINT 0-40", "AGILIDAD"]
+GRAFICOS_AVANZADO = GRAFICOS_SIMPLE + ["YO-YO", "RSA Tiempo", "RSA Velocidad"]
+
+# Sección del PDF en la que se imprime la observación de cada test
+OBSERVACIONES = {
+    "antropometria": "Peso y % Grasa",
+    "cmj": "POTENCIA MUSCULAR (SALTO CON CONTRAMOVIMIENTO)",
+    "sprint": "SPRINT (0-40M)",
+    "agilidad": "VELOCIDAD EN EL CAMBIO DE DIRECCIÓN (AGILIDAD 505)",
+}
+
+def contexto(df_promedios, categoria, equipo, genero, idioma, simple):
+    """
+    Datos comunes a todos los gráficos de un jugador.
+
+    Args:
+        df_promedios (pd.DataFrame): Promedios de `util.calcular_promedios_filtrados`.
+        categoria (str): Categoría con la que se compara al jugador (Juvenil/Cadete).
+        equipo (str): Equipo del jugador.
+        genero (str): "H" o "M".
+        idioma (str): Código de idioma de los textos.
+        simple (bool): True para el reporte Simple (gráficos de barras).
+
+    Returns:
+        dict: Contexto para las funciones de este módulo.
+    """
+    return {
+        "df_promedios": df_promedios,
+        "categoria": categoria,
+        "equipo": equipo,
+        "genero": genero,
+        "idioma": idioma,
+        "simple": simple,
+        "cat_label": "U19" if str(categoria).lower() == "juvenil" else "U15",
+    }
+
+# Pestañas (antropometría y CMJ) que solo descartan los registros con todas sus métricas
+# a 0: los registros sin ningún dato (todo NaN) se conservan, como en PlayerHub
+SECCIONES_CON_NULOS = (0, 1)
+
+def seccion(df_joined, test_cat, lista_columnas, posicion):
+    """
+    Registros de un test con algún dato: sin filas en las que todas sus métricas sean 0
+    o nulas (solo 0 en las pestañas de `SECCIONES_CON_NULOS`).
+
+    Returns:
+        tuple: (DataFrame con FECHA REGISTRO y las métricas del test, columnas de métricas).
+            Vacío si la hoja TEST no define ese test.
+    """
+    nombre_test = lista_columnas[posicion] if posicion < len(lista_columnas) else None
+    columnas = [col for col in test_cat.get(nombre_test, []) if col in df_joined.columns]
+    df = df_joined[[constants.FECHA_REGISTRO_LABEL] + columnas].reset_index(drop=True)
+    if not columnas:
+        return df.iloc[0:0], columnas
+    metricas = df[columnas] if posicion in SECCIONES_CON_NULOS else df[columnas].fillna(0)
+    return df.loc[~(metricas == 0).all(axis=1)], columnas
+
+def zona_optima_grasa(categoria, genero):
+    """
+    Rango saludable de % de grasa según categoría y género.
+
+    Returns:
+        tuple: (mínimo, máximo)
+    """
+    if categoria == "Juvenil":
+        return (8, 14) if genero == "H" else (9, 14) if genero == "M" else (8, 16)
+    if categoria == "Cadete" and genero == "M":
+        return 8, 14
+    return 8, 16
+
+def observacion_antropometria(df, columnas, ctx):
+    """
+    Observación sobre el % de grasa del último registro.
+    """
+    grasa = df[columnas[2]].iloc[0]
+    return traslator.traducir(util.get_observacion_grasa(grasa, ctx["categoria"].lower(), ctx["genero"]), ctx["idioma"])
+
+def antropometria(df, columnas, ctx):
+    """
+    Gráficos de altura y de peso y grasa.
+
+    Returns:
+        dict: {gráfico: figura}
+    """
+    categoria, genero, idioma, simple = ctx["categoria"], ctx["genero"], ctx["idioma"], ctx["simple"]
+    zona_optima_min, zona_optima_max = zona_optima_grasa(categoria, genero)
+    return {
+        "Altura": graphics.get_height_graph(df, idioma, simple),
+        "Peso y Grasa": graphics.get_anthropometrics_graph(df, categoria, zona_optima_min, zona_optima_max,
+                                                           idioma, simple, genero, ctx["cat_label"]),
+    }
+
+def observacion_cmj(df, columnas, ctx):
+    """
+    Observación sobre el último salto.
+    """
+    valor = float(df[columnas[0]].iloc[0])
+    return traslator.traducir(util.get_observacion_cmj(valor, ctx["categoria"], ctx["genero"]), ctx["idioma"])
+
+def cmj(df, columnas, ctx):
+    """
+    Gráfico de CMJ frente al promedio de su categoría.
+
+    Returns:
+        dict: {gráfico: figura}
+    """
+    categoria, genero = ctx["categoria"], ctx["genero"]
+    promedios = util.obtener_promedios_metricas_genero(df_promedios=ctx["df_promedios"], categoria=categoria,
+                                                       equipo=ctx["equipo"], metricas=[columnas[0].upper()],
+                                                       genero=genero, tipo="CMJ")
+    return {
+        "CMJ": cmjg.get_cmj_graph(df, promedios, categoria, constants.EQUIPO_PROMEDIO, [columnas[0]],
+                                  constants.FECHA_REGISTRO_LABEL, ctx["idioma"], ctx["simple"], genero, ctx["cat_label"]),
+    }
+
+def observacion_sprint(df, columnas, ctx):
+    """
+    Observación sobre el último tiempo 0-40.
+    """
+    valor = df[columnas[2]].iloc[0]
+    return traslator.traducir(
+        util.get_observacion_sprint(valor_sprint=valor, categoria=ctx["categoria"], genero=ctx["genero"]), ctx["idioma"])
+
+def sprint(df, columnas, ctx):
+    """
+    Gráficos de sprint 0-5 y 0-40, solo los que tienen datos en el último registro.
+
+    Returns:
+        dict: {gráfico: figura}
+    """
+    categoria, genero = ctx["categoria"], ctx["genero"]
+    ultima = df[columnas].iloc[0]
+    promedios = util.obtener_promedios_metricas_genero(df_promedios=ctx["df_promedios"], categoria=categoria.capitalize(),
+                                                       equipo=ctx["equipo"], metricas=[columnas[2].upper()],
+                                                       genero=genero, tipo="Sprint 0-40m")
+    figs = {}
+    for nombre, tiempo, velocidad in (("SPRINT 0-5", 0, 1), ("SPRINT 0-40", 2, 3)):
+        if ultima.iloc[tiempo] != 0 or ultima.iloc[velocidad] != 0:
+            figs[nombre] = sprintg.get_sprint_graph(df, promedios, categoria, constants.EQUIPO_PROMEDIO,
+                                                    columnas[tiempo], columnas[velocidad], constants.FECHA_REGISTRO_LABEL,
+                                                    ctx["idioma"], ctx["simple"], ctx["cat_label"], genero)
+    return figs
+
+def yoyo(df, columnas, ctx):
+    """
+    Gráfico del Yo-Yo test.
+
+    Returns:
+        dict: {gráfico: figura}
+    """
+    return {
+        "YO-YO": yoyog.get_yoyo_graph(df, ctx["df_promedios"], ctx["categoria"], constants.EQUIPO_PROMEDIO, columnas[1],
+                                      constants.FECHA_REGISTRO_LABEL, ctx["idioma"], ctx["simple"], ctx["cat_label"]),
+    }
+
+def agilidad_ambas_piernas(df, columnas):
+    # La agilidad solo se compara con registros de ambas piernas
+    return df[~(df[columnas] == 0).any(axis=1)]
+
+def observacion_agilidad(df, columnas, ctx):
+    """
+    Observación sobre la asimetría entre piernas del último registro, o None si no hay
+    asimetría que evaluar.
+    """
+    diferencias = agilidadg.get_diferencia_agilidad(df, columnas, constants.FECHA_REGISTRO_LABEL)
+    if not diferencias:
+        return None
+    return traslator.traducir(
+        util.get_observacion_agilidad(valor_asimetria=diferencias[-1]["diferencia_%"], genero=ctx["genero"],
+                                      categoria=ctx["categoria"]), ctx["idioma"])
+
+def agilidad(df, columnas, ctx):
+    """
+    Gráfico de agilidad 505 (registros con ambas piernas, ver `agilidad_ambas_piernas`).
+
+    Returns:
+        dict: {gráfico: figura}
+    """
+    return {
+        "AGILIDAD": agilidadg.get_agility_graph_combined_simple(df, ctx["df_promedios"], ctx["categoria"], ctx["equipo"],
+                                                                columnas, constants.FECHA_REGISTRO_LABEL, ctx["idioma"],
+                                                                ctx["simple"], ctx["cat_label"], ctx["genero"]),
+    }
+
+def rsa_tiempo(df, columnas, ctx):
+    """
+    Gráfico de tiempos del RSA.
+    """
+    return rsag.get_rsa_graph(df, ctx["df_promedios"], ctx["categoria"], constants.EQUIPO_PROMEDIO, columnas,
+                              constants.FECHA_REGISTRO_LABEL, ctx["idioma"], ctx["simple"], ctx["cat_label"])
+
+def rsa_velocidad(df, columnas, ctx):
+    """
+    Gráfico de velocidad del RSA.
+    """
+    return rsag.get_rsa_velocity_graph(df, ctx["df_promedios"], ctx["categoria"], constants.EQUIPO_PROMEDIO, columnas[1],
+                                       constants.FECHA_REGISTRO_LABEL, ctx["idioma"], ctx["simple"], ctx["cat_label"])
+
+def figuras_jugador(df_joined, test_cat, lista_columnas, ctx):
+    """
+    Todos los gráficos y observaciones del reporte de un jugador, sin interfaz
+    (los mismos que PlayerHub va mostrando en cada pestaña).
+
+    Args:
+        df_joined (pd.DataFrame): Registros de tests del jugador.
+        test_cat (dict): {test: columnas de métricas}.
+        lista_columnas (list): Tests en el orden de las pestañas de PlayerHub.
+        ctx (dict): Resultado de `contexto`.
+
+    Returns:
+        tuple: ({test: DataFrame}, {gráfico: figura}, {sección: observación})
+    """
+    figs, observaciones = {}, {}
+    frames = {nombre: None for nombre in ["antropometria", "cmj", "sprint", "yoyo", "agilidad", "rsa"]}
+
+    df_an, columnas = seccion(df_joined, test_cat, lista_columnas, 0)
+    if not util.columnas_sin_datos_utiles(df_an, [constants.FECHA_REGISTRO_LABEL]):
+        frames["antropometria"] = df_an
+        observaciones[OBSERVACIONES["antropometria"]] = observacion_antropometria(df_an, columnas, ctx)
+        figs.update(antropometria(df_an, columnas, ctx))
+
+    df_cmj, columnas = seccion(df_joined, test_cat, lista_columnas, 1)
+    if not df_cmj.empty:
+        frames["cmj"] = df_cmj
+        observaciones[OBSERVACIONES["cmj"]] = observacion_cmj(df_cmj, columnas, ctx)
+        figs.update(cmj(df_cmj, columnas, ctx))
+
+    df_sprint, columnas = seccion(df_joined, test_cat, lista_columnas, 2)
+    if not df_sprint.empty:
+        frames["sprint"] = df_sprint
+        observaciones[OBSERVACIONES["sprint"]] = observacion_sprint(df_sprint, columnas, ctx)
+        figs.update(sprint(df_sprint, columnas, ctx))
+
+    df_yoyo, columnas = seccion(df_joined, test_cat, lista_columnas, 3)
+    if not df_yoyo.empty:
+        frames["yoyo"] = df_yoyo
+        figs.update(yoyo(df_yoyo, columnas, ctx))
+
+    df_ag, columnas = seccion(df_joined, test_cat, lista_columnas, 4)
+    df_ag = agilidad_ambas_piernas(df_ag, columnas)
+    if not df_ag.empty and not df_ag[columnas[0]].dropna().empty:
+        frames["agilidad"] = df_ag
+        observacion = observacion_agilidad(df_ag, columnas, ctx)
+        if observacion is not None:
+            observaciones[OBSERVACIONES["agilidad"]] = observacion
+        figs.update(agilidad(df_ag, columnas, ctx))
+
+    df_rsa, columnas = seccion(df_joined, test_cat, lista_columnas, 5)
+    if not df_rsa.empty:
+        frames["rsa"] = df_rsa
+        figs["RSA Tiempo"] = rsa_tiempo(df_rsa, columnas, ctx)
+        figs["RSA Velocidad"] = rsa_velocidad(df_rsa, columnas, ctx)
+
+    incluidos = GRAFICOS_SIMPLE if ctx["simple"] else GRAFICOS_AVANZADO
+    figs = {nombre: fig for nombre, fig in figs.items() if nombre in incluidos and fig is not None}
+    return frames, figs, observaciones
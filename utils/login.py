@@ -1,5 +1,6 @@
 import streamlit as st
 from utils import connector_sgs
+from utils import connector_gs
 from utils.data_util import get_usuarios
 
 # Validación simple de usuario y clave con un archivo csv
@@ -44,6 +45,7 @@ def generarMenu(usuario, conn):
         st.page_link("inicio.py", label="Inicio", icon=":material/home:")
         st.subheader("Tableros :material/dashboard:")
         st.page_link("pages/playerhub.py", label="PlayerHub", icon=":material/contacts:")
+        st.page_link("pages/reports.py", label="Reportes", icon=":material/picture_as_pdf:")
         #st.page_link('pages/teams.py', label="StatsLab", icon=":material/query_stats:")
         st.subheader("Administrador :material/manage_accounts:")
         st.page_link("pages/players.py", label="Jugadores", icon=":material/account_circle:")  
@@ -53,8 +55,10 @@ def generarMenu(usuario, conn):
         #st.subheader("Ajustes")
         btnReload=st.button("Recargar Datos", type="tertiary", icon=":material/update:")
         if btnReload:
-            st.session_state["reload_data"] = True  # Activar recarga manual
-            st.rerun()
+            # Se siguen sirviendo los snapshots: las hojas se releen en segundo plano y
+            # las cachés se limpian cuando termina la relectura
+            if connector_gs.recargar_en_segundo_plano(al_terminar=st.cache_data.clear):
+                st.toast("Recargando datos en segundo plano", icon=":material/update:")
 
         # Botón para cerrar la sesión
         btnSalir=st.button("Salir", type="tertiary", icon=":material/logout:")
@@ -0,0 +1,366 @@
+import numpy as np
+import pandas as pd
+
+from utils import constants
+
+# Columnas de identificación que se guardan como códigos enteros
+CLAVES_MATRIZ = [
+    constants.ID_LABEL,
+    constants.JUGADOR_LABEL,
+    constants.CATEGORIA_LABEL,
+    constants.EQUIPO_LABEL,
+    "GENERO",
+]
+
+def _a_float32(serie):
+    # Mismo criterio que `util.limpiar_columnas_numericas` para columnas de texto
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = pd.to_numeric(serie.astype(str).str.replace(r"[,-]", ".", regex=True), errors="coerce")
+    return serie.to_numpy(dtype=np.float32, na_value=np.nan)
+
+def _factorizar(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Categórica (ver `data_util.optimizar_tipos`): sus códigos ya sirven, sin volver a factorizar
+        serie = serie.cat.remove_unused_categories()
+        return serie.cat.codes.to_numpy(dtype=np.int32), pd.Index(np.asarray(serie.cat.categories, dtype=object))
+    try:
+        codigos, etiquetas = pd.factorize(serie, sort=True)
+    except TypeError:
+        # Tipos mezclados no ordenables: se ordena por su texto
+        codigos, etiquetas = pd.factorize(serie.astype(str), sort=True)
+    return codigos.astype(np.int32), pd.Index(etiquetas)
+
+def construir_matriz(df, test_cat, metricas=None):
+    """
+    Construye la representación columnar de los tests: una matriz float32 de
+    sesiones x métricas, códigos int32 para jugador/categoría/equipo/género/ID y
+    un vector de fechas datetime64.
+
+    Se construye además de los DataFrames (no los sustituye): solo sirve para los
+    cálculos agregados de este módulo (promedios, sesiones y percentiles).
+
+    Args:
+        df (pd.DataFrame): Sesiones de tests (una fila por jugador y fecha).
+        test_cat (dict): {test: [métricas]} (ver `util.construir_diccionario_test_categorias`).
+        metricas (list, optional): Métricas a incluir. Por defecto, las de `test_cat` presentes en `df`.
+
+    Returns:
+        dict: {
+            "valores": np.ndarray float32 (sesiones x métricas), NaN = sin dato,
+            "metricas": nombres de las columnas de "valores",
+            "columnas": {métrica: índice de columna},
+            "tests": {test: índices de columna de sus métricas},
+            "codigos": {clave: np.ndarray int32} (-1 = vacío),
+            "etiquetas": {clave: pd.Index} (valor de cada código),
+            "fechas": np.ndarray datetime64 (NaT = fecha inválida),
+        }
+    """
+    if metricas is None:
+        metricas = [col for cols in test_cat.values() for col in cols]
+    metricas = [col for col in dict.fromkeys(metricas) if col in df.columns]
+
+    valores = np.empty((len(df), len(metricas)), dtype=np.float32)
+    for j, col in enumerate(metricas):
+        valores[:, j] = _a_float32(df[col])
+
+    columnas = {col: j for j, col in enumerate(metricas)}
+
+    codigos, etiquetas = {}, {}
+    for clave in CLAVES_MATRIZ:
+        if clave in df.columns:
+            codigos[clave], etiquetas[clave] = _factorizar(df[clave])
+
+    if constants.FECHA_REGISTRO_LABEL in df.columns:
+        fechas = df[constants.FECHA_REGISTRO_LABEL]
+        if not pd.api.types.is_datetime64_any_dtype(fechas):
+            fechas = pd.to_datetime(fechas, format="%d/%m/%Y", errors="coerce")
+        fechas = fechas.to_numpy()
+    else:
+        fechas = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ns]")
+
+    return {
+        "valores": valores,
+        "metricas": metricas,
+        "columnas": columnas,
+        "tests": {
+            test: np.array([columnas[col] for col in cols if col in columnas], dtype=np.intp)
+            for test, cols in test_cat.items()
+        },
+        "codigos": codigos,
+        "etiquetas": etiquetas,
+        "fechas": fechas,
+    }
+
+def _grupos(matriz, claves, filas=None):
+    """
+    Agrupa las sesiones por combinación de códigos.
+
+    Returns:
+        tuple: (filas válidas, códigos de cada grupo (grupos x claves), grupo de cada fila válida)
+    """
+    codigos = [matriz["codigos"][clave] for clave in claves]
+    tamanos = [max(len(matriz["etiquetas"][clave]), 1) for clave in claves]
+
+    validas = np.logical_and.reduce([c >= 0 for c in codigos])
+    if filas is not None:
+        validas &= filas
+
+    # Un único entero por combinación (orden = orden de las claves)
+    clave_grupo = np.ravel_multi_index([c[validas] for c in codigos], tamanos)
+    unicos, grupo = np.unique(clave_grupo, return_inverse=True)
+    combinaciones = np.column_stack(np.unravel_index(unicos, tamanos)) if len(claves) else unicos[:, None]
+    return validas, combinaciones, grupo
+
+def contar_sesiones(matriz):
+    """
+    Versión sobre la matriz de `util.sesiones_por_test`: sesiones por jugador y categoría
+    con algún valor distinto de 0 en cada test, y fecha de la última sesión.
+
+    Returns:
+        pd.DataFrame: Mismo formato y orden que `util.sesiones_por_test`.
+    """
+    claves = [constants.JUGADOR_LABEL, constants.CATEGORIA_LABEL]
+    if any(clave not in matriz["codigos"] for clave in claves):
+        return pd.DataFrame()
+
+    con_fecha = ~np.isnat(matriz["fechas"])
+    validas, combinaciones, grupo = _grupos(matriz, claves, con_fecha)
+    n_grupos = len(combinaciones)
+
+    # Última sesión por grupo: ordenar por (grupo, fecha) y tomar el último de cada grupo
+    fechas = matriz["fechas"][validas].astype("datetime64[ns]").view(np.int64)
+    orden = np.lexsort((fechas, grupo))
+    ultima = fechas[orden][np.r_[np.flatnonzero(np.diff(grupo[orden])), len(orden) - 1]] if len(orden) else fechas[:0]
+
+    sesiones_df = pd.DataFrame({
+        constants.JUGADOR_LABEL: matriz["etiquetas"][constants.JUGADOR_LABEL][combinaciones[:, 0]],
+        constants.CATEGORIA_LABEL: matriz["etiquetas"][constants.CATEGORIA_LABEL][combinaciones[:, 1]],
+        "ÚLTIMA SESIÓN": pd.to_datetime(ultima),
+    })
+
+    valores = matriz["valores"][validas]
+    for test, columnas in matriz["tests"].items():
+        if len(columnas):
+            # NaN != 0: igual que en `util.sesiones_por_test`, una celda vacía cuenta
+            con_datos = (valores[:, columnas] != 0).any(axis=1)
+            sesiones_df[test] = np.bincount(grupo, weights=con_datos, minlength=n_grupos).astype(np.int64)
+        else:
+            sesiones_df[test] = np.zeros(n_grupos, dtype=np.int64)
+
+    sesiones_df = sesiones_df.sort_values(by="ÚLTIMA SESIÓN", ascending=False).reset_index(drop=True)
+    sesiones_df["ÚLTIMA SESIÓN"] = sesiones_df["ÚLTIMA SESIÓN"].dt.strftime('%d/%m/%Y').astype(str)
+
+    return sesiones_df
+
+def promedios_por_grupo(matriz, claves, metricas=None):
+    """
+    Promedio por grupo de cada métrica ignorando 0 y NaN.
+
+    Args:
+        matriz (dict): Resultado de `construir_matriz`.
+        claves (list): Columnas de agrupación (p. ej. GENERO, CATEGORIA, EQUIPO).
+        metricas (list, optional): Métricas a promediar. Por defecto todas.
+
+    Returns:
+        pd.DataFrame: Una fila por grupo (ordenados por clave) con los promedios redondeados a 2 decimales.
+    """
+    metricas = [col for col in (metricas or matriz["metricas"]) if col in matriz["columnas"]]
+    validas, combinaciones, grupo = _grupos(matriz, claves)
+    n_grupos = len(combinaciones)
+
+    resultado = {
+        clave: matriz["etiquetas"][clave][combinaciones[:, i]] for i, clave in enumerate(claves)
+    }
+
+    valores = matriz["valores"][validas]
+    for col in metricas:
+        columna = valores[:, matriz["columnas"][col]].astype(np.float64)
+        con_dato = ~np.isnan(columna) & (columna != 0)
+        suma = np.bincount(grupo, weights=np.where(con_dato, columna, 0.0), minlength=n_grupos)
+        cuenta = np.bincount(grupo, weights=con_dato, minlength=n_grupos)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            resultado[col] = np.where(cuenta > 0, suma / cuenta, np.nan)
+
+    return pd.DataFrame(resultado).round(2)
+
+def percentil_rank(referencia, valores):
+    """
+    `percentileofscore(kind="rank")` vectorizado: percentil de cada valor frente a una
+    referencia ya ordenada y sin NaN, con dos `searchsorted` para todos los valores a la vez.
+
+    Args:
+        referencia (np.ndarray): Valores de referencia ordenados de menor a mayor.
+        valores (array-like): Valores a evaluar.
+
+    Returns:
+        np.ndarray: Percentiles redondeados a 1 decimal (NaN si no hay referencia o valor).
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    if len(referencia) == 0:
+        return np.full(valores.shape, np.nan)
+    izquierda = np.searchsorted(referencia, valores, side="left")
+    derecha = np.searchsorted(referencia, valores, side="right")
+    percentil = np.round((izquierda + derecha + (izquierda < derecha)) * (50.0 / len(referencia)), 1)
+    return np.where(np.isnan(valores), np.nan, percentil)
+
+# Grupos de comparación del motor de percentiles
+CLAVES_PERCENTILES = ["GENERO", constants.CATEGORIA_LABEL]
+
+def referencias_percentiles(matriz, claves=None, metricas=None):
+    """
+    Prepara, una sola vez, las referencias ordenadas de cada (género, categoría, métrica)
+    para responder percentiles con `searchsorted` sin volver a recorrer las sesiones.
+    Como en `promedios_por_grupo`, los 0 y NaN no cuentan como medición.
+
+    Args:
+        matriz (dict): Resultado de `construir_matriz`.
+        claves (list, optional): Columnas que definen el grupo. Por defecto `CLAVES_PERCENTILES`.
+        metricas (list, optional): Métricas a preparar. Por defecto todas.
+
+    Returns:
+        dict: {
+            "claves": columnas del grupo,
+            "metricas": métricas preparadas,
+            "grupos": {(valor de cada clave): {métrica: np.ndarray float64 ordenado}},
+        }
+    """
+    claves = [clave for clave in (claves or CLAVES_PERCENTILES) if clave in matriz["codigos"]]
+    metricas = [col for col in (metricas or matriz["metricas"]) if col in matriz["columnas"]]
+    validas, combinaciones, grupo = _grupos(matriz, claves)
+
+    nombres = [
+        tuple(matriz["etiquetas"][clave][codigo] for clave, codigo in zip(claves, fila))
+        for fila in combinaciones
+    ]
+    grupos = {nombre: {} for nombre in nombres}
+
+    valores = matriz["valores"][validas]
+    for col in metricas:
+        columna = valores[:, matriz["columnas"][col]].astype(np.float64)
+        con_dato = ~np.isnan(columna) & (columna != 0)
+        # Un único ordenado por (grupo, valor) y cortes por grupo
+        orden = np.lexsort((columna[con_dato], grupo[con_dato]))
+        ordenados = columna[con_dato][orden]
+        cortes = np.searchsorted(grupo[con_dato][orden], np.arange(len(nombres) + 1))
+        for g, nombre in enumerate(nombres):
+            grupos[nombre][col] = ordenados[cortes[g]:cortes[g + 1]]
+
+    return {"claves": claves, "metricas": metricas, "grupos": grupos}
+
+def percentiles_lote(referencias, grupo, valores):
+    """
+    Percentiles de uno o varios jugadores del mismo grupo, con una sola llamada
+    vectorizada por métrica.
+
+    Args:
+        referencias (dict): Resultado de `referencias_percentiles`.
+        grupo (tuple): Valor de cada clave del grupo (p. ej. ("H", "Juvenil")).
+        valores (dict | pd.DataFrame): {métrica: valor} de un jugador, o un DataFrame
+            con una fila por jugador y una columna por métrica.
+
+    Returns:
+        dict | pd.DataFrame: Percentiles con la misma forma que `valores` (NaN sin referencia).
+    """
+    por_metrica = referencias["grupos"].get(tuple(grupo), {})
+    vacio = np.array([], dtype=np.float64)
+
+    # Mismo redondeo float32 que las referencias para que los empates se detecten igual
+    if isinstance(valores, pd.DataFrame):
+        return pd.DataFrame({
+            col: percentil_rank(por_metrica.get(col, vacio), valores[col].to_numpy(dtype=np.float32, na_value=np.nan))
+            for col in valores.columns
+        }, index=valores.index)
+
+    return {
+        col: float(percentil_rank(por_metrica.get(col, vacio), np.array([valor], dtype=np.float32))[0])
+        for col, valor in valores.items()
+    }
+
+def tabla_percentiles(matriz, referencias=None):
+    """
+    Percentiles de toda la plantilla: la última medición (distinta de 0) de cada jugador
+    en cada métrica, frente a su grupo de género y categoría (los de su última sesión).
+
+    Args:
+        matriz (dict): Resultado de `construir_matriz`.
+        referencias (dict, optional): Resultado de `referencias_percentiles`. Se prepara si no se indica.
+
+    Returns:
+        dict: {
+            "valores": pd.DataFrame (índice ID) con las claves del grupo y el último valor de cada métrica,
+            "percentiles": pd.DataFrame (índice ID) con las claves del grupo y el percentil de cada métrica,
+            "metricas": métricas de ambas tablas,
+        }
+    """
+    referencias = referencias or referencias_percentiles(matriz)
+    claves, metricas = referencias["claves"], referencias["metricas"]
+    if constants.ID_LABEL not in matriz["codigos"]:
+        return {"valores": pd.DataFrame(), "percentiles": pd.DataFrame(), "metricas": []}
+
+    jugador = matriz["codigos"][constants.ID_LABEL]
+    n_jugadores = len(matriz["etiquetas"][constants.ID_LABEL])
+    fechas = matriz["fechas"].astype("datetime64[ns]").view(np.int64)
+
+    # Filas ordenadas por (jugador, fecha): la última de cada jugador es la más reciente
+    orden = np.lexsort((fechas, jugador))
+    orden = orden[jugador[orden] >= 0]
+
+    def _ultima_fila(filas):
+        # `filas` sigue el orden de `orden` (agrupado por jugador): la última de cada
+        # jugador es la que va justo antes de un cambio de jugador
+        ultima = np.full(n_jugadores, -1, dtype=np.intp)
+        if len(filas):
+            codigos = jugador[filas]
+            fin = np.append(codigos[1:] != codigos[:-1], True)
+            ultima[codigos[fin]] = filas[fin]
+        return ultima
+
+    ultima_sesion = _ultima_fila(orden)
+    con_sesion = np.flatnonzero(ultima_sesion >= 0)
+
+    valores = pd.DataFrame(
+        {clave: matriz["etiquetas"][clave][matriz["codigos"][clave][ultima_sesion[con_sesion]]] for clave in claves},
+        index=pd.Index(matriz["etiquetas"][constants.ID_LABEL][con_sesion], name=constants.ID_LABEL),
+    )
+    for clave in claves:
+        # -1 (vacío) indexa la última etiqueta: se deja en NaN
+        valores.loc[matriz["codigos"][clave][ultima_sesion[con_sesion]] < 0, clave] = np.nan
+
+    for col in metricas:
+        columna = matriz["valores"][:, matriz["columnas"][col]]
+        filas = orden[~np.isnan(columna[orden]) & (columna[orden] != 0)]
+        ultima = _ultima_fila(filas)[con_sesion]
+        valores[col] = np.where(ultima >= 0, columna[ultima], np.nan).astype(np.float64)
+
+    percentiles = valores[claves].copy()
+    for col in metricas:
+        percentiles[col] = np.nan
+    for grupo, filas in valores.groupby(claves, observed=True, sort=False).groups.items():
+        grupo = grupo if isinstance(grupo, tuple) else (grupo,)
+        percentiles.loc[filas, metricas] = percentiles_lote(referencias, grupo, valores.loc[filas, metricas])
+
+    return {"valores": valores, "percentiles": percentiles, "metricas": metricas}
+
+def percentiles_jugador(tabla, id_jugador, metricas=None):
+    """
+    Lee de `tabla_percentiles` los valores y percentiles de un jugador, listos para
+    `graphics.mostrar_percentiles_coloreados` (pestaña de percentiles de PlayerHub).
+
+    Args:
+        tabla (dict): Resultado de `tabla_percentiles`.
+        id_jugador: ID del jugador.
+        metricas (list, optional): Métricas a devolver (en ese orden). Por defecto todas.
+
+    Returns:
+        tuple: ({métrica: valor}, {métrica: percentil}); vacíos si el jugador no tiene sesiones.
+    """
+    valores, percentiles = tabla["valores"], tabla["percentiles"]
+    if id_jugador not in percentiles.index:
+        return {}, {}
+    metricas = [col for col in (metricas or tabla["metricas"]) if col in tabla["metricas"]]
+    fila_valores = valores.loc[id_jugador, metricas]
+    fila_percentiles = percentiles.loc[id_jugador, metricas]
+    return (
+        {col: round(float(v), 2) for col, v in fila_valores.items() if pd.notna(v)},
+        {col: float(p) for col, p in fila_percentiles.items() if pd.notna(fila_valores[col])},
+    )
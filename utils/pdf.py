@@ -1,27 +1,372 @@
 from fpdf import FPDF
-import requests
-import tempfile
+from fpdf.image_parsing import get_img_info
+from fpdf.fonts import TTFFont, SubsetMap
+from fpdf.svg import SVGObject
+from fpdf.drawing import Transform
+from fontTools import ttLib
+import re
+import copy
+import math
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
 from utils import util
 from PIL import Image
 from io import BytesIO
-import tempfile
-import plotly.io as pio
 from utils import traslator
+from utils import render
+from utils import fotos
+from utils import constants
+
+_lock_assets = threading.Lock()
+_assets = {}  # ruta -> (bytes, md5, imagen decodificada por fpdf)
+_lock_fuentes = threading.Lock()
+_fuentes = {}  # (ruta, estilo) -> (fuente analizada, bytes del archivo)
+_lock_fragmentos = threading.Lock()
+_fragmentos = OrderedDict()  # (tipo, md5) -> gráfico o foto listo para insertar (LRU)
+
+def _asset(ruta, generar=None):
+    """
+    Lee y decodifica una imagen del proyecto (logo, siluetas, campos...) una sola vez
+    por proceso; los PDF siguientes reutilizan el resultado.
+
+    Args:
+        ruta (str): Ruta de la imagen, o clave de una imagen generada.
+        generar (callable, optional): Devuelve los bytes de la imagen si no es un archivo.
+
+    Returns:
+        tuple: (bytes, md5 con el que fpdf identifica la imagen, info decodificada)
+    """
+    with _lock_assets:
+        if ruta not in _assets:
+            if generar is not None:
+                contenido = generar()
+            else:
+                with open(ruta, "rb") as f:
+                    contenido = f.read()
+            _assets[ruta] = _decodificar(contenido)
+        return _assets[ruta]
+
+def _decodificar(contenido):
+    # Mismo identificador que calcula `FPDF.image` para imágenes en memoria
+    md5 = hashlib.md5(contenido.strip(), usedforsecurity=False).hexdigest()
+    return contenido, md5, get_img_info(md5, BytesIO(contenido), "AUTO")
+
+def _fragmento(tipo, contenido, preparar):
+    """
+    Resultado de `preparar(contenido)` para un gráfico o foto, calculado una vez por
+    contenido: al regenerar un informe (otro idioma, otros gráficos) las secciones que
+    no cambian no se vuelven a decodificar.
+
+    Args:
+        tipo (str): Tipo de fragmento ("png", "svg"...), parte de la clave.
+        contenido (bytes): Imagen; su md5 identifica el fragmento.
+        preparar (callable): Convierte el contenido en el fragmento.
+    """
+    clave = (tipo, hashlib.md5(contenido, usedforsecurity=False).hexdigest())
+    with _lock_fragmentos:
+        if clave in _fragmentos:
+            _fragmentos.move_to_end(clave)
+            return _fragmentos[clave]
+
+    fragmento = preparar(contenido)  # fuera del lock: decodificar un gráfico lleva su tiempo
+    with _lock_fragmentos:
+        _fragmentos[clave] = fragmento
+        while len(_fragmentos) > constants.PDF_CACHE_FRAGMENTOS:
+            _fragmentos.popitem(last=False)
+    return fragmento
+
+def _fuente(pdf, ruta, fontkey, estilo):
+    """
+    Fuente TTF para un documento. El análisis de métricas y glifos (lo costoso) se hace
+    una vez por proceso; cada documento recibe su propia copia con el archivo recién
+    abierto, porque fpdf recorta la fuente en su lugar al generar el PDF.
+    """
+    with _lock_fuentes:
+        if (ruta, estilo) not in _fuentes:
+            with open(ruta, "rb") as f:
+                contenido = f.read()
+            _fuentes[(ruta, estilo)] = (TTFFont(pdf, ruta, fontkey, estilo), contenido)
+        plantilla, contenido = _fuentes[(ruta, estilo)]
+
+    fuente = copy.copy(plantilla)
+    fuente.i = len(pdf.fonts) + 1
+    fuente.fontkey = fontkey
+    fuente.ttfont = ttLib.TTFont(BytesIO(contenido), recalcTimestamp=False, fontNumber=0, lazy=True)
+    fuente.missing_glyphs = []
+    fuente.subset = SubsetMap(fuente)
+    return fuente
+
+def _png_degradado(invertido, steps):
+    # Escala roja-verde de `draw_gradient_scale`: un bloque de 10 px por paso
+    imagen = Image.new("RGB", (steps * 10, 1))
+    for i in range(steps):
+        t = i / (steps - 1)
+        if invertido:
+            t = 1 - t
+        color = (int(255 * (1 - t)), int(255 * t), 0)
+        for px in range(10):
+            imagen.putpixel((i * 10 + px, 0), color)
+    salida = BytesIO()
+    imagen.save(salida, format="PNG")
+    return salida.getvalue()
+
+_SVG_NS = "http://www.w3.org/2000/svg"
+ET.register_namespace("", _SVG_NS)
+ET.register_namespace("xlink", "http://www.w3.org/1999/xlink")
+
+def _componer(m, n):
+    # Producto de dos matrices afines de SVG (a, b, c, d, e, f)
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (a * a2 + c * b2, b * a2 + d * b2, a * c2 + c * d2, b * c2 + d * d2,
+            a * e2 + c * f2 + e, b * e2 + d * f2 + f)
+
+def _matriz(transform):
+    # Matriz del atributo `transform` (translate, scale, rotate y matrix, que es lo que usa Plotly)
+    m = (1, 0, 0, 1, 0, 0)
+    for op, args in re.findall(r"(\w+)\s*\(([^)]*)\)", transform or ""):
+        v = [float(n) for n in re.split(r"[\s,]+", args.strip()) if n]
+        if op == "translate" and v:
+            t = (1, 0, 0, 1, v[0], v[1] if len(v) > 1 else 0)
+        elif op == "scale" and v:
+            t = (v[0], 0, 0, v[1] if len(v) > 1 else v[0], 0, 0)
+        elif op == "rotate" and v:
+            ang = math.radians(v[0])
+            t = (math.cos(ang), math.sin(ang), -math.sin(ang), math.cos(ang), 0, 0)
+            if len(v) == 3:
+                t = _componer(_componer((1, 0, 0, 1, v[1], v[2]), t), (1, 0, 0, 1, -v[1], -v[2]))
+        elif op == "matrix" and len(v) == 6:
+            t = tuple(v)
+        else:
+            continue
+        m = _componer(m, t)
+    return m
+
+def _estilo(nodo):
+    # Propiedades de presentación del nodo (atributos y `style`, que tiene prioridad)
+    estilo = {k: nodo.get(k) for k in ("font-size", "font-weight", "fill", "text-anchor", "opacity", "display")
+              if nodo.get(k) is not None}
+    for declaracion in (nodo.get("style") or "").split(";"):
+        if ":" in declaracion:
+            clave, valor = declaracion.split(":", 1)
+            estilo[clave.strip()] = valor.strip()
+    return estilo
+
+def _color(valor):
+    if not valor or valor == "none":
+        return (0, 0, 0)
+    match = re.match(r"rgba?\(([^)]*)\)", valor)
+    if match:
+        return tuple(int(float(n)) for n in match.group(1).split(",")[:3])
+    if valor.startswith("#") and len(valor) in (4, 7):
+        valor = valor[1:] if len(valor) == 7 else "".join(c * 2 for c in valor[1:])
+        return tuple(int(valor[i:i + 2], 16) for i in (0, 2, 4))
+    return (0, 0, 0)
+
+def _px(valor, por_defecto=12.0):
+    try:
+        return float(re.sub(r"[a-z]+$", "", str(valor).strip()))
+    except ValueError:
+        return por_defecto
+
+def _tramos(nodo, negrita):
+    # Texto de un nodo en tramos (texto, negrita): Plotly marca <b> como <tspan style="font-weight:bold">
+    tramos = [(nodo.text, negrita)] if nodo.text else []
+    for hijo in nodo:
+        if hijo.tag == f"{{{_SVG_NS}}}tspan":
+            tramos += _tramos(hijo, negrita or "bold" in _estilo(hijo).get("font-weight", ""))
+        if hijo.tail:
+            tramos.append((hijo.tail, negrita))
+    return tramos
+
+def _lineas_texto(nodo, m, estilo):
+    # Un <text> de Plotly: una línea, o varias como <tspan class="line" dy="1.3em">
+    if estilo.get("display") == "none" or _px(estilo.get("opacity", 1), 1) == 0:
+        return []
+    tamaño = _px(estilo.get("font-size", "12px"))
+    negrita = "bold" in estilo.get("font-weight", "")
+    base = {"tamaño": tamaño, "color": _color(estilo.get("fill")),
+            "ancla": estilo.get("text-anchor", "start"), "matriz": m}
+
+    x, y = _px(nodo.get("x", 0), 0), _px(nodo.get("y", 0), 0)
+    lineas = [t for t in nodo if t.tag == f"{{{_SVG_NS}}}tspan" and "line" in (t.get("class") or "")]
+    if not lineas:
+        lineas = [nodo]
+    resultado = []
+    for linea in lineas:
+        if linea is not nodo:
+            dy = linea.get("dy", "0")
+            y += _px(dy, 0) * (tamaño if dy.endswith("em") else 1)
+            x = _px(linea.get("x", x), x)
+        tramos = [(texto, n) for texto, n in _tramos(linea, negrita) if texto.strip()]
+        if tramos:
+            resultado.append(dict(base, x=x, y=y, tramos=tramos))
+    return resultado
+
+def _normalizar_trazos(nodo):
+    # fpdf solo entiende números en `stroke-dasharray`; Plotly escribe "9px, 9px" (líneas discontinuas)
+    if nodo.get("stroke-dasharray"):
+        nodo.set("stroke-dasharray", nodo.get("stroke-dasharray").replace("px", ""))
+    if "stroke-dasharray" in (nodo.get("style") or ""):
+        nodo.set("style", re.sub(r"(stroke-dasharray:[^;]*)", lambda m: m.group(1).replace("px", ""), nodo.get("style")))
+
+def _degradados(raiz):
+    # <linearGradient id> -> ((x1, y1, x2, y2), [(offset, color)]) en fracciones del rectángulo
+    resultado = {}
+    for degradado in raiz.iter(f"{{{_SVG_NS}}}linearGradient"):
+        paradas = []
+        for parada in degradado.findall(f"{{{_SVG_NS}}}stop"):
+            offset = parada.get("offset", "0")
+            paradas.append((_px(offset.rstrip("%"), 0) / (100 if offset.endswith("%") else 1),
+                            _color(parada.get("stop-color") or _estilo(parada).get("stop-color"))))
+        if paradas:
+            coords = tuple(_px(degradado.get(k, d), 0) for k, d in (("x1", 0), ("y1", 0), ("x2", 1), ("y2", 0)))
+            resultado[degradado.get("id")] = (coords, sorted(paradas))
+    return resultado
+
+def _color_en(paradas, t):
+    if t <= paradas[0][0]:
+        return paradas[0][1]
+    for (o1, c1), (o2, c2) in zip(paradas, paradas[1:]):
+        if t <= o2:
+            f = (t - o1) / (o2 - o1) if o2 > o1 else 1
+            return tuple(round(a + (b - a) * f) for a, b in zip(c1, c2))
+    return paradas[-1][1]
+
+def _rect_degradado(rect, degradado, franjas=64):
+    # fpdf no soporta degradados: la barra de color (colorbar) se aproxima con franjas de color sólido
+    (x1, y1, x2, y2), paradas = degradado
+    x, y = _px(rect.get("x", 0), 0), _px(rect.get("y", 0), 0)
+    ancho, alto = _px(rect.get("width", 0), 0), _px(rect.get("height", 0), 0)
+    vertical = x1 == x2 and y1 != y2
+    horizontal = y1 == y2 and x1 != x2
+    if not (vertical or horizontal):
+        franjas = 1
+
+    grupo = ET.Element(f"{{{_SVG_NS}}}g")
+    if rect.get("transform"):
+        grupo.set("transform", rect.get("transform"))
+    for i in range(franjas):
+        centro = (i + 0.5) / franjas
+        solape = 0 if i == franjas - 1 else 0.5  # evita líneas finas entre franjas al rasterizar
+        if vertical:
+            t = (centro - y1) / (y2 - y1)
+            caja = (x, y + alto * i / franjas, ancho, alto / franjas + solape)
+        elif horizontal:
+            t = (centro - x1) / (x2 - x1)
+            caja = (x + ancho * i / franjas, y, ancho / franjas + solape, alto)
+        else:
+            t, caja = 0.5, (x, y, ancho, alto)
+        r, g, b = _color_en(paradas, t)
+        ET.SubElement(grupo, f"{{{_SVG_NS}}}rect", {
+            "x": f"{caja[0]:g}", "y": f"{caja[1]:g}", "width": f"{caja[2]:g}", "height": f"{caja[3]:g}",
+            "style": f"fill: rgb({r}, {g}, {b}); stroke: none;",
+        })
+    return grupo
+
+def _separar_svg(svg):
+    """
+    Separa un SVG de Plotly en las formas (que fpdf dibuja como vectores) y los textos,
+    que fpdf no soporta y se escriben aparte con las fuentes del PDF.
+
+    Returns:
+        tuple: (SVG sin textos, lista de textos, ancho, alto)
+    """
+    raiz = ET.fromstring(svg)
+    ancho, alto = _px(raiz.get("width"), 900), _px(raiz.get("height"), 450)
+    if not raiz.get("viewBox"):
+        raiz.set("viewBox", f"0 0 {ancho:g} {alto:g}")
+
+    # fpdf solo lee los <clipPath> hijos directos de <defs>; Plotly los agrupa en <g class="clips">
+    for defs in raiz.iter(f"{{{_SVG_NS}}}defs"):
+        for grupo in defs.findall(f"{{{_SVG_NS}}}g"):
+            for clip in grupo.findall(f"{{{_SVG_NS}}}clipPath"):
+                grupo.remove(clip)
+                defs.append(clip)
+
+    degradados = _degradados(raiz)
+    for padre in list(raiz.iter()):
+        for hijo in padre.findall(f"{{{_SVG_NS}}}linearGradient"):
+            padre.remove(hijo)  # ya convertidos en franjas
+    recortes = {}
+    for clip in raiz.iter(f"{{{_SVG_NS}}}clipPath"):
+        rect = clip.find(f"{{{_SVG_NS}}}rect")
+        if rect is not None:
+            recortes[clip.get("id")] = tuple(_px(rect.get(k, 0), 0) for k in ("x", "y", "width", "height"))
+
+    def visible(texto, recorte):
+        # Un texto dentro de un grupo recortado solo se escribe si su ancla cae dentro del recorte
+        if recorte is None:
+            return True
+        clip_id, m = recorte
+        x, y, ancho_clip, alto_clip = recortes[clip_id]
+        _, _, _, _, cx, cy = _componer(m, (1, 0, 0, 1, x, y))
+        _, _, _, _, px, py = _componer(texto["matriz"], (1, 0, 0, 1, texto["x"], texto["y"]))
+        return cx - 1 <= px <= cx + ancho_clip + 1 and cy - 1 <= py <= cy + alto_clip + 1
+
+    textos = []
+    def recorrer(nodo, m, estilo, recorte):
+        for hijo in list(nodo):
+            etiqueta = hijo.tag.replace(f"{{{_SVG_NS}}}", "")
+            relleno = re.match(r"url\(['\"]?#([^'\")]+)", _estilo(hijo).get("fill", ""))
+            if relleno:
+                if etiqueta == "rect" and relleno.group(1) in degradados:
+                    nodo.insert(list(nodo).index(hijo), _rect_degradado(hijo, degradados[relleno.group(1)]))
+                nodo.remove(hijo)  # otros rellenos con url() (patrones) no los soporta fpdf
+                continue
+            _normalizar_trazos(hijo)
+            m_hijo = _componer(m, _matriz(hijo.get("transform")))
+            estilo_hijo = {**estilo, **_estilo(hijo)}
+
+            # fpdf solo recorta formas, no grupos: el recorte del grupo (área del gráfico) se
+            # pasa a sus formas mientras estén en el mismo sistema de coordenadas
+            recorte_hijo = recorte
+            clip = re.match(r"url\(['\"]?#([^'\")]+)", hijo.get("clip-path") or "")
+            if clip and clip.group(1) in recortes:
+                recorte_hijo = (clip.group(1), m_hijo)
+            elif recorte and etiqueta in ("path", "rect", "line", "polyline", "polygon", "circle", "ellipse") \
+                    and m_hijo == recorte[1]:
+                hijo.set("clip-path", f"url(#{recorte[0]})")
+
+            if etiqueta == "text":
+                textos.extend(t for t in _lineas_texto(hijo, m_hijo, estilo_hijo) if visible(t, recorte_hijo))
+                nodo.remove(hijo)
+            elif estilo_hijo.get("display") != "none":
+                recorrer(hijo, m_hijo, estilo_hijo, recorte_hijo)
+    recorrer(raiz, (1, 0, 0, 1, 0, 0), {}, None)
+    return ET.tostring(raiz), textos, ancho, alto
+
+def _preparar_svg(svg):
+    # Fragmento de un gráfico SVG: formas ya analizadas por fpdf y textos a escribir
+    formas, textos, ancho, alto = _separar_svg(svg)
+    return {"formas": SVGObject(formas), "textos": textos, "ancho": ancho, "alto": alto,
+            "lock": threading.Lock()}
 
 class PDF(FPDF):
-    def __init__(self, fecha_actual, idioma="es"):
+    def __init__(self, fecha_actual, idioma="es", formato_graficos="png"):
         super().__init__()
         self.idioma = idioma  # Idioma predeterminado para traducciones
         self.fecha_actual = fecha_actual
+        self.formato_graficos = formato_graficos  # "png" (imagen) o "svg" (vectorial)
 
         if(idioma == "ar"):
-            self.add_font("Amiri", "", "assets/fonts/Amiri-0.111/Amiri-Regular.ttf", uni=True)  # Añadir fuente Unicode
-            self.add_font("Amiri", "B", "assets/fonts/Amiri-0.111/Amiri-Bold.ttf", uni=True)
-            self.add_font("Amiri", "I", "assets/fonts/Amiri-0.111/Amiri-Slanted.ttf", uni=True)
+            self.add_font_cacheada("Amiri", "", "assets/fonts/Amiri-0.111/Amiri-Regular.ttf")  # Añadir fuente Unicode
+            self.add_font_cacheada("Amiri", "B", "assets/fonts/Amiri-0.111/Amiri-Bold.ttf")
+            self.add_font_cacheada("Amiri", "I", "assets/fonts/Amiri-0.111/Amiri-Slanted.ttf")
             self.set_font("Amiri", "", 12)
 
-        self.add_font("DejaVu", "", "assets/fonts/dejavu-2.37/DejaVuSans.ttf", uni=True)  # Añadir fuente Unicode
-        self.add_font("DejaVu", "B", "assets/fonts/dejavu-2.37/DejaVuSans-Bold.ttf", uni=True)
+        self.add_font_cacheada("DejaVu", "", "assets/fonts/dejavu-2.37/DejaVuSans.ttf")  # Añadir fuente Unicode
+        self.add_font_cacheada("DejaVu", "B", "assets/fonts/dejavu-2.37/DejaVuSans-Bold.ttf")
+
+    def add_font_cacheada(self, family, style, fname):
+        """
+        Igual que `add_font`, pero reutiliza la fuente ya analizada por otro PDF del mismo proceso.
+        """
+        fontkey = f"{family.lower()}{style}"
+        if fontkey not in self.fonts:
+            self.fonts[fontkey] = _fuente(self, fname, fontkey, style)
         
     def footer(self):
         # Posición a 15 mm del final de la página
@@ -49,7 +394,7 @@ class PDF(FPDF):
         #self.rect(0, 0, 210, 40, 'F')  # Rectángulo superior
 
         # Logo (izquierda)
-        self.image("assets/images/marcet.png", 10, 8, 33)
+        self.image_asset("assets/images/marcet.png", 10, 8, 33)
 
         # Texto cabecera derecha
         self.set_text_color(0, 0, 0)
@@ -104,12 +449,10 @@ class PDF(FPDF):
 
         if foto_path.startswith("https"):
             try:
-                response = requests.get(foto_path)
-                if response.status_code == 200:
-                    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_file:
-                        tmp_file.write(response.content)
-                        self.image(tmp_file.name, x=10, y=48, w=35)
-                        imagen_insertada = True
+                foto = fotos.obtener_foto(foto_path)
+                if foto:
+                    self.image_memoria(foto, x=10, y=48, w=35)
+                    imagen_insertada = True
             except Exception as e:
                 print("Error cargando imagen desde URL:", e)
 
@@ -123,11 +466,11 @@ class PDF(FPDF):
         if not imagen_insertada:
             gender = data["GENERO"]
             if gender == "H":
-                self.image("assets/images/male.png", 8, 55, 40)
+                self.image_asset("assets/images/male.png", 8, 55, 40)
             elif gender == "M":
-                self.image("assets/images/female.png", 8, 55, 40)
+                self.image_asset("assets/images/female.png", 8, 55, 40)
             else:
-                self.image("assets/images/profile.png", 8, 55, 40)
+                self.image_asset("assets/images/profile.png", 8, 55, 40)
             
         # Nombre
         if(idioma == "ar"):
@@ -250,15 +593,37 @@ class PDF(FPDF):
         if codigod:
             img_path = f"assets/images/pitch/campo_{codigod}.png"
             try:
-                self.image(img_path, x=130, y=50, w=70)
+                self.image_asset(img_path, x=130, y=50, w=70)
             except:
                 txt = f"Imagen para {codigod} no encontrada"
                 self.cell(0, 6, txt, ln=True)
 
         self.ln(2)
 
+    def image_asset(self, ruta, *args, generar=None, **kwargs):
+        """
+        Igual que `image`, pero para imágenes del proyecto: se leen y decodifican una
+        sola vez por proceso y se insertan desde memoria.
+        """
+        return self._image_decodificada(*_asset(ruta, generar), *args, **kwargs)
+
+    def image_memoria(self, contenido, *args, **kwargs):
+        """
+        Igual que `image` con bytes (gráficos, fotos), pero decodificando cada imagen una
+        sola vez aunque se inserte en muchos informes.
+        """
+        return self._image_decodificada(*_fragmento("imagen", contenido, _decodificar), *args, **kwargs)
+
+    def _image_decodificada(self, contenido, md5, info, *args, **kwargs):
+        if md5 not in self.image_cache.images and not info.get("iccp"):
+            # Copia por documento: fpdf numera y cuenta los usos de cada imagen
+            copia = type(info)(info)
+            copia.update(i=len(self.image_cache.images) + 1, usages=0, iccp_i=None)
+            self.image_cache.images[md5] = copia
+        return self.image(contenido, *args, **kwargs)
+
     def add_img(self, img_path, x, y, w):
-        self.image(img_path, x, y, w)
+        self.image_asset(img_path, x, y, w)
 
     def section_title(self, title, idioma="es", simple=False):
         
@@ -466,19 +831,9 @@ class PDF(FPDF):
         if y is None:
             y = self.get_y()
 
-        step_width = width / steps
-
-        for i in range(steps):
-            t = i / (steps - 1)  # Normalizado [0, 1]
-            if invertido:
-                t = 1 - t  # Invertir el gradiente
-
-            r = int(255 * (1 - t))  # Rojo decrece (o crece si invertido)
-            g = int(255 * t)        # Verde crece (o decrece si invertido)
-            b = 0                   # Azul fijo en 0
-
-            self.set_fill_color(r, g, b)
-            self.rect(x + i * step_width, y, step_width, height, 'F')
+        # Escala pregenerada una vez por proceso en lugar de `steps` rectángulos por página
+        self.image_asset(f"degradado-{invertido}-{steps}", x, y, width, height,
+                         generar=lambda: _png_degradado(invertido, steps))
 
         self.set_xy(x - 1, y - height - 1.5)
         if(idioma == "ar"):
@@ -486,7 +841,7 @@ class PDF(FPDF):
         else:
             self.set_font("Arial", "B", 10)
         self.set_text_color(0, 51, 102)
-        self.cell(0, 6, util.traducir("Escala de valoración", idioma), ln=True)
+        self.cell(0, 6, traslator.traducir("Escala de valoración", idioma), ln=True)
         self.set_text_color(0, 0, 0)
         self.ln(1)
 
@@ -498,9 +853,9 @@ class PDF(FPDF):
         else:
             self.set_font("Arial", "", 8)
 
-        optimo = util.traducir("Óptimo", idioma)
-        promedio = util.traducir("Promedio", idioma)
-        critico = util.traducir("Crítico", idioma)
+        optimo = traslator.traducir("Óptimo", idioma)
+        promedio = traslator.traducir("Promedio", idioma)
+        critico = traslator.traducir("Crítico", idioma)
 
         if invertido:
             self.cell(30, 5, optimo, 0, 0, 'L')
@@ -553,7 +908,7 @@ class PDF(FPDF):
             self.set_font("Helvetica", "B", 14)
 
         if icon_path:
-            self.image(icon_path, x=self.get_x(), y=self.get_y(), w=6)
+            self.image_asset(icon_path, x=self.get_x(), y=self.get_y(), w=6)
             self.cell(8)
 
         #self.cell(0, 10, "Últimas Mediciones", ln=1)
@@ -604,7 +959,6 @@ class PDF(FPDF):
     def add_plotly_figure(self, fig, title=None, x=None, y=None, w=190, h=100, idioma="es"):
         #import plotly.io as pio
         #import tempfile
-        import os
 
         if title:
             if idioma == "ar":
@@ -613,25 +967,74 @@ class PDF(FPDF):
                 self.set_font("Arial", "B", 12)
             self.cell(0, 10, title, ln=True)
 
-        # Convertir la figura a imagen PNG
-        image_bytes = pio.to_image(fig, format="png", width=900, height=450, scale=2)
+        if self.formato_graficos == "svg":
+            self.add_svg_figure(render.figura_a_svg(fig), x=x, y=y, w=w, h=h)
+            return
 
-        # Crear archivo temporal
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
-            tmpfile.write(image_bytes)
-            tmpfile.flush()
-            tmpfile_path = tmpfile.name
+        # Convertir la figura a imagen PNG (kaleido persistente + caché por contenido)
+        image_bytes = render.figura_a_png(fig)
 
         # Insertar en PDF con posición personalizada si se proporciona
         if x is not None and y is not None:
-            self.image(tmpfile_path, x=x, y=y, w=w, h=h)
+            self.image_memoria(image_bytes, x=x, y=y, w=w, h=h)
         elif x is not None:
-            self.image(tmpfile_path, x=x, w=w, h=h)
+            self.image_memoria(image_bytes, x=x, w=w, h=h)
         else:
-            self.image(tmpfile_path, w=w, h=h)
+            self.image_memoria(image_bytes, w=w, h=h)
 
-        # Eliminar archivo temporal
-        os.remove(tmpfile_path)
+    def add_svg_figure(self, svg, x=None, y=None, w=190, h=100):
+        """
+        Inserta un gráfico SVG de Plotly como vectores: las formas con el soporte SVG de fpdf
+        y los textos (ejes, etiquetas, leyenda) como texto del PDF en su misma posición.
+
+        Args:
+            svg (bytes): SVG exportado con `render.figura_a_svg`.
+            x, y (float, optional): Esquina superior izquierda; por defecto la posición actual.
+            w, h (float): Tamaño en el PDF.
+        """
+        grafico = _fragmento("svg", svg, _preparar_svg)
+
+        # Modo flujo, igual que `image`: salto de página si no cabe y avance de `y`
+        if y is None:
+            self._perform_page_break_if_need_be(h)
+            y = self.y
+            self.y += h
+        if x is None:
+            x = self.x
+
+        # El SVG analizado se comparte entre informes: se dibuja de uno en uno
+        with grafico["lock"]:
+            _, _, path = grafico["formas"].transform_to_rect_viewport(
+                scale=1, width=w, height=h, ignore_svg_top_attrs=True)
+            path.transform = path.transform @ Transform.translation(x, y)
+            x_actual, y_actual = self.x, self.y
+            try:
+                self.set_xy(0, 0)
+                with self.drawing_context() as contexto:
+                    contexto.add_item(path, _copy=False)  # `draw_path` copiaría todo el árbol cada vez
+            finally:
+                self.set_xy(x_actual, y_actual)
+
+        sx, sy = w / grafico["ancho"], h / grafico["alto"]
+        familia = "Amiri" if self.idioma == "ar" else "DejaVu"
+        for t in grafico["textos"]:
+            a, b, _, _, e, f = _componer(t["matriz"], (1, 0, 0, 1, t["x"], t["y"]))
+            px, py = x + e * sx, y + f * sy
+            angulo = -math.degrees(math.atan2(b, a))
+            with self.local_context():
+                self.set_text_color(*t["color"])
+                tamaño = t["tamaño"] * sy * 72 / 25.4
+                tramos = []
+                for texto, negrita in t["tramos"]:
+                    self.set_font(familia, "B" if negrita and familia == "DejaVu" else "", tamaño)
+                    tramos.append((texto, self.font_style, self.get_string_width(texto)))
+                ancho_texto = sum(ancho for _, _, ancho in tramos)
+                cursor = px - {"middle": ancho_texto / 2, "end": ancho_texto}.get(t["ancla"], 0)
+                with self.rotation(angulo, px, py):
+                    for texto, estilo, ancho in tramos:
+                        self.set_font(familia, estilo, tamaño)
+                        self.text(cursor, py, texto)
+                        cursor += ancho
 
     def add_observation_block(self, title="OBSERVACIONES:", text="", x=None, y=None, font_size=8, style="I", w=90):
         """
@@ -3,6 +3,7 @@ import pandas as pd
 from utils import util
 import re
 from utils import traslator
+from utils import fotos
 
 def convert_drive_url(original_url):
     """
@@ -25,7 +26,51 @@ def convert_drive_url(original_url):
     return original_url  # Si no coincide, devuelve lo original
 
 
-def player_block(df_datos_filtrado, df_datos, df_final, unavailable="N/A", idioma="es"):
+def _posiciones_jugadores(df):
+    if not {"ID", "JUGADOR", "CATEGORIA"}.issubset(df.columns):
+        return {"id": {}, "nombre": {}}
+
+    # Claves normalizadas igual que en la búsqueda: texto sin espacios en los extremos
+    ids = df["ID"].astype(str).str.strip()
+    nombres = df["JUGADOR"].astype(str).str.strip()
+    categorias = df["CATEGORIA"].astype(str).str.strip()
+    posiciones = pd.Series(range(len(df)), index=df.index)
+    return {
+        "id": posiciones.groupby(ids.to_numpy()).indices,
+        "nombre": posiciones.groupby([nombres.to_numpy(), categorias.to_numpy()]).indices,
+    }
+
+@st.cache_data(show_spinner=False, max_entries=5)
+def _indice_jugadores(huella, _df_datos, _df_final):
+    return {"datos": _posiciones_jugadores(_df_datos), "final": _posiciones_jugadores(_df_final)}
+
+def indice_jugadores(df_datos, df_final):
+    """
+    Construye (una vez por versión de los datos) el índice de jugadores para `player_block`:
+    ID normalizado y (nombre, categoría) -> posiciones de fila en cada DataFrame.
+
+    Args:
+        df_datos (pd.DataFrame): Datos de jugadores.
+        df_final (pd.DataFrame): Datos de tests unidos.
+
+    Returns:
+        dict: {"datos": {...}, "final": {...}} con los diccionarios "id" y "nombre".
+    """
+    claves = ["ID", "JUGADOR", "CATEGORIA"]
+    huella = util.huella_dataframe(df_datos.reindex(columns=claves)) + util.huella_dataframe(df_final.reindex(columns=claves))
+    return _indice_jugadores(huella, df_datos, df_final)
+
+def _filas(df, posiciones):
+    return df.iloc[posiciones] if posiciones is not None else df.iloc[0:0]
+
+def player_block(df_datos_filtrado, df_datos, df_final, unavailable="N/A", idioma="es", indice=None):
+    """
+    Muestra la ficha del jugador seleccionado y devuelve sus datos.
+
+    Con `indice` (ver `indice_jugadores`, construido sobre `df_datos` y `df_final`)
+    la búsqueda del jugador es un acceso directo por posición en lugar de comparar
+    columnas completas.
+    """
 
     # Obtener ID del jugador seleccionado (único y limpio)
     ids_disponibles = df_datos_filtrado["ID"].dropna().astype(str).str.strip().unique().tolist()
@@ -45,14 +90,19 @@ def player_block(df_datos_filtrado, df_datos, df_final, unavailable="N/A", idiom
         nombre_jugador, categoria_jugador = [x.strip() for x in jugador_cat.split(" - ")]
 
         # Filtrar DataFrames por nombre y categoría
-        df_jugador = df_datos[
-            (df_datos["JUGADOR"].astype(str).str.strip() == nombre_jugador) &
-            (df_datos["CATEGORIA"].astype(str).str.strip() == categoria_jugador)
-        ]
-        df_joined_filtrado = df_final[
-            (df_final["JUGADOR"].astype(str).str.strip() == nombre_jugador) &
-            (df_final["CATEGORIA"].astype(str).str.strip() == categoria_jugador)
-        ]
+        if indice is not None:
+            clave = (nombre_jugador, categoria_jugador)
+            df_jugador = _filas(df_datos, indice["datos"]["nombre"].get(clave))
+            df_joined_filtrado = _filas(df_final, indice["final"]["nombre"].get(clave))
+        else:
+            df_jugador = df_datos[
+                (df_datos["JUGADOR"].astype(str).str.strip() == nombre_jugador) &
+                (df_datos["CATEGORIA"].astype(str).str.strip() == categoria_jugador)
+            ]
+            df_joined_filtrado = df_final[
+                (df_final["JUGADOR"].astype(str).str.strip() == nombre_jugador) &
+                (df_final["CATEGORIA"].astype(str).str.strip() == categoria_jugador)
+            ]
 
         # Manejo de valores nulos/vacíos
         id = unavailable
@@ -61,10 +111,18 @@ def player_block(df_datos_filtrado, df_datos, df_final, unavailable="N/A", idiom
     else:
         jugador_id = ids_disponibles[0]
         # Filtrar los DataFrames por el ID seleccionado
-        df_jugador = df_datos[df_datos["ID"].astype(str).str.strip() == jugador_id]
-        df_joined_filtrado = df_final[df_final["ID"].astype(str).str.strip() == jugador_id]
+        if indice is not None:
+            df_jugador = _filas(df_datos, indice["datos"]["id"].get(jugador_id))
+            df_joined_filtrado = _filas(df_final, indice["final"]["id"].get(jugador_id))
+        else:
+            df_jugador = df_datos[df_datos["ID"].astype(str).str.strip() == jugador_id]
+            df_joined_filtrado = df_final[df_final["ID"].astype(str).str.strip() == jugador_id]
         id = df_jugador['ID'].iloc[0]
 
+    # URL directa de la foto (solo para las filas del jugador)
+    if "FOTO PERFIL" in df_jugador.columns:
+        df_jugador = df_jugador.assign(**{"FOTO PERFIL": df_jugador["FOTO PERFIL"].map(convert_drive_url)})
+
     # Validar que exista al menos un registro para el jugador seleccionado
     if ids_disponibles or names_disponibles:
         
@@ -107,10 +165,10 @@ def player_block(df_datos_filtrado, df_datos, df_final, unavailable="N/A", idiom
                 profile_image = "profile" 
 
             if pd.notna(url_drive) and url_drive and url_drive != "No Disponible":
-                response = util.get_photo(url_drive)
+                foto = fotos.obtener_foto(url_drive)
 
-                if response and response.status_code == 200 and 'image' in response.headers.get("Content-Type", ""):
-                    st.image(response.content, width=150)
+                if foto:
+                    st.image(foto, width=150)
                 else:
                     #"https://cdn-icons-png.flaticon.com/512/5281/5281619.png"
                     st.image(f"assets/images/{profile_image}.png", width=180)
@@ -0,0 +1,164 @@
+import os
+import hashlib
+import threading
+from queue import Queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly
+import plotly.graph_objects as go
+
+from utils import constants
+from utils import cache_disco
+
+# Tamaño con el que se exportan los gráficos al PDF
+ANCHO_PNG = 900
+ALTO_PNG = 450
+ESCALA_PNG = 2
+
+_lock_scopes = threading.Lock()
+_scopes = None  # Cola de procesos de kaleido reutilizables
+_lock_memoria = threading.Lock()
+_memoria = OrderedDict()  # hash -> PNG (LRU)
+
+def _crear_scope():
+    from kaleido.scopes.plotly import PlotlyScope
+
+    # Misma configuración que `plotly.io.to_image`
+    scope = PlotlyScope()
+    scope.plotlyjs = os.path.join(os.path.dirname(os.path.abspath(plotly.__file__)), "package_data", "plotly.min.js")
+    if scope.mathjax is None:
+        scope.mathjax = "https://cdnjs.cloudflare.com/ajax/libs/mathjax/2.7.5/MathJax.js"
+    return scope
+
+def _cola_scopes():
+    # Los procesos de kaleido se crean una vez y viven lo que el proceso de Python:
+    # cada uno atiende un gráfico a la vez, así que hay varios para renderizar en paralelo
+    global _scopes
+    if _scopes is None:
+        with _lock_scopes:
+            if _scopes is None:
+                cola = Queue()
+                for _ in range(max(1, constants.RENDER_PROCESOS_KALEIDO)):
+                    cola.put(_crear_scope())
+                _scopes = cola
+    return _scopes
+
+def _figura_json(fig):
+    if isinstance(fig, go.Figure):
+        return fig.to_json()
+    return go.Figure(fig).to_json()
+
+def huella_figura(fig, width=ANCHO_PNG, height=ALTO_PNG, scale=ESCALA_PNG, formato="png"):
+    """
+    Hash del contenido de una figura (su JSON), del tamaño y del formato de exportación:
+    dos figuras iguales comparten la misma imagen en caché.
+    """
+    contenido = f"{_figura_json(fig)}|{width}x{height}@{scale}"
+    if formato != "png":
+        contenido += f"|{formato}"
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+def _ruta_cache(clave):
+    return os.path.join(constants.RENDER_CACHE_DIR, clave)
+
+def _leer_cache(clave):
+    with _lock_memoria:
+        if clave in _memoria:
+            _memoria.move_to_end(clave)
+            return _memoria[clave]
+    try:
+        with open(_ruta_cache(clave), "rb") as f:
+            imagen = f.read()
+    except OSError:
+        return None
+    cache_disco.usar(_ruta_cache(clave))
+    _guardar_memoria(clave, imagen)
+    return imagen
+
+def _guardar_memoria(clave, imagen):
+    with _lock_memoria:
+        _memoria[clave] = imagen
+        _memoria.move_to_end(clave)
+        while len(_memoria) > constants.RENDER_CACHE_MEMORIA:
+            _memoria.popitem(last=False)
+
+def _guardar_cache(clave, imagen):
+    _guardar_memoria(clave, imagen)
+    try:
+        os.makedirs(constants.RENDER_CACHE_DIR, exist_ok=True)
+        tmp = f"{_ruta_cache(clave)}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(imagen)
+        os.replace(tmp, _ruta_cache(clave))
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el gráfico en caché: {e}")
+        return
+    cache_disco.recortar(constants.RENDER_CACHE_DIR, constants.RENDER_CACHE_DISCO_MB)
+
+def exportar_figura(fig, formato="png", width=ANCHO_PNG, height=ALTO_PNG, scale=ESCALA_PNG):
+    """
+    Exporta una figura de Plotly con un proceso de kaleido ya arrancado,
+    reutilizando el resultado si esa misma figura ya se exportó antes.
+
+    Args:
+        fig (go.Figure | dict): Figura a exportar.
+        formato (str): "png" o "svg" (vectorial; la escala no le afecta).
+        width (int): Ancho en píxeles de layout.
+        height (int): Alto en píxeles de layout.
+        scale (float): Factor de escala.
+
+    Returns:
+        bytes: Imagen en el formato pedido.
+    """
+    if formato == "svg":
+        scale = 1
+    huella = huella_figura(fig, width, height, scale, formato)
+    imagen = _leer_cache(f"{huella}.{formato}")
+    if imagen is not None:
+        return imagen
+
+    scopes = _cola_scopes()
+    scope = scopes.get()
+    try:
+        figura = fig.to_dict() if isinstance(fig, go.Figure) else fig
+        imagen = scope.transform(figura, format=formato, width=width, height=height, scale=scale)
+    finally:
+        scopes.put(scope)
+
+    _guardar_cache(f"{huella}.{formato}", imagen)
+    return imagen
+
+def figura_a_png(fig, width=ANCHO_PNG, height=ALTO_PNG, scale=ESCALA_PNG):
+    """
+    Convierte una figura de Plotly a PNG (ver `exportar_figura`).
+    """
+    return exportar_figura(fig, "png", width, height, scale)
+
+def figura_a_svg(fig, width=ANCHO_PNG, height=ALTO_PNG):
+    """
+    Convierte una figura de Plotly a SVG (ver `exportar_figura`).
+    """
+    return exportar_figura(fig, "svg", width, height)
+
+def renderizar_figuras(figuras, width=ANCHO_PNG, height=ALTO_PNG, scale=ESCALA_PNG, formato="png"):
+    """
+    Renderiza a la vez (un hilo por proceso de kaleido) las figuras de un reporte
+    para que después `exportar_figura` las sirva desde la caché.
+
+    Args:
+        figuras (iterable): Figuras de Plotly (se ignoran los None).
+        formato (str): "png" o "svg".
+
+    Returns:
+        list: Imagen de cada figura, en el mismo orden (None donde no había figura).
+    """
+    figuras = list(figuras)
+    exportar = lambda fig: exportar_figura(fig, formato, width, height, scale)
+    pendientes = [fig for fig in figuras if fig is not None]
+    if len(pendientes) <= 1:
+        return [exportar(fig) if fig is not None else None for fig in figuras]
+
+    with ThreadPoolExecutor(max_workers=max(1, constants.RENDER_PROCESOS_KALEIDO)) as pool:
+        imagenes = iter(list(pool.map(exportar, pendientes)))
+    return [next(imagenes) if fig is not None else None for fig in figuras]
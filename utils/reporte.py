@@ -6,6 +6,7 @@ import requests
 from datetime import datetime
 from utils.pdf import PDF
 from utils import traslator
+from utils import render
 from datetime import date
 
 def add_footer(pdf, invertido=False, idioma="es"):
@@ -41,8 +42,9 @@ def add_footer_con_texto(pdf, texto, idioma="es"):
     pdf.multi_cell(0, 5, texto)
 
 def generate_pdf_avanzado(df_jugador, df_anthropometrics, df_agilty, df_sprint, df_cmj, df_yoyo, 
-                          df_rsa, figs_dict, fecha_actual, idioma="es", observaciones_dict=None):
-    pdf = PDF(fecha_actual=fecha_actual, idioma=idioma)
+                          df_rsa, figs_dict, fecha_actual, idioma="es", observaciones_dict=None,
+                          formato_graficos="png"):
+    pdf = PDF(fecha_actual=fecha_actual, idioma=idioma, formato_graficos=formato_graficos)
     pdf.add_page()
     pdf.header()
     
@@ -83,6 +85,14 @@ def generate_pdf_avanzado(df_jugador, df_anthropometrics, df_agilty, df_sprint,
 
     #st.dataframe(secciones)
 
+    # Renderizar a la vez todos los gráficos que se van a insertar
+    render.renderizar_figuras(
+        (fig for _, df_seccion, figuras in secciones
+         if df_seccion is not None and not df_seccion.empty
+         for _, fig in figuras),
+        formato=formato_graficos
+    )
+
     # Comprobar si "COMPOSICIÓN CORPORAL" está en los gráficos seleccionados
     tiene_composicion = any(
         nombre_seccion == "COMPOSICIÓN CORPORAL" and any(fig for _, fig in figuras)
@@ -205,9 +215,10 @@ def generate_pdf_simple(
     figs_dict,
     fecha_actual,
     idioma="es",
-    observaciones_dict=None
+    observaciones_dict=None,
+    formato_graficos="png"
 ):
-    pdf = PDF(fecha_actual=fecha_actual, idioma=idioma)
+    pdf = PDF(fecha_actual=fecha_actual, idioma=idioma, formato_graficos=formato_graficos)
     pdf.add_page()
     pdf.header()
     pdf.add_player_block(df_jugador, idioma=idioma)
@@ -232,6 +243,9 @@ def generate_pdf_simple(
     if observaciones_dict is None:
         observaciones_dict = {}
 
+    # Renderizar a la vez todos los gráficos antes de maquetar
+    render.renderizar_figuras((fig for _, fig in graficos), formato=formato_graficos)
+
     i = 0
     while i < len(graficos):
         if i % 2 == 0:
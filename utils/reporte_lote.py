@@ -0,0 +1,209 @@
+import os
+import re
+import logging
+import zipfile
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from utils import util
+from utils import player
+from utils import reporte
+from utils import fotos
+from utils import graficos_jugador
+from utils import constants
+
+def _es_checkin(categoria):
+    return str(categoria).upper() in ("CHECK-IN", "CHECKIN", "CHECK IN")
+
+def _nombre_archivo(nombre, jugador_id):
+    # El ID distingue a jugadores con el mismo nombre (cada PDF es una entrada del ZIP)
+    nombre, jugador_id = (re.sub(r"[^\w\- ]+", "", str(texto), flags=re.UNICODE).strip().replace(" ", "_")
+                          for texto in (nombre, jugador_id))
+    return f"Informe_Fisico_{nombre or 'jugador'}_{jugador_id}.pdf"
+
+def tareas_por_filtro(dataset, categoria=None, equipos=None, fecha_inicio=None, fecha_fin=None,
+                      idiomas=("es",), tipo_reporte="Simple", fecha_actual=None, formato_graficos="png"):
+    """
+    Prepara una tarea de reporte por jugador e idioma a partir de un filtro de plantilla.
+    Cada tarea lleva solo los datos de su jugador para que enviarla a otro proceso sea barato.
+
+    Args:
+        dataset (dict): Resultado de `data_util.get_dataset`.
+        categoria (str, optional): Categoría a incluir. Por defecto todas.
+        equipos (list, optional): Equipos a incluir. Por defecto todos.
+        fecha_inicio (date, optional): Inicio del rango de registros.
+        fecha_fin (date, optional): Fin del rango de registros (incluido).
+        idiomas (list): Códigos de idioma (p. ej. ["es", "en"]).
+        tipo_reporte (str): "Simple" o "Avanzado".
+        fecha_actual (str, optional): Fecha impresa en la cabecera (dd/mm/aaaa). Por defecto hoy.
+        formato_graficos (str): "png" o "svg" (gráficos vectoriales).
+
+    Returns:
+        tuple: (lista de tareas, {jugador: motivo} de los jugadores descartados)
+    """
+    df_datos = dataset["datos_final"]
+    df_final = dataset["tests_final"]
+    indice = dataset["indice"]
+    fecha_actual = fecha_actual or pd.Timestamp.today().strftime("%d/%m/%Y")
+
+    seleccion = df_datos
+    if categoria:
+        seleccion = seleccion[seleccion[constants.CATEGORIA_LABEL].astype(str).str.strip() == categoria]
+    if equipos:
+        seleccion = seleccion[seleccion[constants.EQUIPO_LABEL].astype(str).str.strip().isin(equipos)]
+
+    df_promedios = util.calcular_promedios_filtrados(df_final, dataset["columnas_metricas"],
+                                                     constants.CATEGORIA_LABEL, constants.EQUIPO_LABEL,
+                                                     constants.EQUIPO_PROMEDIO, matriz_tests=dataset["matriz"],
+                                                     version=dataset["version"])
+
+    tareas, descartados = [], {}
+    ids = seleccion[constants.ID_LABEL].astype(str).str.strip()
+    nombres = seleccion[constants.JUGADOR_LABEL].astype(str).str.strip()
+
+    for jugador_id, nombre in dict.fromkeys(zip(ids, nombres)):
+        if not jugador_id or jugador_id.lower() in ("nan", "none"):
+            descartados[nombre] = "Sin ID"
+            continue
+
+        df_jugador = player._filas(df_datos, indice["datos"]["id"].get(jugador_id))
+        df_joined = player._filas(df_final, indice["final"]["id"].get(jugador_id))
+        if fecha_inicio is not None and fecha_fin is not None:
+            df_joined = util.filtrar_por_rango_fechas(df_joined, constants.FECHA_REGISTRO_LABEL, fecha_inicio, fecha_fin)
+
+        if df_jugador.empty or df_joined.empty:
+            descartados[nombre] = "Sin registros en el rango de fechas"
+            continue
+
+        if "FOTO PERFIL" in df_jugador.columns:
+            df_jugador = df_jugador.assign(**{"FOTO PERFIL": df_jugador["FOTO PERFIL"].map(player.convert_drive_url)})
+
+        # Igual que en `player.player_block`: CHECK-IN se compara por edad con Juvenil/Cadete del equipo A
+        cat_jugador = df_jugador[constants.CATEGORIA_LABEL].iloc[0]
+        equipo_jugador = df_jugador[constants.EQUIPO_LABEL].iloc[0]
+        if _es_checkin(cat_jugador):
+            edad = df_jugador[constants.EDAD_LABEL].iloc[0]
+            cat_jugador = "Juvenil" if isinstance(edad, (int, float)) and edad >= 16 else "Cadete"
+            equipo_jugador = "A"
+
+        for idioma in idiomas:
+            tareas.append({
+                "etiqueta": f"{nombre} · {jugador_id} ({idioma})",
+                "archivo": f"{idioma}/{_nombre_archivo(nombre, jugador_id)}",
+                "df_jugador": df_jugador,
+                "df_joined": df_joined,
+                "df_promedios": df_promedios,
+                "test_cat": dataset["test_cat"],
+                "lista_columnas": dataset["lista_columnas"],
+                "categoria": str(cat_jugador),
+                "equipo": str(equipo_jugador),
+                "genero": df_jugador["GENERO"].iloc[0],
+                "idioma": idioma,
+                "tipo_reporte": tipo_reporte,
+                "fecha_actual": fecha_actual,
+                "formato_graficos": formato_graficos,
+            })
+
+    return tareas, descartados
+
+def figuras_jugador(tarea):
+    """
+    Gráficos de PlayerHub para el jugador de una tarea (ver `graficos_jugador.figuras_jugador`).
+
+    Args:
+        tarea (dict): Tarea de `tareas_por_filtro`.
+
+    Returns:
+        tuple: ({test: DataFrame}, {gráfico: figura}, {sección: observación})
+    """
+    ctx = graficos_jugador.contexto(tarea["df_promedios"], tarea["categoria"], tarea["equipo"], tarea["genero"],
+                                    tarea["idioma"], tarea["tipo_reporte"] != "Avanzado")
+    return graficos_jugador.figuras_jugador(tarea["df_joined"], tarea["test_cat"], tarea["lista_columnas"], ctx)
+
+def generar_reporte_jugador(tarea):
+    """
+    Genera el PDF de una tarea de `tareas_por_filtro`.
+
+    Returns:
+        bytes: Contenido del PDF.
+    """
+    frames, figs, observaciones = figuras_jugador(tarea)
+    if tarea["tipo_reporte"] == "Avanzado":
+        pdf = reporte.generate_pdf_avanzado(
+            tarea["df_jugador"], frames["antropometria"], frames["agilidad"], frames["sprint"],
+            frames["cmj"], frames["yoyo"], frames["rsa"], figs, tarea["fecha_actual"], tarea["idioma"], observaciones,
+            tarea.get("formato_graficos", "png"))
+    else:
+        pdf = reporte.generate_pdf_simple(
+            tarea["df_jugador"], frames["antropometria"], figs, tarea["fecha_actual"], tarea["idioma"], observaciones,
+            tarea.get("formato_graficos", "png"))
+    return bytes(pdf)
+
+def _inicializar_proceso():
+    # Los gráficos llaman a `st.plotly_chart`; fuera de la app solo generan avisos
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+def _ejecutar(tareas, procesos, progreso, resultados, errores, hechos, total):
+    fallidas_por_pool = []
+    contexto = multiprocessing.get_context("spawn")  # sin heredar hilos ni conexiones del servidor
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto, initializer=_inicializar_proceso) as pool:
+        futuros = {pool.submit(generar_reporte_jugador, tarea): tarea for tarea in tareas}
+        for futuro in as_completed(futuros):
+            tarea = futuros[futuro]
+            try:
+                resultados[tarea["archivo"]] = futuro.result()
+            except BrokenProcessPool:
+                # Un proceso murió: no se sabe qué tarea fue, se reintentan aparte
+                fallidas_por_pool.append(tarea)
+                continue
+            except Exception as e:
+                errores[tarea["etiqueta"]] = f"{type(e).__name__}: {e}"
+            hechos += 1
+            if progreso:
+                progreso(hechos, total, tarea["etiqueta"])
+    return fallidas_por_pool, hechos
+
+def generar_reportes_lote(tareas, procesos=None, progreso=None):
+    """
+    Genera en paralelo (un proceso por núcleo) los PDF de varias tareas y los empaqueta en un ZIP.
+    Un fallo en un jugador no detiene al resto: se anota y se incluye en `errores.txt`.
+
+    Args:
+        tareas (list): Tareas de `tareas_por_filtro`.
+        procesos (int, optional): Procesos en paralelo. Por defecto, uno por núcleo.
+        progreso (callable, optional): `progreso(hechos, total, etiqueta)` tras cada reporte.
+
+    Returns:
+        tuple: (bytes del ZIP, {etiqueta: error})
+    """
+    resultados, errores = {}, {}
+    total = len(tareas)
+
+    # Fotos descargadas una vez aquí: los procesos las leen de la caché en disco
+    fotos.precargar_fotos(tarea["df_jugador"]["FOTO PERFIL"].iloc[0] for tarea in tareas
+                          if "FOTO PERFIL" in tarea["df_jugador"].columns)
+    procesos = max(1, min(procesos or os.cpu_count() or 1, total or 1))
+
+    pendientes, hechos = _ejecutar(tareas, procesos, progreso, resultados, errores, 0, total)
+
+    # Reintento aislado (un proceso por tarea) de lo que quedó colgado por una caída del pool
+    for tarea in pendientes:
+        pendientes_tarea, hechos = _ejecutar([tarea], 1, progreso, resultados, errores, hechos, total)
+        for fallida in pendientes_tarea:
+            errores[fallida["etiqueta"]] = "El proceso de generación terminó de forma inesperada"
+            hechos += 1
+            if progreso:
+                progreso(hechos, total, fallida["etiqueta"])
+
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for archivo in sorted(resultados):
+            zf.writestr(archivo, resultados[archivo])
+        if errores:
+            zf.writestr("errores.txt", "\n".join(f"{etiqueta}: {error}" for etiqueta, error in sorted(errores.items())))
+
+    return buffer.getvalue(), errores
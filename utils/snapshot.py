@@ -0,0 +1,233 @@
+import os
+import re
+import json
+import time
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from utils import constants
+
+_lock_manifiesto = threading.Lock()
+_refrescos_en_curso = set()
+_lock_refrescos = threading.Lock()
+
+def _ruta_manifiesto():
+    return os.path.join(constants.SNAPSHOT_DIR, "manifest.json")
+
+def _archivo_hoja(hoja):
+    nombre = re.sub(r"[^A-Za-z0-9_-]+", "_", str(hoja)).strip("_") or "hoja"
+    return f"{nombre}.parquet"
+
+def leer_manifiesto():
+    """
+    Devuelve el manifiesto de snapshots: {hoja: {archivo, fecha_descarga, filas, ...}}.
+    Si no existe o está corrupto, devuelve un diccionario vacío.
+    """
+    try:
+        with open(_ruta_manifiesto(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _escribir_manifiesto(manifiesto):
+    os.makedirs(constants.SNAPSHOT_DIR, exist_ok=True)
+    tmp = _ruta_manifiesto() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, _ruta_manifiesto())
+
+def _actualizar_manifiesto(hoja, **campos):
+    with _lock_manifiesto:
+        manifiesto = leer_manifiesto()
+        manifiesto.setdefault(hoja, {}).update(campos)
+        _escribir_manifiesto(manifiesto)
+
+def _valor_json(valor):
+    if pd.isna(valor):
+        return None
+    if hasattr(valor, "item"):
+        valor = valor.item()
+    return json.dumps(valor, ensure_ascii=False, default=str)
+
+def guardar_snapshot(hoja, df, sync=None):
+    """
+    Guarda una copia local en Parquet de una hoja y registra su metadata en el manifiesto.
+
+    Las columnas con tipos mezclados (p. ej. números y textos en CHECK-IN) se serializan
+    como JSON por celda para que la lectura devuelva exactamente los mismos valores.
+
+    Args:
+        hoja (str): Nombre de la hoja de Google Sheets.
+        df (pd.DataFrame): Contenido leído de la hoja.
+        sync (dict, optional): Estado de sincronización incremental (filas leídas, firmas).
+            Si no se indica se descarta el anterior, porque ya no describe el snapshot.
+
+    Returns:
+        bool: True si el snapshot se guardó correctamente.
+    """
+    if df is None:
+        return False
+
+    try:
+        os.makedirs(constants.SNAPSHOT_DIR, exist_ok=True)
+
+        columnas_mixtas = []
+        df_guardar = df.copy()
+        df_guardar.columns = [str(i) for i in range(len(df.columns))]
+
+        for i, col in enumerate(df_guardar.columns):
+            if df_guardar[col].dtype == object and pd.api.types.infer_dtype(df_guardar[col], skipna=True) != "string":
+                df_guardar[col] = df_guardar[col].map(_valor_json)
+                columnas_mixtas.append(i)
+
+        archivo = _archivo_hoja(hoja)
+        ruta = os.path.join(constants.SNAPSHOT_DIR, archivo)
+        df_guardar.to_parquet(ruta + ".tmp", index=True)
+        os.replace(ruta + ".tmp", ruta)
+
+        _actualizar_manifiesto(
+            hoja,
+            archivo=archivo,
+            fecha_descarga=datetime.now().isoformat(timespec="seconds"),
+            filas=len(df),
+            columnas=[c if isinstance(c, (str, int, float)) else str(c) for c in df.columns],
+            columnas_mixtas=columnas_mixtas,
+            desactualizado=False,
+            sync=sync,
+        )
+        return True
+
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar el snapshot de '{hoja}': {e}")
+        return False
+
+def registrar_sincronizacion(hoja, sync):
+    """
+    Registra una sincronización que no cambió el contenido de la hoja: actualiza la
+    fecha de descarga y el estado de sincronización sin reescribir el Parquet.
+
+    Args:
+        hoja (str): Nombre de la hoja.
+        sync (dict): Nuevo estado de sincronización incremental.
+    """
+    _actualizar_manifiesto(
+        hoja,
+        fecha_descarga=datetime.now().isoformat(timespec="seconds"),
+        desactualizado=False,
+        sync=sync,
+    )
+
+def leer_snapshot(hoja):
+    """
+    Lee el último snapshot válido de una hoja.
+
+    Args:
+        hoja (str): Nombre de la hoja.
+
+    Returns:
+        pd.DataFrame | None: Contenido de la hoja, o None si no hay snapshot disponible.
+    """
+    entrada = leer_manifiesto().get(hoja)
+    if not entrada:
+        return None
+
+    try:
+        df = pd.read_parquet(os.path.join(constants.SNAPSHOT_DIR, entrada["archivo"]))
+    except Exception as e:
+        print(f"⚠️ Snapshot de '{hoja}' ilegible: {e}")
+        return None
+
+    for i in entrada.get("columnas_mixtas", []):
+        col = df.columns[i]
+        df[col] = df[col].map(lambda v: json.loads(v) if isinstance(v, str) else None).astype(object)
+
+    df.columns = entrada["columnas"]
+    return df
+
+def edad_snapshot(hoja):
+    """
+    Devuelve los segundos transcurridos desde la última descarga de la hoja, o None si no hay snapshot.
+    """
+    entrada = leer_manifiesto().get(hoja)
+    if not entrada or "fecha_descarga" not in entrada:
+        return None
+    return (datetime.now() - datetime.fromisoformat(entrada["fecha_descarga"])).total_seconds()
+
+def necesita_refresco(hoja):
+    entrada = leer_manifiesto().get(hoja)
+    if not entrada:
+        return True
+    if entrada.get("desactualizado", False):
+        return True
+    edad = edad_snapshot(hoja)
+    return edad is None or edad >= constants.SNAPSHOT_EDAD_MINIMA_REFRESCO
+
+def marcar_desactualizados(hojas=None):
+    """
+    Marca snapshots como desactualizados para que la siguiente lectura lance un refresco
+    en segundo plano, sin bloquear la carga de la página.
+
+    Args:
+        hojas (list, optional): Hojas a marcar. Si es None, se marcan todas.
+    """
+    with _lock_manifiesto:
+        manifiesto = leer_manifiesto()
+        for hoja, entrada in manifiesto.items():
+            if hojas is None or hoja in hojas:
+                entrada["desactualizado"] = True
+        if manifiesto:
+            _escribir_manifiesto(manifiesto)
+
+def refrescar_en_segundo_plano(hoja, cargar):
+    """
+    Lanza la descarga de una hoja en un hilo aparte y actualiza su snapshot al terminar.
+    No hace nada si el snapshot es reciente o si ya hay un refresco en curso para esa hoja.
+
+    Args:
+        hoja (str): Nombre de la hoja.
+        cargar (callable): Función sin argumentos que devuelve el DataFrame actualizado.
+
+    Returns:
+        bool: True si se lanzó un refresco.
+    """
+    return refrescar_grupo_en_segundo_plano([hoja], lambda: {hoja: cargar()})
+
+def refrescar_grupo_en_segundo_plano(hojas, cargar):
+    """
+    Igual que `refrescar_en_segundo_plano`, pero para varias hojas descargadas de una vez
+    (p. ej. con una única lectura masiva).
+
+    Args:
+        hojas (list): Hojas cubiertas por la descarga.
+        cargar (callable): Función sin argumentos que devuelve {hoja: DataFrame} a guardar,
+            o None si ella misma ya guardó los snapshots.
+
+    Returns:
+        bool: True si se lanzó un refresco.
+    """
+    if not any(necesita_refresco(hoja) for hoja in hojas):
+        return False
+
+    with _lock_refrescos:
+        if any(hoja in _refrescos_en_curso for hoja in hojas):
+            return False
+        _refrescos_en_curso.update(hojas)
+
+    nombre = ", ".join(hojas)
+
+    def _tarea():
+        inicio = time.perf_counter()
+        try:
+            for hoja, df in (cargar() or {}).items():
+                guardar_snapshot(hoja, df)
+            print(f"🔄 Snapshot '{nombre}' refrescado en {time.perf_counter() - inicio:.2f}s")
+        except Exception as e:
+            print(f"⚠️ Error refrescando snapshot de '{nombre}': {e}")
+        finally:
+            with _lock_refrescos:
+                _refrescos_en_curso.difference_update(hojas)
+
+    threading.Thread(target=_tarea, name=f"snapshot-{nombre}", daemon=True).start()
+    return True
@@ -3,9 +3,13 @@ import pandas as pd
 import numpy as np
 import requests
 from datetime import datetime
-from scipy.stats import percentileofscore
 from functools import reduce
 import unicodedata
+import hashlib
+
+from utils import matriz
+from utils import fotos
+from utils import constants
 
 #from gspread_dataframe import get_as_dataframe, set_with_dataframe
 
@@ -24,28 +28,94 @@ def convertir_fecha_segura(valor):
         print(f"❌ Fecha inválida: {valor}")
         return None
 
-def rellenar_fechas_invalidas(df, columna="FECHA REGISTRO", formato="%d/%m/%Y"):
+def a_fecha(serie, formato="%d/%m/%Y"):
+    """
+    Devuelve una columna de fechas como datetime64. Si ya lo es, se devuelve tal cual
+    (sin volver a parsearla), así que se puede llamar en cualquier punto sin coste.
+
+    Args:
+        serie (pd.Series): Fechas como datetime64 o como texto.
+        formato (str): Formato del texto (por defecto: "%d/%m/%Y").
+
+    Returns:
+        pd.Series: Fechas datetime64 (NaT si no son válidas).
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    return pd.to_datetime(serie, format=formato, errors="coerce")
+
+def parsear_fechas(serie, formatos=("%d/%m/%Y", "%Y-%m-%d")):
+    """
+    Convierte una columna de texto a datetime64 por columna completa: el primer formato se
+    aplica a todas las filas y cada alternativa solo a las que siguen sin fecha.
+    Los valores que no encajan en ningún formato quedan como NaT y se informan una sola vez.
+
+    Args:
+        serie (pd.Series): Fechas como texto.
+        formatos (tuple): Formatos a probar, en orden.
+
+    Returns:
+        pd.Series: Fechas datetime64 (NaT si no son válidas o están vacías).
+    """
+    texto = serie.astype("string").str.strip()
+    fechas = pd.Series(pd.NaT, index=serie.index, dtype="datetime64[ns]")
+    pendientes = (texto.notna() & (texto != "")).to_numpy(dtype=bool)
+
+    for formato in formatos:
+        if not pendientes.any():
+            break
+        fechas[pendientes] = pd.to_datetime(texto[pendientes], format=formato, errors="coerce")
+        pendientes &= fechas.isna().to_numpy()
+
+    if pendientes.any():
+        print(f"❌ Fechas inválidas: {texto[pendientes].unique().tolist()}")
+
+    return fechas
+
+def fechas_a_texto(df, columnas=("FECHA REGISTRO",), formato="%d/%m/%Y"):
     """
-    Reemplaza valores nulos o no válidos en una columna de fecha por la fecha actual (formato: dd/mm/yyyy).
+    Copia del DataFrame con las columnas de fecha como texto dd/mm/yyyy.
+    Solo para los bordes: escribir en Google Sheets o mostrar al usuario.
+
+    Args:
+        df (pd.DataFrame): DataFrame con fechas datetime64.
+        columnas (iterable): Columnas de fecha a formatear (las que no existan se ignoran).
+        formato (str): Formato de salida (por defecto: "%d/%m/%Y").
+
+    Returns:
+        pd.DataFrame: Copia con las fechas formateadas.
+    """
+    df = df.copy()
+    for col in columnas:
+        if col in df.columns and pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime(formato)
+    return df
+
+def rellenar_fechas_invalidas(df, columna="FECHA REGISTRO", formato=None):
+    """
+    Reemplaza valores nulos o no válidos en una columna de fecha por la fecha actual.
 
     Args:
         df (pd.DataFrame): El DataFrame a procesar.
         columna (str): El nombre de la columna de fechas.
-        formato (str): El formato de salida (por defecto: "%d/%m/%Y").
+        formato (str, optional): Formato de salida como texto (p. ej. "%d/%m/%Y").
+            Por defecto la columna se deja como datetime64.
 
     Returns:
         pd.DataFrame: El DataFrame con la columna corregida.
     """
-    hoy = datetime.today()
+    hoy = pd.Timestamp(datetime.today().date())
 
     # Convertir a datetime con errores como NaT
-    df[columna] = pd.to_datetime(df[columna], errors="coerce", dayfirst=True)
+    if not pd.api.types.is_datetime64_any_dtype(df[columna]):
+        df[columna] = pd.to_datetime(df[columna], errors="coerce", dayfirst=True)
 
     # Reemplazar valores inválidos con fecha actual
     df[columna] = df[columna].fillna(hoy)
 
-    # Convertir nuevamente a string con el formato deseado
-    df[columna] = df[columna].dt.strftime(formato)
+    # Convertir a string solo si se pide un formato
+    if formato:
+        df[columna] = df[columna].dt.strftime(formato)
 
     return df
 
@@ -98,7 +168,49 @@ def es_numerico(val):
         return isinstance(val, (int, float)) and not pd.isna(val)
     except:
         return False
-    
+
+def mascara_numericos(df):
+    """
+    Máscara booleana de las celdas numéricas (int/float no nulos), calculada por columna.
+    Equivale a `df.map(es_numerico)`.
+
+    Args:
+        df (pd.DataFrame): DataFrame a evaluar.
+
+    Returns:
+        pd.DataFrame: Máscara con el mismo índice y columnas que `df`.
+    """
+    mascara = {}
+    for i in range(df.shape[1]):
+        serie = df.iloc[:, i]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(object)
+
+        if pd.api.types.is_numeric_dtype(serie):
+            mascara[i] = serie.notna()
+        elif serie.dtype == object:
+            # `isinstance` se evalúa una vez por tipo distinto, no por celda
+            codigos, tipos = pd.factorize(np.fromiter(map(type, serie.to_numpy()), dtype=object, count=len(serie)))
+            es_numero = np.array([issubclass(t, (int, float)) for t in tipos], dtype=bool)
+            mascara[i] = pd.Series(es_numero[codigos], index=df.index) & serie.notna()
+        else:
+            mascara[i] = pd.Series(False, index=df.index)
+
+    return pd.DataFrame(mascara, index=df.index).set_axis(df.columns, axis=1)
+
+def mascara_vacios_o_ceros(df):
+    """
+    Máscara booleana de las celdas NaN/None o iguales a 0, sin recorrer celda a celda.
+    Equivale a `df.map(lambda x: pd.isna(x) or x == 0)`.
+
+    Args:
+        df (pd.DataFrame): DataFrame a evaluar.
+
+    Returns:
+        pd.DataFrame: Máscara con el mismo índice y columnas que `df`.
+    """
+    return df.isna() | df.eq(0)
+
 def get_dataframe_columns(dataframe):
     dataframe_columns = dataframe.columns.tolist()
     return dataframe_columns
@@ -152,8 +264,8 @@ def join_player_and_physical_data(df_datos, df_data_test):
     #if df_unido.empty:
     #return df_data_test
 
-    # Convertir la columna de fecha asegurando el formato correcto
-    df_data_test["FECHA REGISTRO"] = pd.to_datetime(df_data_test["FECHA REGISTRO"], errors='coerce', dayfirst=True)
+    # La fecha ya llega como datetime64 desde la carga
+    df_data_test["FECHA REGISTRO"] = a_fecha(df_data_test["FECHA REGISTRO"])
 
     # # Eliminar filas con fechas inválidas
     # df_unido = df_unido.dropna(subset=["FECHA REGISTRO"])
@@ -165,9 +277,6 @@ def join_player_and_physical_data(df_datos, df_data_test):
     # # Ordenar por fecha de más reciente a más antigua
     df_data_test = df_data_test.sort_values(by="FECHA REGISTRO", ascending=False)
 
-    # # Convertir la fecha a string en formato dd/mm/yyyy
-    df_data_test["FECHA REGISTRO"] = df_data_test["FECHA REGISTRO"].dt.strftime('%d/%m/%Y').astype(str)
-
     # # Aplicar transformación solo a esas columnas
     #df_data_test[columnas_filtradas] = df_data_test[columnas_filtradas].apply(lambda col: col.astype(str).str.replace(r"[,-]", ".", regex=True).astype(float))
     df_data_test = limpiar_columnas_numericas(df_data_test, columnas_filtradas)
@@ -265,12 +374,7 @@ def columnas_sin_datos_utiles(df, columnas_excluidas=None, mostrar_alerta=False,
         return True  # Nada que validar
 
     try:
-        todos_vacios_o_ceros = (
-            df[columnas_filtradas]
-            .map(lambda x: pd.isna(x) or x == 0)
-            .all()
-            .all()
-        )
+        todos_vacios_o_ceros = bool(mascara_vacios_o_ceros(df[columnas_filtradas]).to_numpy().all())
 
         if todos_vacios_o_ceros and mostrar_alerta:
             st.warning(mensaje)
@@ -321,7 +425,7 @@ def get_new(datos_jugadores, df_existente, columnas_datos, fecha=None):
         datos_jugadores (pd.DataFrame): Nuevos registros a insertar.
         df_existente (pd.DataFrame): DataFrame original con estructura base.
         columnas_datos (list): Columnas clave a mantener desde los datos de origen.
-        fecha (str, opcional): Fecha única para asignar a nuevos registros. Formato: 'dd/mm/yyyy'.
+        fecha (pd.Timestamp, opcional): Fecha única para asignar a nuevos registros.
 
     Returns:
         pd.DataFrame: DataFrame combinado y ordenado por 'FECHA REGISTRO' y 'JUGADOR'.
@@ -362,12 +466,11 @@ def get_new(datos_jugadores, df_existente, columnas_datos, fecha=None):
 
         df_nuevo["JUGADOR"] = nuevos["JUGADOR"]
         df_nuevo["CATEGORIA"] = nuevos["CATEGORIA"]
-        df_nuevo["FECHA REGISTRO"] = fecha
+        df_nuevo["FECHA REGISTRO"] = pd.Timestamp(fecha)
 
     # === MODO 2: Detectar sesiones faltantes ===
     else:
-        fechas_existentes = df_existente["FECHA REGISTRO"].dropna().unique().tolist()
-        fechas_existentes = [f for f in fechas_existentes if isinstance(f, str)]
+        fechas_existentes = a_fecha(df_existente["FECHA REGISTRO"]).dropna().unique().tolist()
 
         jugadores_categoria = datos_jugadores[["JUGADOR", "CATEGORIA", "ID"]].drop_duplicates()
 
@@ -412,9 +515,8 @@ def get_new(datos_jugadores, df_existente, columnas_datos, fecha=None):
 
     # === Ordenar por fecha y jugador ===
     if "FECHA REGISTRO" in df_final.columns:
-        df_final["FECHA REGISTRO"] = pd.to_datetime(df_final["FECHA REGISTRO"], format="%d/%m/%Y", errors="coerce")
+        df_final["FECHA REGISTRO"] = a_fecha(df_final["FECHA REGISTRO"])
         df_final = df_final.sort_values(by=["FECHA REGISTRO", "JUGADOR"]).reset_index(drop=True)
-        df_final["FECHA REGISTRO"] = df_final["FECHA REGISTRO"].dt.strftime("%d/%m/%Y")
 
     # === Reordenar columnas: JUGADOR justo después de ID ===
     if "ID" in df_final.columns and "JUGADOR" in df_final.columns:
@@ -428,7 +530,15 @@ def get_new(datos_jugadores, df_existente, columnas_datos, fecha=None):
 
 
 def get_data_editor(df_nuevo, key=None, num_rows_user="fixed"):
+    # Las categóricas se editan como texto libre (si no, el editor solo permitiría valores existentes)
+    categoricas = df_nuevo.select_dtypes(include="category").columns
+    if len(categoricas):
+        df_nuevo = df_nuevo.astype({col: object for col in categoricas})
     edited_df = st.data_editor(df_nuevo, key=key, column_config={
+            "FECHA REGISTRO": st.column_config.DateColumn(
+                label="FECHA REGISTRO",
+                format="DD/MM/YYYY"
+            ),
             "TEST": st.column_config.SelectboxColumn(
                 label="TEST",
                 options=["ENDURANCE I", "ENDURANCE II", "RECOVERY I", "RECOVERY II"],
@@ -472,7 +582,7 @@ def separar_dataframe_por_estructura(df_general, df_estructura, columnas_usadas)
             df_hoja = df_general[columnas_finales].copy()
 
             # 5. Filtrar registros donde todas las métricas son NaN/None o 0
-            metricas_validas = df_hoja[columnas_existentes].applymap(lambda x: pd.isna(x) or x == 0)
+            metricas_validas = mascara_vacios_o_ceros(df_hoja[columnas_existentes])
             filas_a_mantener = ~metricas_validas.all(axis=1)
 
             df_hoja_filtrado = df_hoja[filas_a_mantener].copy()
@@ -552,11 +662,10 @@ def merge_by_nombre_categoria(df_unido, df_nuevo):
     columnas_filtradas = [col for col in columnas_estructura if col not in columnas_excluidas]
 
     # === Procesamiento de fechas ===
-    df_nuevo["FECHA REGISTRO"] = pd.to_datetime(df_nuevo["FECHA REGISTRO"], errors='coerce', dayfirst=True)
+    df_nuevo["FECHA REGISTRO"] = a_fecha(df_nuevo["FECHA REGISTRO"])
     df_nuevo["anio"] = df_nuevo["FECHA REGISTRO"].dt.year.astype(str)
     df_nuevo["mes"] = df_nuevo["FECHA REGISTRO"].dt.month.astype(str)
     df_nuevo = df_nuevo.sort_values(by="FECHA REGISTRO", ascending=False)
-    df_nuevo["FECHA REGISTRO"] = df_nuevo["FECHA REGISTRO"].dt.strftime('%d/%m/%Y')
 
     # === Limpieza SOLO de columnas numéricas ===
     df_nuevo = limpiar_columnas_numericas(df_nuevo, columnas_filtradas)
@@ -587,15 +696,15 @@ def merge_by_nombre_categoria(df_unido, df_nuevo):
 
 def filtrar_por_rango_fechas(df, columna_fecha, fecha_inicio, fecha_fin, formato="%d/%m/%Y"):
     """
-    Filtra un DataFrame por un rango de fechas, manteniendo la columna de fechas como string.
+    Filtra un DataFrame por un rango de fechas sin modificar la columna de fechas.
     Si la columna no existe, se muestra una advertencia y se retorna el DataFrame original.
 
     Args:
         df (pd.DataFrame): DataFrame original.
-        columna_fecha (str): Nombre de la columna que contiene fechas como string.
+        columna_fecha (str): Nombre de la columna de fechas (datetime64 o texto).
         fecha_inicio (datetime.date): Fecha inicial del rango.
         fecha_fin (datetime.date): Fecha final del rango.
-        formato (str): Formato de fecha en el DataFrame (por defecto: "%d/%m/%Y").
+        formato (str): Formato si las fechas vienen como texto (por defecto: "%d/%m/%Y").
 
     Returns:
         pd.DataFrame: DataFrame filtrado (o el original si la columna no existe).
@@ -608,25 +717,23 @@ def filtrar_por_rango_fechas(df, columna_fecha, fecha_inicio, fecha_fin, formato
             print(mensaje)
         return df
 
-    df_temp = df.copy()
-    df_temp["FECHA DT"] = pd.to_datetime(df_temp[columna_fecha], format=formato, errors="coerce")
-
     if fecha_inicio == fecha_fin:
-        filtrado = df_temp
-    else:
-        filtrado = df_temp[
-            (df_temp["FECHA DT"].dt.date >= fecha_inicio) &
-            (df_temp["FECHA DT"].dt.date <= fecha_fin)
-        ]
+        return df.copy()
 
-    return filtrado.drop(columns=["FECHA DT"], errors="ignore")
+    fechas = a_fecha(df[columna_fecha], formato)
+    return df[(fechas >= pd.Timestamp(fecha_inicio)) & (fechas < pd.Timestamp(fecha_fin) + pd.Timedelta(days=1))].copy()
 
 # Utilidad para obtener lista única ordenada de una columna, con filtros
 def get_filtered_list(dataframe, column, filters, default_option="Todos"):
     for col, val in filters.items():
         if val != default_option:
             dataframe = dataframe[dataframe[col] == val]
-    valores_unicos = dataframe[column].dropna().astype(str).str.strip().unique().tolist()
+    serie = dataframe[column]
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Ya normalizada al cargar (`data_util.optimizar_tipos`): basta con las categorías presentes
+        valores_unicos = [str(v) for v in serie.cat.remove_unused_categories().cat.categories]
+    else:
+        valores_unicos = serie.dropna().astype(str).str.strip().unique().tolist()
     return sorted(limpiar_lista(valores_unicos))
 
 def limpiar_lista(valores):
@@ -699,8 +806,9 @@ def get_filters(df):
     return df
 
 def get_photo(url):
+    # Para mostrar fotos de perfil usar `fotos.obtener_foto` (con caché); esto descarga siempre
     try:
-        response = requests.get(url)
+        response = fotos.sesion().get(url, timeout=constants.FOTOS_TIMEOUT)
         response.raise_for_status()  # Verifica si hubo un error (por ejemplo, 404 o 500)
     except requests.exceptions.RequestException:
         response = None  # Si hay un error, no asignamos nada a response
@@ -813,7 +921,7 @@ def contar_jugadores_por_categoria(df):
     pd.DataFrame -> DataFrame con las categorías como columnas y la cantidad de jugadores por categoría.
     """
     # Contar jugadores únicos por categoría
-    jugadores_por_categoria = df.groupby("CATEGORIA")["JUGADOR"].nunique()
+    jugadores_por_categoria = df.groupby("CATEGORIA", observed=True)["JUGADOR"].nunique()
 
     # Convertir a DataFrame con categorías como columnas
     resultado = jugadores_por_categoria.to_frame().T
@@ -837,8 +945,8 @@ def resumen_sesiones(df, total_jugadores):
     if df.empty or "FECHA REGISTRO" not in df or "ID" not in df:
         return pd.DataFrame({"MES": ["Último", "Penúltimo"], "TSUM": [0, 0], "APUS": [0, 0], "JUS": [0, 0], "FUS": [None, None]})
 
-    # Convertir FECHA REGISTRO a datetime
-    df["FECHA REGISTRO"] = pd.to_datetime(df["FECHA REGISTRO"], dayfirst=True, errors='coerce')
+    # Asegurar FECHA REGISTRO como datetime (ya lo es si viene de la carga)
+    df["FECHA REGISTRO"] = a_fecha(df["FECHA REGISTRO"])
 
     # Verificar si hay fechas válidas
     if df["FECHA REGISTRO"].isna().all():
@@ -908,33 +1016,34 @@ def sesiones_por_test(df_joined, test_categorias):
     if not columnas_requeridas.issubset(df.columns):
         return pd.DataFrame()
 
-    # Convertir fecha
-    df["FECHA REGISTRO"] = pd.to_datetime(df["FECHA REGISTRO"], errors='coerce', dayfirst=True)
-    df = df.dropna(subset=["FECHA REGISTRO"])
+    # Fechas datetime64 (ya lo son si vienen de la carga)
+    fechas = a_fecha(df["FECHA REGISTRO"])
+    df, fechas = df[fechas.notna()], fechas[fechas.notna()]
 
-    # Inicializar diccionario de resultados
-    sesiones_dict = {"JUGADOR": [], "CATEGORIA": [], "ÚLTIMA SESIÓN": []}
-    for test in test_categorias:
-        sesiones_dict[test] = []
-
-    # Agrupar por nombre y categoría
-    for (jugador_nombre, categoria), datos_jugador in df.groupby(["JUGADOR", "CATEGORIA"]):
-        sesiones_dict["JUGADOR"].append(jugador_nombre)
-        sesiones_dict["CATEGORIA"].append(categoria)
-        sesiones_dict["ÚLTIMA SESIÓN"].append(datos_jugador["FECHA REGISTRO"].max().strftime("%d/%m/%Y"))
-
-        for test, columnas in test_categorias.items():
-            columnas_validas = [col for col in columnas if col in datos_jugador.columns]
-            if columnas_validas:
-                sesiones_validas = datos_jugador[columnas_validas].apply(lambda x: (x != 0).any(), axis=1)
-                sesiones_dict[test].append(sesiones_validas.sum())
-            else:
-                sesiones_dict[test].append(0)
+    # Una columna booleana por test: la sesión tiene algún valor distinto de 0 (NaN cuenta)
+    indicadores = {}
+    for test, columnas in test_categorias.items():
+        columnas_validas = [col for col in columnas if col in df.columns]
+        if columnas_validas:
+            indicadores[test] = (df[columnas_validas] != 0).any(axis=1)
+        else:
+            indicadores[test] = pd.Series(False, index=df.index)
+
+    # Una sola agregación por jugador y categoría (solo combinaciones presentes si son categóricas)
+    claves = [df["JUGADOR"], df["CATEGORIA"]]
+    ultima_sesion = fechas.groupby(claves, observed=True).max()
+    conteos = pd.DataFrame(indicadores, index=df.index).groupby(claves, observed=True).sum()
 
     # Crear DataFrame final y ordenar
-    sesiones_df = pd.DataFrame(sesiones_dict)
-    sesiones_df["ÚLTIMA SESIÓN"] = pd.to_datetime(sesiones_df["ÚLTIMA SESIÓN"], format="%d/%m/%Y")
+    sesiones_df = pd.DataFrame({
+        "JUGADOR": ultima_sesion.index.get_level_values(0).to_numpy(),
+        "CATEGORIA": ultima_sesion.index.get_level_values(1).to_numpy(),
+        "ÚLTIMA SESIÓN": ultima_sesion.to_numpy(),
+    })
+    for test in test_categorias:
+        sesiones_df[test] = conteos[test].to_numpy()
     sesiones_df = sesiones_df.sort_values(by="ÚLTIMA SESIÓN", ascending=False).reset_index(drop=True)
+    # Solo la tabla final (una fila por jugador) se formatea para mostrarla
     sesiones_df["ÚLTIMA SESIÓN"] = sesiones_df["ÚLTIMA SESIÓN"].dt.strftime('%d/%m/%Y').astype(str)
 
     return sesiones_df
@@ -976,10 +1085,10 @@ def quitar_acentos(texto):
         return texto
     # Descomposición Unicode
     texto_normalizado = unicodedata.normalize('NFD', texto)
-    # Elimina tildes pero deja la ñ
+    # Elimina tildes pero deja la ñ (tilde combinada justo después de una n)
     texto_sin_tildes = ''.join(
-        c for c in texto_normalizado
-        if unicodedata.category(c) != 'Mn' or c == '̃' and texto_normalizado[texto_normalizado.index(c)-1].lower() == 'n'
+        c for i, c in enumerate(texto_normalizado)
+        if unicodedata.category(c) != 'Mn' or c == '̃' and i > 0 and texto_normalizado[i - 1].lower() == 'n'
     )
     return texto_sin_tildes
 
@@ -993,18 +1102,19 @@ def limpiar_nacionalidades(df):
         "MOROCCO": "MARRUECOS"
     }
 
-    # Normalizar texto y aplicar reemplazos
-    df["NACIONALIDAD"] = (
-        df["NACIONALIDAD"]
-        .astype(str)
+    # Normalizar solo los valores distintos (hay muchos menos que jugadores) y mapearlos de vuelta
+    nacionalidades = df["NACIONALIDAD"].astype(str)
+    unicos = pd.Series(nacionalidades.unique())
+    limpios = (
+        unicos
         .str.upper()
         .str.strip()
         .replace(reemplazos)
+        .str.replace(",", ".", regex=False)
+        .str.strip()
+        .map(quitar_acentos)
     )
-
-    df["NACIONALIDAD"] = df["NACIONALIDAD"].astype(str).str.replace(",", ".", regex=False).str.strip()
-    df['NACIONALIDAD'] = df['NACIONALIDAD'].apply(quitar_acentos)
-
+    df["NACIONALIDAD"] = nacionalidades.map(dict(zip(unicos, limpios)))
 
     return df
 
@@ -1062,14 +1172,16 @@ def obtener_bandera(pais):
     
 
 def calcular_percentiles(jugador, referencia, columnas_estructura):
+    """
+    Percentil (criterio `percentileofscore(kind="rank")`) de cada variable del jugador
+    frente a un DataFrame de referencia. Para comparar plantillas completas usar
+    `matriz.referencias_percentiles` / `matriz.tabla_percentiles`, que ordenan la referencia una sola vez.
+    """
     percentiles = {}
-    #st.dataframe(referencia)
-    #columnas_estructura = get_dataframe_columns(jugador)
     for variable in columnas_estructura:
-        ref = referencia[variable].dropna().astype(float)
+        ref = np.sort(referencia[variable].dropna().astype(float).to_numpy())
         valor = jugador[variable]
-        percentil = percentileofscore(ref, valor, kind='rank')
-        percentiles[variable] = round(percentil, 1)
+        percentiles[variable] = float(matriz.percentil_rank(ref, [valor if pd.notna(valor) else np.nan])[0])
     return percentiles
 
 def obtener_color_percentil(p):
@@ -1154,37 +1266,77 @@ def convertir_m_s_a_km_h(df, metricas_m_s):
 
     return df
 
-def calcular_promedios_filtrados(df, columnas_a_verificar, categorial, equipol, equipo_promedio):
+def huella_dataframe(df):
+    """
+    Calcula una huella (hash) del contenido de un DataFrame: valores, índice, columnas y tipos.
+    Sirve como clave de caché para resultados que solo dependen de los datos.
+
+    Args:
+        df (pd.DataFrame): DataFrame a resumir.
+
+    Returns:
+        str: Hash hexadecimal del contenido.
+    """
+    h = hashlib.sha1()
+    h.update(repr([(str(col), str(tipo)) for col, tipo in df.dtypes.items()]).encode("utf-8"))
+    try:
+        hashes = pd.util.hash_pandas_object(df, index=True)
+    except TypeError:
+        # Celdas no hasheables (p. ej. listas): se comparan por su texto
+        hashes = pd.util.hash_pandas_object(df.astype(str), index=True)
+    h.update(hashes.to_numpy().tobytes())
+    return h.hexdigest()
+
+def calcular_promedios_filtrados(df, columnas_a_verificar, categorial, equipol, equipo_promedio, matriz_tests=None,
+                                 version=None):
     """
     Calcula el promedio por GENERO, CATEGORIA y EQUIPO, ignorando valores 0 y NaN por columna.
     Asigna valores manuales para hombres. Si no existen registros femeninos, los añade.
 
+    La tabla se cachea por la versión de los datos (o, sin ella, por la huella del
+    contenido de `df`): las interacciones que no cambian los datos reutilizan el
+    resultado sin recalcularlo.
+
     Args:
         df (pd.DataFrame): DataFrame con los datos originales.
         columnas_a_verificar (list): Columnas a calcular.
         categorial (str): Nombre de la columna de categoría.
         equipol (str): Nombre de la columna de equipo.
         equipo_promedio (str): Equipo base para valores por defecto.
+        matriz_tests (dict, optional): Matriz de `df` (ver `matriz.construir_matriz`). Si
+            contiene todas las columnas, los promedios se calculan directamente sobre ella.
+        version (str, optional): Versión de los datos de `df` (`dataset["version"]` de
+            `data_util.get_dataset`). Si se indica, no se recorre `df` para calcular su huella.
 
     Returns:
         pd.DataFrame: DataFrame con los promedios calculados y registros añadidos si es necesario.
     """
-    filas_promedio = []
-
-    for (genero, categoria, equipo), grupo in df.groupby(["GENERO", "CATEGORIA", "EQUIPO"]):
-        fila = {
-            "GENERO": genero,
-            "CATEGORIA": categoria,
-            "EQUIPO": equipo
-        }
-        for columna in columnas_a_verificar:
-            datos_columna = pd.to_numeric(grupo[columna], errors="coerce")
-            datos_validos = datos_columna[(datos_columna != 0) & (~datos_columna.isna())]
-            fila[columna] = datos_validos.mean() if not datos_validos.empty else np.nan
-        filas_promedio.append(fila)
+    columnas = list(dict.fromkeys(columnas_a_verificar))
+    huella = version or huella_dataframe(df[["GENERO", "CATEGORIA", "EQUIPO"] + columnas])
+    return _promedios_filtrados(huella, df, tuple(columnas), categorial, equipol, equipo_promedio, matriz_tests)
+
+@st.cache_data(show_spinner=False, max_entries=20)
+def _promedios_filtrados(huella, _df, columnas_a_verificar, categorial, equipol, equipo_promedio, _matriz=None):
+    columnas_a_verificar = list(columnas_a_verificar)
+    claves = ["GENERO", "CATEGORIA", "EQUIPO"]
+
+    if _matriz is not None and all(col in _matriz["columnas"] for col in columnas_a_verificar) \
+            and all(clave in _matriz["codigos"] for clave in claves):
+        df_promedios = matriz.promedios_por_grupo(_matriz, claves, columnas_a_verificar)
+        return _aplicar_promedios_referencia(df_promedios, columnas_a_verificar, categorial, equipol, equipo_promedio)
+
+    # Una sola agregación: los 0 y los valores no numéricos cuentan como NaN
+    valores = _df[columnas_a_verificar].apply(pd.to_numeric, errors="coerce")
+    valores = valores.where(valores != 0)
+    df_promedios = (
+        valores.groupby([_df[col] for col in claves], observed=True).mean()
+        .reset_index()
+        .round(2)
+    )
 
-    df_promedios = pd.DataFrame(filas_promedio).round(2)
+    return _aplicar_promedios_referencia(df_promedios, columnas_a_verificar, categorial, equipol, equipo_promedio)
 
+def _aplicar_promedios_referencia(df_promedios, columnas_a_verificar, categorial, equipol, equipo_promedio):
     # --- Valores manuales para Hombres ---
     condiciones_h = {
         "Cadete": {"DISTANCIA ACUMULADA (M)": 1400, "ALTURA-(CM)": 35.00, "TIEMPO 0-40M (SEG)": 5.7},